@@ -0,0 +1,173 @@
+"""
+Deterministic stand-ins for upstash_vector.Index and the Groq client
+Lets the RAG pipeline be benchmarked (and exercised) without live API keys.
+Latency is simulated with time.sleep, so thread pools overlap it like real I/O.
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import threading
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from digitaltwin_rag import compile_metadata_filter
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+class SimulatedLatency:
+    """Seeded latency source: base milliseconds plus uniform jitter"""
+
+    def __init__(self, base_ms=0.0, jitter_ms=0.0, seed=7):
+        self.base_ms = base_ms
+        self.jitter_ms = jitter_ms
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample_ms(self):
+        with self._lock:
+            return self.base_ms + self._rng.uniform(0, self.jitter_ms)
+
+    def sleep(self):
+        delay_ms = self.sample_ms()
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+class FakeIndex:
+    """In-memory Index with query/upsert/delete/info/range/fetch and simulated round trips.
+
+    Queries rank vectors by word overlap with the query text, so results are
+    deterministic and roughly relevant without any embedding model.
+    """
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, seed=7):
+        self.latency = SimulatedLatency(latency_ms, jitter_ms, seed)
+        self._vectors = {}  # id -> (data, metadata, word set)
+        self._lock = threading.Lock()
+        self.calls = {'query': 0, 'upsert': 0, 'delete': 0, 'info': 0, 'range': 0, 'fetch': 0}
+
+    def _count(self, method):
+        with self._lock:
+            self.calls[method] += 1
+
+    def upsert(self, vectors, namespace=""):
+        self._count('upsert')
+        self.latency.sleep()
+        with self._lock:
+            for vector in vectors:
+                if isinstance(vector, dict):
+                    vector_id, data, metadata = vector['id'], vector.get('data', ''), vector.get('metadata')
+                else:
+                    vector_id, data, metadata = (tuple(vector) + (None,))[:3]
+                self._vectors[vector_id] = (data, metadata or {}, set(_WORD.findall((data or '').lower())))
+        return "Success"
+
+    def delete(self, ids=None, namespace=""):
+        self._count('delete')
+        self.latency.sleep()
+        if isinstance(ids, str):
+            ids = [ids]
+        with self._lock:
+            deleted = sum(1 for vector_id in ids or [] if self._vectors.pop(vector_id, None) is not None)
+        return SimpleNamespace(deleted=deleted)
+
+    def info(self):
+        self._count('info')
+        self.latency.sleep()
+        return SimpleNamespace(vector_count=len(self._vectors), dimension=0)
+
+    def _result(self, vector_id, score, include_metadata, include_data):
+        data, metadata, _ = self._vectors[vector_id]
+        return SimpleNamespace(
+            id=vector_id,
+            score=score,
+            metadata=metadata if include_metadata else None,
+            data=data if include_data else None
+        )
+
+    def query(self, data=None, vector=None, top_k=10, include_metadata=False, include_data=False,
+              filter='', namespace="", include_vectors=False):
+        self._count('query')
+        self.latency.sleep()
+        query_words = set(_WORD.findall((data or '').lower()))
+        matches = compile_metadata_filter(filter)
+        with self._lock:
+            scored = []
+            for vector_id, (_, metadata, words) in self._vectors.items():
+                if not matches(metadata):
+                    continue
+                overlap = len(query_words & words)
+                score = overlap / (len(query_words | words) or 1)
+                scored.append((-score, vector_id))
+            scored.sort()
+            return [self._result(vector_id, -negative, include_metadata, include_data) for negative, vector_id in scored[:top_k]]
+
+    def fetch(self, ids=None, include_metadata=False, include_data=False, namespace="", include_vectors=False):
+        self._count('fetch')
+        self.latency.sleep()
+        if isinstance(ids, str):
+            ids = [ids]
+        with self._lock:
+            return [self._result(vector_id, 1.0, include_metadata, include_data) if vector_id in self._vectors else None for vector_id in ids or []]
+
+    def range(self, cursor="", limit=1, include_metadata=False, include_data=False, namespace="", include_vectors=False):
+        self._count('range')
+        self.latency.sleep()
+        start = int(cursor or 0)
+        with self._lock:
+            ids = sorted(self._vectors)
+            vectors = [self._result(vector_id, 0.0, include_metadata, include_data) for vector_id in ids[start:start + limit]]
+        next_cursor = str(start + limit) if start + limit < len(ids) else ""
+        return SimpleNamespace(vectors=vectors, next_cursor=next_cursor)
+
+class FakeGroq:
+    """Groq client stand-in: chat.completions.create with simulated time-to-first-token and token rate"""
+
+    def __init__(self, ttft_ms=0.0, tokens_per_second=0.0, completion_tokens=120, jitter_ms=0.0, seed=11):
+        self.latency = SimulatedLatency(ttft_ms, jitter_ms, seed)
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    @staticmethod
+    def _prompt_tokens(messages):
+        # ~4 characters per token is close enough for English prompts
+        return sum(len(message.get('content', '')) for message in messages) // 4
+
+    def _token_delay(self):
+        return 1 / self.tokens_per_second if self.tokens_per_second else 0.0
+
+    def _create(self, model, messages, temperature=None, max_tokens=None, stream=False, **kwargs):
+        with self._lock:
+            self.requests += 1
+            request_number = self.requests
+        completion_tokens = min(self.completion_tokens, max_tokens or self.completion_tokens)
+        words = [f"token{i}" for i in range(completion_tokens)]
+        words[0] = f"[{model} #{request_number}]"
+        usage = SimpleNamespace(
+            prompt_tokens=self._prompt_tokens(messages),
+            completion_tokens=completion_tokens,
+            total_tokens=self._prompt_tokens(messages) + completion_tokens
+        )
+
+        if stream:
+            return self._stream(words, usage)
+
+        self.latency.sleep()
+        time.sleep(self._token_delay() * completion_tokens)
+        message = SimpleNamespace(content=" ".join(words))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+    def _stream(self, words, usage):
+        self.latency.sleep()
+        for position, word in enumerate(words):
+            if position:
+                time.sleep(self._token_delay())
+            delta = SimpleNamespace(content=word if position == 0 else f" {word}")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], x_groq=None)
+        yield SimpleNamespace(choices=[], x_groq=SimpleNamespace(usage=usage))
@@ -0,0 +1,91 @@
+"""
+Micro-benchmark: classify_query_intent per-query cost
+Runs thousands of evaluation-style questions through the compiled word-boundary
+classifier and through the old per-call substring scan for comparison.
+
+Usage: python benchmarks/intent_classifier.py [--questions 5000] [--repeat 5]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from digitaltwin_rag import INTENT_KEYWORDS, classify_query_intent
+
+QUESTION_TEMPLATES = [
+    "Tell me about your work experience at {company}",
+    "What are your {skill} skills and proficiency levels?",
+    "Describe your {project} project using the STAR format",
+    "What did you study at {school}?",
+    "What are your salary expectations and work authorization status?",
+    "Describe your leadership experience and team coordination",
+    "What are your quantified achievements and measurable outcomes?",
+    "Where do you see your career path in five years?",
+    "Walk me through your {project} dashboard portfolio",
+    "How accurate were your {project} forecasts?",
+    "Have you used HTML and CSS in any role?",
+    "Why should we hire you over other graduates?"
+]
+
+FILLERS = {
+    'company': ['AUSBIZ Consulting', 'Newmont', 'De Rigglets', 'a fintech startup'],
+    'skill': ['Python', 'SQL', 'JavaScript', 'machine learning', 'Tableau', 'Power BI'],
+    'project': ['Food RAG', 'insurance premium pricing', 'credit risk', 'tennis analytics', 'trade'],
+    'school': ['UTS', 'University of Ghana', 'ACCA']
+}
+
+def generate_questions(count, seed=42):
+    """Deterministically generate evaluation-style questions"""
+    rng = random.Random(seed)
+    questions = []
+    for _ in range(count):
+        template = rng.choice(QUESTION_TEMPLATES)
+        questions.append(template.format(**{key: rng.choice(values) for key, values in FILLERS.items()}))
+    return questions
+
+def substring_classify_query_intent(query_text):
+    """The previous classifier: ~100 substring scans per call"""
+    query_lower = query_text.lower()
+    intent_scores = {}
+    for intent, keywords in dict(INTENT_KEYWORDS).items():
+        score = sum(1 for keyword in keywords if keyword in query_lower)
+        if score > 0:
+            intent_scores[intent] = score
+    if intent_scores:
+        return max(intent_scores, key=intent_scores.get)
+    return 'general'
+
+def time_classifier(classifier, questions, repeat):
+    """Best-of-repeat wall time per query, in microseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for question in questions:
+            classifier(question)
+        best = min(best, time.perf_counter() - start)
+    return best / len(questions) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark classify_query_intent")
+    parser.add_argument('--questions', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    questions = generate_questions(args.questions)
+
+    compiled_us = time_classifier(classify_query_intent, questions, args.repeat)
+    substring_us = time_classifier(substring_classify_query_intent, questions, args.repeat)
+    disagreements = sum(1 for q in questions if classify_query_intent(q) != substring_classify_query_intent(q))
+
+    print(f"🎯 classify_query_intent over {len(questions)} questions (best of {args.repeat})")
+    print(f"  compiled lookup: {compiled_us:8.2f} µs/query")
+    print(f"  substring scan : {substring_us:8.2f} µs/query")
+    print(f"  speedup        : {substring_us / compiled_us:8.2f}x")
+    print(f"  disagreements  : {disagreements} ({disagreements / len(questions):.1%} of questions)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Retrieval quality vs latency evaluation
+Auto-generates a golden question set from digitaltwin.json (each question labelled
+with the section chunk ID setup_vector_database assigns: project_N, experience_N,
+technical_skills, ...), then sweeps chunking strategy x filter mode x top_k and
+reports recall@k, MRR, retrieval latency and prompt size, plus the cheapest
+setting that meets a recall target.
+
+Retrieval runs through the real retrieve_context against the local vector index
+(hashing embeddings, no API keys) or, with --backend upstash, a scratch namespace
+of the configured Upstash index. Caches are disabled.
+
+Usage:
+  python benchmarks/retrieval_eval.py
+  python benchmarks/retrieval_eval.py --top-k 1,2,3,5,8 --filter-modes index,overfetch,none --recall-target 0.9
+  python benchmarks/retrieval_eval.py --hybrid-modes off,fuse --chunking section,hierarchical
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+from collections import Counter
+from contextlib import contextmanager
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+import digitaltwin_rag as rag
+from digitaltwin import caches, config
+from run_benchmarks import git_commit, latency_summary, parse_int_list
+
+_WORD = re.compile(r"[a-z][a-z0-9+#]{3,}")
+
+# Fixed questions for single-chunk sections, keyed by section chunk ID
+SECTION_QUESTIONS = {
+    'personal_overview': ["Give me a summary of your background", "Who are you and what do you do?"],
+    'salary_location_info': ["What are your salary expectations?", "Are you open to relocation or remote work?"],
+    'technical_skills': ["What programming languages and tools do you know?", "Which databases and cloud platforms have you used?"],
+    'soft_skills': ["What are your soft skills?", "How would you describe your communication and teamwork?"],
+    'education': ["What is your educational background?", "Which degrees and certifications do you hold?"],
+    'quantified_achievements': ["What measurable results have you achieved?", "What are your quantified achievements?"]
+}
+
+def section_id(result):
+    """Section-level ID of a retrieved chunk (hierarchical children map to their parent)"""
+    return (result.metadata or {}).get('parent_id') or result.id
+
+def short_title(title):
+    """'Project: Food RAG Application (Production-Ready)' -> 'Food RAG Application'"""
+    title = title.split(':', 1)[-1]
+    title = re.split(r"\s[—–(-]", title)[0]
+    return title.strip()
+
+def distinctive_terms(chunks, count=3):
+    """{chunk_id: the chunk's `count` rarest content words}, for keyword-style probe questions"""
+    words_by_chunk = {chunk_id: set(_WORD.findall(text.lower())) - rag.STOPWORDS for chunk_id, text, _ in chunks}
+    document_frequency = Counter(word for words in words_by_chunk.values() for word in words)
+    return {
+        chunk_id: sorted(words, key=lambda word: (document_frequency[word], word))[:count]
+        for chunk_id, words in words_by_chunk.items()
+    }
+
+def golden_questions(profile_data):
+    """[(question, expected section chunk ID)] derived from the profile's sections"""
+    chunks = rag.build_profile_chunks(profile_data, strategy='section')
+    terms = distinctive_terms(chunks)
+    questions = []
+    for chunk_id, _, metadata in chunks:
+        title = metadata.get('title', '')
+        chunk_type = metadata.get('type')
+        if chunk_id in SECTION_QUESTIONS:
+            questions.extend((question, chunk_id) for question in SECTION_QUESTIONS[chunk_id])
+        elif chunk_type == 'project':
+            questions.append((f"Tell me about your {short_title(title)} project", chunk_id))
+        elif chunk_type == 'experience':
+            role, _, company = title.partition(' at ')
+            questions.append((f"What did you achieve as {role} at {company}?", chunk_id))
+        elif chunk_type == 'portfolio':
+            questions.append((f"Walk me through your {short_title(title)} dashboard", chunk_id))
+        # Keyword probe: the chunk's rarest words, worded so no intent filter applies
+        if terms[chunk_id]:
+            questions.append((f"Can you explain {', '.join(terms[chunk_id][:-1])} and {terms[chunk_id][-1]}?", chunk_id))
+    return questions
+
+@contextmanager
+def override(**settings):
+    """Temporarily replace digitaltwin.config settings"""
+    previous = {name: getattr(config, name) for name in settings}
+    for name, value in settings.items():
+        setattr(config, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(config, name, value)
+
+def build_index(profile_data, chunking, backend, workdir):
+    """Index the profile with one chunking strategy; also attaches its BM25 index and chunk store"""
+    if backend == 'upstash':
+        index = rag.NamespacedIndex(rag.create_vector_index('upstash'), f"retrieval-eval-{chunking}")
+    else:
+        index = rag.LocalVectorIndex(path=os.path.join(workdir, chunking))
+    manifest_path = os.path.join(workdir, f"{chunking}.manifest.json")
+    rag.sync_vectors(index, rag.iter_profile_chunks(profile_data, strategy=chunking), mode='full', current_count=None, manifest_path=manifest_path)
+    index.lexical_index = rag.BM25Index(rag.iter_profile_chunks(profile_data, strategy=chunking))
+    if config.CHUNK_STORE_ENABLED:
+        index.chunk_store = rag.ChunkStore(rag.iter_profile_chunks(profile_data, strategy=chunking))
+    return index
+
+def evaluate(index, profile_data, questions, top_k, filter_mode, hybrid_mode, chunking):
+    """recall@k, MRR, retrieval latency and prompt tokens for one setting"""
+    settings = {
+        'RAG_TOP_K': top_k,
+        'HYBRID_MODE': hybrid_mode,
+        'CHUNKING_STRATEGY': chunking,
+        'RAG_FILTER_MODE': 'index' if filter_mode == 'none' else filter_mode
+    }
+    if filter_mode == 'none':
+        settings['INTENT_FILTER_TYPES'] = {}
+    system_tokens = rag.estimate_tokens(rag.build_system_prompt(profile_data.get('personal', {})))
+
+    hits, reciprocal_ranks, latencies, prompt_tokens = 0, 0.0, [], []
+    with override(**settings):
+        for question, expected in questions:
+            intent = rag.classify_query_intent(question)
+            started = time.perf_counter()
+            results = rag.retrieve_context(index, question, intent) or []
+            latencies.append((time.perf_counter() - started) * 1000)
+
+            ranked = []
+            for result in results[:top_k]:
+                found = section_id(result)
+                if found not in ranked:
+                    ranked.append(found)
+            if expected in ranked:
+                hits += 1
+                reciprocal_ranks += 1 / (ranked.index(expected) + 1)
+
+            request = rag.assemble_rag_prompt(question, intent, results[:top_k], profile_data)
+            prompt_tokens.append(system_tokens + rag.estimate_tokens(request.get('prompt', '')))
+
+    return {
+        'chunking': chunking,
+        'filter_mode': filter_mode,
+        'hybrid_mode': hybrid_mode,
+        'top_k': top_k,
+        'recall': round(hits / len(questions), 4),
+        'mrr': round(reciprocal_ranks / len(questions), 4),
+        'mean_prompt_tokens': round(sum(prompt_tokens) / len(prompt_tokens), 1),
+        'retrieval': latency_summary(latencies)
+    }
+
+def cheapest_meeting(rows, recall_target):
+    """Setting with the fewest prompt tokens (then lowest p95 latency) whose recall meets the target"""
+    eligible = [row for row in rows if row['recall'] >= recall_target]
+    if not eligible:
+        return None
+    return min(eligible, key=lambda row: (row['mean_prompt_tokens'], row['retrieval']['p95_ms']))
+
+def describe(row):
+    return f"chunking={row['chunking']} filter={row['filter_mode']} hybrid={row['hybrid_mode']} top_k={row['top_k']}"
+
+def parse_list(value):
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate retrieval recall vs latency and prompt cost")
+    parser.add_argument('--top-k', type=parse_int_list, default=[1, 2, 3, 5, 8])
+    parser.add_argument('--filter-modes', type=parse_list, default=['index', 'overfetch', 'none'], help="index, overfetch and/or none (no intent filter)")
+    parser.add_argument('--chunking', type=parse_list, default=['section', 'hierarchical'])
+    parser.add_argument('--hybrid-modes', type=parse_list, default=['off'], help="off, fuse and/or local_first")
+    parser.add_argument('--recall-target', type=float, default=0.9)
+    parser.add_argument('--backend', choices=['local', 'upstash'], default='local')
+    parser.add_argument('--questions-out', help="also write the golden question set as JSONL (batch-mode input)")
+    parser.add_argument('--output', help="results file (default benchmarks/results/retrieval-<commit>.json)")
+    args = parser.parse_args()
+
+    with open(os.path.join(REPO_DIR, config.JSON_FILE), "r", encoding="utf-8") as f:
+        profile_data = json.load(f)
+    caches.RETRIEVAL_CACHE = None
+    caches.ANSWER_CACHE = None
+
+    questions = golden_questions(profile_data)
+    print(f"🧪 {len(questions)} golden questions over {len({expected for _, expected in questions})} sections")
+    if args.questions_out:
+        with open(args.questions_out, "w", encoding="utf-8") as f:
+            for number, (question, expected) in enumerate(questions, start=1):
+                f.write(json.dumps({'id': f"golden_{number}", 'question': question, 'expected': expected}) + "\n")
+
+    workdir = tempfile.mkdtemp(prefix='digitaltwin-retrieval-eval-')
+    rows = []
+    print(f"{'chunking':<13}{'filter':<10}{'hybrid':<12}{'k':>3}{'recall':>9}{'MRR':>8}{'tokens':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    for chunking in args.chunking:
+        index = build_index(profile_data, chunking, args.backend, workdir)
+        for filter_mode in args.filter_modes:
+            for hybrid_mode in args.hybrid_modes:
+                for top_k in args.top_k:
+                    row = evaluate(index, profile_data, questions, top_k, filter_mode, hybrid_mode, chunking)
+                    rows.append(row)
+                    print(f"{chunking:<13}{filter_mode:<10}{hybrid_mode:<12}{top_k:>3}{row['recall']:>9.3f}{row['mrr']:>8.3f}"
+                          f"{row['mean_prompt_tokens']:>9.0f}{row['retrieval']['p50_ms']:>9.2f}{row['retrieval']['p95_ms']:>9.2f}")
+
+    best = cheapest_meeting(rows, args.recall_target)
+    if best:
+        print(f"\n✅ Cheapest setting with recall ≥ {args.recall_target:g}: {describe(best)} "
+              f"(recall {best['recall']:.3f}, ~{best['mean_prompt_tokens']:.0f} prompt tokens, p95 {best['retrieval']['p95_ms']:.2f}ms)")
+    else:
+        top = max(rows, key=lambda row: (row['recall'], -row['mean_prompt_tokens']))
+        print(f"\n⚠️ No setting reaches recall {args.recall_target:g}; best is {describe(top)} (recall {top['recall']:.3f})")
+
+    commit = git_commit()
+    output_path = args.output or os.path.join(BENCHMARK_DIR, 'results', f"retrieval-{commit}.json")
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({
+            'commit': commit,
+            'backend': args.backend,
+            'questions': len(questions),
+            'recall_target': args.recall_target,
+            'recommended': best,
+            'results': rows
+        }, f, indent=2)
+    print(f"📄 Results written to {output_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Digital Twin RAG benchmark suite
+Runs entirely offline against FakeIndex / FakeGroq and writes machine-readable
+results (benchmarks/results/<commit>.json by default) for comparison across commits.
+
+Benchmarks:
+- chunking: iter_profile_chunks + sync_vectors on synthetic profiles 10x-1000x digitaltwin.json
+- intent:   classify_query_intent throughput
+- e2e:      rag_query_detailed throughput and tail latency at several concurrency levels
+
+Usage:
+  python benchmarks/run_benchmarks.py
+  python benchmarks/run_benchmarks.py --scales 10,100 --concurrency 1,8,32 --requests 400
+  python benchmarks/run_benchmarks.py --compare benchmarks/results/<older-commit>.json
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+import digitaltwin_rag as rag
+from digitaltwin import caches, config
+from fakes import FakeIndex, FakeGroq
+from intent_classifier import generate_questions
+
+# Profile sections that grow with the synthetic scale factor
+SCALED_LIST_SECTIONS = ['projects_star_format', 'experience', 'leadership_examples_star']
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def latency_summary(samples_ms):
+    ordered = sorted(samples_ms)
+    return {
+        'p50_ms': round(percentile(ordered, 0.50), 3),
+        'p95_ms': round(percentile(ordered, 0.95), 3),
+        'p99_ms': round(percentile(ordered, 0.99), 3),
+        'max_ms': round(ordered[-1], 3) if ordered else 0.0
+    }
+
+def synthetic_profile(base_profile, scale):
+    """Copy of the profile with list sections (and dashboards) repeated `scale` times"""
+    profile = copy.deepcopy(base_profile)
+    for section in SCALED_LIST_SECTIONS:
+        entries = base_profile.get(section, [])
+        profile[section] = [
+            {key: (f"{value} (variant {copy_number})" if isinstance(value, str) else value) for key, value in entry.items()}
+            for copy_number in range(scale)
+            for entry in entries
+        ]
+    dashboards = base_profile.get('portfolio_evidence', {}).get('dashboards', [])
+    if dashboards:
+        profile['portfolio_evidence']['dashboards'] = [dict(dashboard, title=f"{dashboard.get('title', '')} (variant {copy_number})") for copy_number in range(scale) for dashboard in dashboards]
+    return profile
+
+def benchmark_chunking(base_profile, scales, upsert_latency_ms):
+    """Chunk generation rate and streamed sync time for growing profiles"""
+    results = []
+    for scale in scales:
+        profile = synthetic_profile(base_profile, scale)
+
+        started = time.perf_counter()
+        chunk_count = sum(1 for _ in rag.iter_profile_chunks(profile))
+        chunk_seconds = time.perf_counter() - started
+
+        index = FakeIndex(latency_ms=upsert_latency_ms)
+        started = time.perf_counter()
+        stats = rag.sync_vectors(index, rag.iter_profile_chunks(profile), mode='incremental', current_count=0)
+        sync_seconds = time.perf_counter() - started
+
+        results.append({
+            'scale': scale,
+            'chunks': chunk_count,
+            'chunking_seconds': round(chunk_seconds, 4),
+            'chunks_per_second': round(chunk_count / chunk_seconds, 1) if chunk_seconds else None,
+            'sync_seconds': round(sync_seconds, 4),
+            'upsert_requests': index.calls['upsert'],
+            'upserted': len(stats['upserted'])
+        })
+        print(f"  {scale:>5}x: {chunk_count:>6} chunks, chunking {chunk_seconds * 1000:8.1f}ms, sync {sync_seconds * 1000:8.1f}ms ({index.calls['upsert']} upserts)")
+    return results
+
+def benchmark_intent(question_count):
+    questions = generate_questions(question_count)
+    started = time.perf_counter()
+    for question in questions:
+        rag.classify_query_intent(question)
+    elapsed = time.perf_counter() - started
+    result = {
+        'questions': question_count,
+        'us_per_query': round(elapsed / question_count * 1e6, 3),
+        'queries_per_second': round(question_count / elapsed, 1)
+    }
+    print(f"  {result['us_per_query']} µs/query ({result['queries_per_second']:.0f} queries/s)")
+    return result
+
+def benchmark_end_to_end(profile, concurrency_levels, request_count, index_latency_ms, llm_ttft_ms, llm_tokens_per_second):
+    """rag_query_detailed throughput and tail latency; caches are disabled so every request pays full cost"""
+    index = FakeIndex(latency_ms=index_latency_ms, jitter_ms=index_latency_ms / 2)
+    rag.sync_vectors(index, rag.iter_profile_chunks(profile), current_count=0)
+    rag.build_chunk_store(profile)
+    groq_client = FakeGroq(ttft_ms=llm_ttft_ms, jitter_ms=llm_ttft_ms / 2, tokens_per_second=llm_tokens_per_second)
+    questions = generate_questions(request_count, seed=99)
+
+    results = []
+    for concurrency in concurrency_levels:
+        latencies = []
+        stage_samples = {}
+
+        def run(question):
+            details = rag.rag_query_detailed(index, groq_client, question, profile, use_cache=False)
+            return details['timings_ms']
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for timings in executor.map(run, questions):
+                latencies.append(timings['total'])
+                for stage, duration_ms in timings.items():
+                    stage_samples.setdefault(stage, []).append(duration_ms)
+        elapsed = time.perf_counter() - started
+
+        result = {
+            'concurrency': concurrency,
+            'requests': request_count,
+            'throughput_rps': round(request_count / elapsed, 2),
+            **latency_summary(latencies),
+            'stages': {stage: latency_summary(samples) for stage, samples in stage_samples.items() if stage != 'total'}
+        }
+        results.append(result)
+        print(f"  concurrency {concurrency:>3}: {result['throughput_rps']:8.2f} req/s, p50 {result['p50_ms']:8.1f}ms, p95 {result['p95_ms']:8.1f}ms, p99 {result['p99_ms']:8.1f}ms")
+    return results
+
+def compare(current, baseline_path):
+    """Print end-to-end and chunking deltas against an earlier results file"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\n📊 Compared with {baseline.get('commit', baseline_path)}:")
+
+    def delta(new, old):
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    old_e2e = {row['concurrency']: row for row in baseline.get('end_to_end', [])}
+    for row in current.get('end_to_end', []):
+        old = old_e2e.get(row['concurrency'])
+        if old:
+            print(f"  e2e c={row['concurrency']:>3}: throughput {delta(row['throughput_rps'], old['throughput_rps'])}, p99 {delta(row['p99_ms'], old['p99_ms'])}")
+    old_chunking = {row['scale']: row for row in baseline.get('chunking', [])}
+    for row in current.get('chunking', []):
+        old = old_chunking.get(row['scale'])
+        if old:
+            print(f"  chunking {row['scale']:>5}x: chunking time {delta(row['chunking_seconds'], old['chunking_seconds'])}, sync time {delta(row['sync_seconds'], old['sync_seconds'])}")
+    if 'intent' in current and 'intent' in baseline:
+        print(f"  intent: µs/query {delta(current['intent']['us_per_query'], baseline['intent']['us_per_query'])}")
+
+def parse_int_list(value):
+    return [int(part) for part in value.split(',') if part.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Digital Twin RAG pipeline offline")
+    parser.add_argument('--scales', type=parse_int_list, default=[10, 100, 1000], help="synthetic profile sizes (multiples of digitaltwin.json)")
+    parser.add_argument('--concurrency', type=parse_int_list, default=[1, 4, 16, 64])
+    parser.add_argument('--requests', type=int, default=200, help="end-to-end requests per concurrency level")
+    parser.add_argument('--intent-questions', type=int, default=5000)
+    parser.add_argument('--index-latency-ms', type=float, default=20.0)
+    parser.add_argument('--upsert-latency-ms', type=float, default=5.0)
+    parser.add_argument('--llm-ttft-ms', type=float, default=150.0)
+    parser.add_argument('--llm-tokens-per-sec', type=float, default=800.0)
+    parser.add_argument('--skip', default='', help="comma-separated benchmarks to skip: chunking,intent,e2e")
+    parser.add_argument('--output', help="results file (default benchmarks/results/<commit>.json)")
+    parser.add_argument('--compare', metavar='BASELINE', help="earlier results file to compare against")
+    args = parser.parse_args()
+    skip = set(args.skip.split(','))
+
+    with open(os.path.join(REPO_DIR, config.JSON_FILE), "r", encoding="utf-8") as f:
+        base_profile = json.load(f)
+
+    # Keep the benchmark self-contained: no manifest in the repo, no cache effects
+    manifest_dir = tempfile.mkdtemp(prefix='digitaltwin-bench-')
+    config.VECTOR_MANIFEST_FILE = os.path.join(manifest_dir, 'manifest.json')
+    caches.ANSWER_CACHE = None
+    caches.RETRIEVAL_CACHE = None
+
+    commit = git_commit()
+    results = {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')}
+    }
+
+    if 'chunking' not in skip:
+        print("🧩 Chunking + streamed sync on synthetic profiles")
+        results['chunking'] = benchmark_chunking(base_profile, args.scales, args.upsert_latency_ms)
+    if 'intent' not in skip:
+        print("🎯 Intent classification throughput")
+        results['intent'] = benchmark_intent(args.intent_questions)
+    if 'e2e' not in skip:
+        print("⚡ End-to-end rag_query throughput and tail latency")
+        results['end_to_end'] = benchmark_end_to_end(
+            base_profile, args.concurrency, args.requests,
+            args.index_latency_ms, args.llm_ttft_ms, args.llm_tokens_per_sec
+        )
+
+    output_path = args.output or os.path.join(BENCHMARK_DIR, 'results', f"{commit}.json")
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✅ Results written to {output_path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
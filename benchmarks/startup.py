@@ -0,0 +1,97 @@
+"""
+Startup-time benchmark
+Measures the cold start the CLI pays before it can answer anything:
+
+- import:   `import digitaltwin_rag` in a fresh interpreter (no groq/upstash_vector)
+- help:     `python digitaltwin_rag.py --help` wall time
+- init:     profile load + Groq client + vector index setup, sequential vs
+            concurrent (StartupComponents), with simulated client/index latency,
+            including when the first special command could be answered
+
+Usage: python benchmarks/startup.py [--repeat 5] [--index-latency-ms 150] [--groq-init-ms 300]
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+import tempfile
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+def time_subprocess(command, repeat):
+    """Best-of-repeat wall time of a fresh interpreter running command, in ms"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(command, cwd=REPO_DIR, check=True, capture_output=True)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Digital Twin startup time")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--index-latency-ms', type=float, default=150.0, help="simulated vector round trip (info + upserts)")
+    parser.add_argument('--groq-init-ms', type=float, default=300.0, help="simulated Groq SDK import + client creation")
+    args = parser.parse_args()
+
+    import_ms = time_subprocess([sys.executable, '-c', 'import digitaltwin_rag'], args.repeat)
+    help_ms = time_subprocess([sys.executable, 'digitaltwin_rag.py', '--help'], args.repeat)
+    sdk_ms = time_subprocess([sys.executable, '-c', 'import groq, upstash_vector'], args.repeat)
+    print(f"🚀 Cold start (best of {args.repeat})")
+    print(f"  import digitaltwin_rag : {import_ms:8.1f} ms")
+    print(f"  --help                 : {help_ms:8.1f} ms")
+    print(f"  groq + upstash_vector  : {sdk_ms:8.1f} ms (now deferred until a client is created)")
+
+    import digitaltwin_rag as rag
+    from digitaltwin import config
+    from fakes import FakeIndex, FakeGroq
+
+    config.VECTOR_MANIFEST_FILE = os.path.join(tempfile.mkdtemp(prefix='digitaltwin-startup-'), 'manifest.json')
+
+    def load_profile():
+        return rag.ProfileStore(os.path.join(REPO_DIR, config.JSON_FILE)).data
+
+    def create_groq():
+        time.sleep(args.groq_init_ms / 1000)
+        return FakeGroq()
+
+    def setup_index():
+        index = FakeIndex(latency_ms=args.index_latency_ms)
+        index.info()
+        rag.sync_vectors(index, rag.iter_profile_chunks(load_profile()), current_count=0)
+        return index
+
+    def sequential():
+        started = time.perf_counter()
+        load_profile()
+        create_groq()
+        setup_index()
+        ready_ms = (time.perf_counter() - started) * 1000
+        return ready_ms, ready_ms
+
+    def concurrent():
+        started = time.perf_counter()
+        startup = rag.StartupComponents()
+        startup.start('profile', load_profile)
+        startup.start('groq', create_groq)
+        startup.start('vector_index', setup_index)
+        startup.result('profile')
+        commands_ms = (time.perf_counter() - started) * 1000
+        startup.result('groq')
+        startup.result('vector_index')
+        return commands_ms, (time.perf_counter() - started) * 1000
+
+    print(f"⚡ Initialization (groq {args.groq_init_ms:g}ms, index round trip {args.index_latency_ms:g}ms)")
+    for name, run in (('sequential', sequential), ('concurrent', concurrent)):
+        samples = [run() for _ in range(args.repeat)]
+        commands_ms = min(sample[0] for sample in samples)
+        ready_ms = min(sample[1] for sample in samples)
+        print(f"  {name:<10}: special commands after {commands_ms:8.1f} ms, fully ready after {ready_ms:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+"""
+Digital Twin RAG pipeline, one module per layer (each imports only the ones above it):
+
+- config: settings from the environment
+- observability, upstream: logging/metrics, and resilient Upstash/Groq calls
+- profiles, backends, chunking: the profile, vector index backends, profile chunks
+- caches, retrieval, indexing, tenants: caches, retrieval, vector sync, multi-tenant registry
+- intent, generation, structured, conversation: classification, Groq generation,
+  answers straight from the profile, conversation memory
+- pipeline, batch, server: the RAG pipeline and its batch and HTTP front ends
+
+groq, upstash_vector and httpx are imported where their clients are created, and numpy
+inside the local vector backend and embedders, so --help, the Upstash path and the
+special commands never pay for loading them.
+"""
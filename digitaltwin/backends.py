@@ -0,0 +1,401 @@
+"""Vector index backends: the in-process LocalVectorIndex, embedders, metadata filters and namespacing"""
+
+import os
+import re
+import json
+import zlib
+import threading
+from dataclasses import dataclass
+
+from . import config
+from .upstream import configure_vector_client
+
+# Function words ignored by the local lexical embedder
+STOPWORDS = frozenset("""a an and are as at be by can did do does for from had has have how i in is it its
+me my of on or our so that the their them they this to was we were what when where which who
+why will with you your""".split())
+
+class VectorBackend:
+    """Vector index interface used by the RAG pipeline (upstash_vector.Index satisfies it)"""
+    
+    def query(self, data=None, vector=None, top_k=10, include_metadata=False, include_data=False, filter=''):
+        raise NotImplementedError
+    
+    def upsert(self, vectors):
+        raise NotImplementedError
+    
+    def delete(self, ids=None):
+        raise NotImplementedError
+    
+    def info(self):
+        raise NotImplementedError
+    
+    def range(self, cursor="", limit=1, include_metadata=False, include_data=False):
+        raise NotImplementedError
+    
+    def fetch(self, ids=None, include_metadata=False, include_data=False):
+        raise NotImplementedError
+
+@dataclass
+class LocalQueryResult:
+    """Query/fetch result with the same attributes as upstash_vector's results"""
+    id: str
+    score: float = 0.0
+    metadata: dict = None
+    data: str = None
+
+@dataclass
+class LocalIndexInfo:
+    vector_count: int
+    dimension: int
+
+@dataclass
+class LocalDeleteResult:
+    deleted: int
+
+@dataclass
+class LocalRangeResult:
+    vectors: list
+    next_cursor: str
+
+class HashingEmbedder:
+    """Dependency-free local embedder: signed feature hashing of word unigrams and bigrams"""
+    
+    name = 'hashing'
+    
+    def __init__(self, dimension=config.LOCAL_EMBEDDING_DIM):
+        self.dimension = dimension
+    
+    def embed(self, texts):
+        import numpy as np
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = [w for w in re.findall(r"[a-z0-9][a-z0-9+#.\-]*", (text or "").lower()) if w not in STOPWORDS]
+            features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+            for feature in features:
+                bucket = zlib.crc32(feature.encode('utf-8'))
+                sign = 1.0 if bucket & 0x80000000 else -1.0
+                matrix[row, bucket % self.dimension] += sign
+        # Sublinear term frequency, then L2-normalize so dot product == cosine
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        return _normalize_rows(matrix)
+
+class SentenceTransformerEmbedder:
+    """Local neural embedder backed by the optional sentence-transformers package"""
+    
+    name = 'sentence-transformers'
+    
+    def __init__(self, model_name=config.LOCAL_EMBEDDING_MODEL):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError("sentence-transformers is not installed (pip install sentence-transformers)")
+        self.model = SentenceTransformer(model_name)
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        self.name = f"sentence-transformers:{model_name}"
+    
+    def embed(self, texts):
+        embeddings = self.model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True)
+        return embeddings.astype('float32')
+
+def _normalize_rows(matrix):
+    """L2-normalize each row, leaving all-zero rows untouched"""
+    import numpy as np
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+_FILTER_CLAUSE = re.compile(r"^\s*(\w+)\s*(=|!=|NOT IN|IN)\s*(.+?)\s*$", re.IGNORECASE)
+
+def _parse_filter_value(raw):
+    raw = raw.strip()
+    if raw[:1] in ("'", '"') and raw[-1:] == raw[:1]:
+        return raw[1:-1].replace("\\'", "'")
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+def compile_metadata_filter(expression):
+    """Compile the subset of Upstash filter syntax used here (=, !=, IN, NOT IN joined by AND/OR) into a predicate"""
+    if not expression or not expression.strip():
+        return lambda metadata: True
+    
+    alternatives = []
+    for disjunct in re.split(r"\s+OR\s+", expression, flags=re.IGNORECASE):
+        clauses = []
+        for conjunct in re.split(r"\s+AND\s+", disjunct, flags=re.IGNORECASE):
+            match = _FILTER_CLAUSE.match(conjunct.strip().strip('()'))
+            if not match:
+                raise ValueError(f"Unsupported filter clause: {conjunct}")
+            field, operator, raw = match.group(1), match.group(2).upper(), match.group(3)
+            if operator in ('IN', 'NOT IN'):
+                values = [_parse_filter_value(v) for v in raw.strip('()').split(',')]
+            else:
+                values = [_parse_filter_value(raw)]
+            clauses.append((field, operator, values))
+        alternatives.append(clauses)
+    
+    def predicate(metadata):
+        metadata = metadata or {}
+        for clauses in alternatives:
+            if all((metadata.get(field) in values) == (operator in ('=', 'IN')) for field, operator, values in clauses):
+                return True
+        return False
+    
+    return predicate
+
+def create_embedder(name=None):
+    """Create the local embedder selected by LOCAL_EMBEDDER"""
+    name = (name or config.LOCAL_EMBEDDER).lower()
+    if name == 'hashing':
+        return HashingEmbedder()
+    if name in ('sentence-transformers', 'sentence_transformers'):
+        return SentenceTransformerEmbedder()
+    raise ValueError(f"Unknown local embedder: {name}")
+
+class LocalVectorIndex(VectorBackend):
+    """In-process vector index: brute-force cosine top-k over a matrix of normalized embeddings.
+    
+    Persists to `<path>/embeddings.npy` (memory-mapped on load) plus `<path>/chunks.json`
+    holding IDs, raw data and metadata. Writes are buffered until persist().
+    """
+    
+    def __init__(self, path=None, embedder=None):
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("numpy is required for the local vector backend (pip install numpy)")
+        self.path = path or config.LOCAL_INDEX_PATH
+        self.embedder = embedder or create_embedder()
+        self._lock = threading.Lock()
+        self._ids = []
+        self._data = []
+        self._metadata = []
+        self._positions = {}
+        self._matrix = np.zeros((0, self.embedder.dimension), dtype=np.float32)
+        self._buffer = None  # writable storage behind _matrix, with spare rows for appends
+        self._dirty = False
+        self._load()
+    
+    @classmethod
+    def from_env(cls):
+        return cls()
+    
+    def _load(self):
+        import numpy as np
+        chunks_file = os.path.join(self.path, 'chunks.json')
+        matrix_file = os.path.join(self.path, 'embeddings.npy')
+        try:
+            with open(chunks_file, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        
+        if stored.get('embedder') != self.embedder.name or stored.get('dimension') != self.embedder.dimension:
+            print(f"⚠️ Local index at {self.path} was built with a different embedder, starting empty")
+            return
+        
+        matrix = np.load(matrix_file, mmap_mode='r')
+        if matrix.shape[0] != len(stored['ids']):
+            print(f"⚠️ Local index at {self.path} is inconsistent, starting empty")
+            return
+        
+        self._ids = stored['ids']
+        self._data = stored['data']
+        self._metadata = stored['metadata']
+        self._positions = {vector_id: row for row, vector_id in enumerate(self._ids)}
+        self._matrix = matrix
+    
+    def persist(self):
+        """Write buffered changes to disk atomically"""
+        import numpy as np
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(self.path, exist_ok=True)
+            matrix_file = os.path.join(self.path, 'embeddings.npy')
+            chunks_file = os.path.join(self.path, 'chunks.json')
+            with open(f"{matrix_file}.tmp", "wb") as f:
+                np.save(f, np.ascontiguousarray(self._matrix))
+            with open(f"{chunks_file}.tmp", "w", encoding="utf-8") as f:
+                json.dump({
+                    "embedder": self.embedder.name,
+                    "dimension": self.embedder.dimension,
+                    "ids": self._ids,
+                    "data": self._data,
+                    "metadata": self._metadata
+                }, f, ensure_ascii=False)
+            os.replace(f"{matrix_file}.tmp", matrix_file)
+            os.replace(f"{chunks_file}.tmp", chunks_file)
+            self._dirty = False
+    
+    def upsert(self, vectors, namespace=""):
+        rows = []
+        for vector in vectors:
+            if isinstance(vector, dict):
+                rows.append((vector['id'], vector.get('data', ''), vector.get('metadata') or {}))
+            else:
+                vector_id, data, metadata = (tuple(vector) + (None,))[:3]
+                rows.append((vector_id, data, metadata or {}))
+        if not rows:
+            return "Success"
+        
+        embeddings = self.embedder.embed([data for _, data, _ in rows])
+        
+        with self._lock:
+            new_ids = {vector_id for vector_id, _, _ in rows if vector_id not in self._positions}
+            buffer = self._writable_buffer(len(self._ids) + len(new_ids))
+            for (vector_id, data, metadata), embedding in zip(rows, embeddings):
+                row = self._positions.get(vector_id)
+                if row is None:
+                    row = self._positions[vector_id] = len(self._ids)
+                    self._ids.append(vector_id)
+                    self._data.append(data)
+                    self._metadata.append(metadata)
+                else:
+                    self._data[row] = data
+                    self._metadata[row] = metadata
+                buffer[row] = embedding
+            self._matrix = buffer[:len(self._ids)]
+            self._dirty = True
+        return "Success"
+    
+    def _writable_buffer(self, rows):
+        """Writable storage for at least `rows` rows holding the current matrix (call under _lock).
+        
+        Grows by doubling so a batch of upserts doesn't copy the whole matrix; the read-only
+        memory-mapped matrix from disk is copied once, on the first write.
+        """
+        import numpy as np
+        buffer = self._buffer
+        if buffer is not None and buffer.shape[0] >= rows:
+            return buffer
+        capacity = max(rows, 2 * (buffer.shape[0] if buffer is not None else 0), 64)
+        grown = np.empty((capacity, self.embedder.dimension), dtype=np.float32)
+        count = len(self._ids)
+        grown[:count] = self._matrix[:count]
+        self._buffer = grown
+        return grown
+    
+    def delete(self, ids=None, namespace=""):
+        if isinstance(ids, str):
+            ids = [ids]
+        with self._lock:
+            doomed = {self._positions[vector_id] for vector_id in ids or [] if vector_id in self._positions}
+            if doomed:
+                keep = [row for row in range(len(self._ids)) if row not in doomed]
+                self._matrix = self._buffer = self._matrix[keep]  # fancy indexing copies
+                self._ids = [self._ids[row] for row in keep]
+                self._data = [self._data[row] for row in keep]
+                self._metadata = [self._metadata[row] for row in keep]
+                self._positions = {vector_id: row for row, vector_id in enumerate(self._ids)}
+                self._dirty = True
+        return LocalDeleteResult(deleted=len(doomed))
+    
+    def reset(self, namespace=""):
+        import numpy as np
+        with self._lock:
+            self._ids, self._data, self._metadata, self._positions = [], [], [], {}
+            self._matrix = np.zeros((0, self.embedder.dimension), dtype=np.float32)
+            self._buffer = None
+            self._dirty = True
+        return "Success"
+    
+    def info(self):
+        return LocalIndexInfo(vector_count=len(self._ids), dimension=self.embedder.dimension)
+    
+    def _result(self, row, score, include_metadata, include_data):
+        return LocalQueryResult(
+            id=self._ids[row],
+            score=score,
+            metadata=self._metadata[row] if include_metadata else None,
+            data=self._data[row] if include_data else None
+        )
+    
+    def query(self, data=None, vector=None, top_k=10, include_metadata=False, include_data=False,
+              filter='', namespace="", include_vectors=False):
+        import numpy as np
+        if data is None and vector is None:
+            raise ValueError("Either data or vector must be provided")
+        query_vector = self.embedder.embed([data])[0] if vector is None else _normalize_rows(np.asarray([vector], dtype=np.float32))[0]
+        
+        with self._lock:
+            matrix = self._matrix
+            count = len(self._ids)
+            if count == 0 or top_k <= 0:
+                return []
+            similarities = matrix @ query_vector
+            if filter:
+                matches = compile_metadata_filter(filter)
+                allowed = np.fromiter((matches(metadata) for metadata in self._metadata), dtype=bool, count=count)
+                count = int(allowed.sum())
+                if count == 0:
+                    return []
+                similarities = np.where(allowed, similarities, -np.inf)
+            k = min(top_k, count)
+            top_rows = np.argpartition(-similarities, k - 1)[:k]
+            top_rows = top_rows[np.argsort(-similarities[top_rows])]
+            # Report scores on Upstash's [0, 1] cosine scale
+            return [self._result(int(row), float((1 + similarities[row]) / 2), include_metadata, include_data) for row in top_rows]
+    
+    def fetch(self, ids=None, include_metadata=False, include_data=False, namespace="", include_vectors=False):
+        if isinstance(ids, str):
+            ids = [ids]
+        with self._lock:
+            return [self._result(self._positions[vector_id], 1.0, include_metadata, include_data) if vector_id in self._positions else None for vector_id in ids or []]
+    
+    def range(self, cursor="", limit=1, include_metadata=False, include_data=False, namespace="", include_vectors=False):
+        start = int(cursor or 0)
+        with self._lock:
+            rows = range(start, min(start + limit, len(self._ids)))
+            vectors = [self._result(row, 0.0, include_metadata, include_data) for row in rows]
+            next_cursor = str(start + limit) if start + limit < len(self._ids) else ""
+        return LocalRangeResult(vectors=vectors, next_cursor=next_cursor)
+
+def create_vector_index(backend=None):
+    """Create the vector index for the configured backend ('upstash' or 'local')"""
+    backend = (backend or config.VECTOR_BACKEND).lower()
+    if backend == 'local':
+        return LocalVectorIndex.from_env()
+    if backend == 'upstash':
+        from upstash_vector import Index
+        return configure_vector_client(Index.from_env(retries=0))
+    raise ValueError(f"Unknown vector backend: {backend}")
+
+def vector_index_identity():
+    """Identify the configured vector store, so manifests are never reused across indexes"""
+    if config.VECTOR_BACKEND == 'local':
+        return f"local:{os.path.abspath(config.LOCAL_INDEX_PATH)}"
+    return os.getenv('UPSTASH_VECTOR_REST_URL', '')
+
+class NamespacedIndex(VectorBackend):
+    """One tenant's view of a shared Upstash index: every call is scoped to its namespace"""
+    
+    def __init__(self, index, namespace):
+        self.index = index
+        self.namespace = namespace
+        self.lexical_index = None
+        self.chunk_store = None
+    
+    def query(self, data=None, vector=None, top_k=10, include_metadata=False, include_data=False, filter=''):
+        return self.index.query(data=data, vector=vector, top_k=top_k, include_metadata=include_metadata,
+                                include_data=include_data, filter=filter, namespace=self.namespace)
+    
+    def upsert(self, vectors):
+        return self.index.upsert(vectors=vectors, namespace=self.namespace)
+    
+    def delete(self, ids=None):
+        return self.index.delete(ids=ids, namespace=self.namespace)
+    
+    def fetch(self, ids=None, include_metadata=False, include_data=False):
+        return self.index.fetch(ids=ids, include_metadata=include_metadata, include_data=include_data, namespace=self.namespace)
+    
+    def range(self, cursor="", limit=1, include_metadata=False, include_data=False):
+        return self.index.range(cursor=cursor, limit=limit, include_metadata=include_metadata,
+                                include_data=include_data, namespace=self.namespace)
+    
+    def info(self):
+        info = self.index.info()
+        namespace_info = (getattr(info, 'namespaces', None) or {}).get(self.namespace)
+        return LocalIndexInfo(vector_count=getattr(namespace_info, 'vector_count', 0), dimension=getattr(info, 'dimension', 0))
@@ -0,0 +1,126 @@
+"""Batch mode: answer a JSONL question file with a worker pool, resumably"""
+
+import os
+import sys
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from . import config
+from .pipeline import answer_question_detailed
+
+def read_batch_questions(input_path):
+    """Yield (id, question, tenant) triples from a JSONL file, or stdin when input_path is '-'.
+    
+    Each line is {"id": ..., "question": ...}, {"question": ...} or a bare JSON
+    string; questions without an id are numbered by line. An optional "tenant"
+    field picks the profile when serving several (see TenantRegistry).
+    """
+    stream = sys.stdin if input_path == '-' else open(input_path, "r", encoding="utf-8")
+    try:
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                print(f"⚠️ Skipping invalid JSON on line {line_number}", file=sys.stderr)
+                continue
+            if isinstance(record, str):
+                record = {'question': record}
+            question = (record.get('question') or '').strip()
+            if question:
+                yield str(record.get('id', line_number)), question, record.get('tenant')
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def load_batch_results(output_path):
+    """The last result row per ID in a batch output file (a retried question's final answer), in first-seen order"""
+    results = {}
+    try:
+        with open(output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line from an interrupted run
+                if isinstance(record, dict) and 'id' in record:
+                    results[str(record['id'])] = record
+    except FileNotFoundError:
+        pass
+    return results
+
+def compact_batch_results(output_path):
+    """Atomically rewrite a batch output file to one final row per ID; returns those rows"""
+    results = load_batch_results(output_path)
+    if not os.path.exists(output_path):
+        return results
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in results.values():
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, output_path)
+    return results
+
+def load_completed_batch_ids(output_path):
+    """IDs already answered successfully in a previous (possibly interrupted) run"""
+    return {question_id for question_id, record in load_batch_results(output_path).items() if record.get('status') == 'ok'}
+
+def run_batch(index, groq_client, profile_data, input_path, output_path, workers=None, registry=None):
+    """Answer a JSONL batch of questions with a worker pool, appending JSONL results.
+    
+    Results are flushed as they complete, and questions already answered in
+    output_path are skipped, so an interrupted run resumes where it stopped.
+    A finished run rewrites output_path to one final row per ID, so retried
+    questions do not leave their earlier error rows behind.
+    Lines with a "tenant" are answered from that tenant's profile via registry.
+    """
+    if workers is None:
+        workers = config.BATCH_WORKERS
+    
+    compact_batch_results(output_path)  # drop torn lines and rows superseded by a retry
+    completed = load_completed_batch_ids(output_path)
+    if completed:
+        print(f"⏩ Resuming: {len(completed)} questions already answered in {output_path}", file=sys.stderr)
+    
+    write_lock = threading.Lock()
+    counts = {'ok': 0, 'error': 0, 'skipped': 0}
+    
+    def answer(question_id, question, tenant_id):
+        if tenant_id is None:
+            details = answer_question_detailed(index, groq_client, question, profile_data)
+        elif registry is None:
+            details = {'answer': "❌ Tenant given but TENANT_PROFILE_DIR is not set", 'source': 'error'}
+        else:
+            try:
+                tenant = registry.get(tenant_id)
+                details = answer_question_detailed(tenant.index, groq_client, question, tenant.profile_data)
+            except (KeyError, ValueError) as e:
+                details = {'answer': f"❌ {str(e).strip(chr(39))}", 'source': 'error'}
+        status = 'error' if details['source'] == 'error' or (details['answer'] or '').startswith("❌") else 'ok'
+        record = {'id': question_id, 'question': question, 'status': status, **({'tenant': tenant_id} if tenant_id else {}), **details}
+        with write_lock:
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+            counts[status] += 1
+    
+    with open(output_path, "a", encoding="utf-8") as output, ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        for question_id, question, tenant_id in read_batch_questions(input_path):
+            if question_id in completed:
+                counts['skipped'] += 1
+                continue
+            # Bound queued work so huge inputs (or stdin) are streamed, not slurped
+            if len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            in_flight.add(executor.submit(answer, question_id, question, tenant_id))
+        for future in in_flight:
+            future.result()
+    compact_batch_results(output_path)
+    
+    print(f"✅ Batch complete: {counts['ok']} answered, {counts['error']} failed, {counts['skipped']} skipped (already done)", file=sys.stderr)
+    return counts
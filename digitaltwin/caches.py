@@ -0,0 +1,238 @@
+"""Retrieval and answer caches, and the per-index generations that invalidate them"""
+
+import os
+import re
+import json
+import hashlib
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from . import config
+from .observability import logger
+
+_index_generations = {}  # index identity -> generation
+_index_generation_lock = threading.Lock()
+
+def index_identity(index):
+    """Key for one vector index (or tenant namespace) in the retrieval cache and generation table"""
+    # Namespace/path keep tenants apart even if an evicted tenant's index object id is reused
+    return (id(index), getattr(index, 'namespace', None), getattr(index, 'path', None))
+
+def get_index_generation(index):
+    """Current generation of one index; bumped whenever its indexed content changes"""
+    return _index_generations.get(index_identity(index), 0)
+
+def bump_index_generation(index):
+    """Mark one index's content as changed, invalidating only its cached retrievals
+    (a tenant's sync leaves every other tenant's cache warm)"""
+    identity = index_identity(index)
+    with _index_generation_lock:
+        generation = _index_generations[identity] = _index_generations.get(identity, 0) + 1
+    if RETRIEVAL_CACHE is not None:
+        RETRIEVAL_CACHE.discard_index(identity)
+    return generation
+
+class RetrievalCache:
+    """Bounded LRU cache of query_vectors results keyed by index identity and generation"""
+    
+    def __init__(self, max_entries=None, max_bytes=None):
+        self.max_entries = config.RETRIEVAL_CACHE_SIZE if max_entries is None else max_entries
+        self.max_bytes = config.RETRIEVAL_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._entries = OrderedDict()  # key -> (size_bytes, results)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def make_key(index, query_text, top_k, filter_by_type, filter_mode):
+        return (index_identity(index), get_index_generation(index), query_text, top_k, filter_by_type, filter_mode)
+    
+    @staticmethod
+    def _estimate_size(results):
+        size = 64
+        for result in results:
+            size += 128 + len(json.dumps(result.metadata or {}, ensure_ascii=False, default=str))
+        return size
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, key, results):
+        size = self._estimate_size(results)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[0]
+            self._entries[key] = (size, results)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def discard_index(self, identity):
+        """Drop one index's entries (older generations would only age out of the LRU)"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == identity]:
+                self._bytes -= self._entries.pop(key)[0]
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'indexes': len({key[0] for key in self._entries})
+            }
+
+RETRIEVAL_CACHE = RetrievalCache() if config.RETRIEVAL_CACHE_ENABLED else None
+
+def normalize_question(question):
+    """Normalize a question for cache lookups: lowercase, drop punctuation, collapse whitespace"""
+    return " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
+
+class AnswerCache:
+    """LRU + TTL cache of final answers with an optional on-disk tier.
+    
+    The disk tier is bounded too: expired files, then the oldest writes beyond
+    max_entries, are pruned at startup and after every max_entries // 4 writes.
+    """
+    
+    def __init__(self, max_entries=None, ttl_seconds=None, cache_dir=None):
+        self.max_entries = config.ANSWER_CACHE_SIZE if max_entries is None else max_entries
+        self.ttl_seconds = config.ANSWER_CACHE_TTL if ttl_seconds is None else ttl_seconds
+        self.cache_dir = config.ANSWER_CACHE_DIR if cache_dir is None else cache_dir
+        self._entries = OrderedDict()  # key -> (expires_at, answer)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._disk_writes = 0  # since the last prune
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.prune_disk()
+    
+    @staticmethod
+    def make_key(question, intent, model, profile_version):
+        raw = json.dumps([normalize_question(question), intent, model, profile_version])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+        
+        if self.cache_dir:
+            try:
+                with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+                if stored['expires_at'] > now:
+                    self._remember(key, stored['expires_at'], stored['answer'])
+                    with self._lock:
+                        self.hits += 1
+                    return stored['answer']
+                os.remove(self._disk_path(key))
+            except (FileNotFoundError, json.JSONDecodeError, KeyError):
+                pass
+        
+        with self._lock:
+            self.misses += 1
+        return None
+    
+    def _remember(self, key, expires_at, answer):
+        with self._lock:
+            self._entries[key] = (expires_at, answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def set(self, key, answer):
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, expires_at, answer)
+        if not self.cache_dir:
+            return
+        # A private temp file per writer: concurrent sets of one key each replace the file whole
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({"expires_at": expires_at, "answer": answer}, f, ensure_ascii=False)
+                os.replace(tmp_path, self._disk_path(key))
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        except OSError as e:
+            # The disk tier is best effort; the answer is still cached in memory
+            logger.warning(f"⚠️ Could not write answer cache entry: {str(e)}")
+            return
+        with self._lock:
+            self._disk_writes += 1
+            due = self._disk_writes >= max(1, self.max_entries // 4)
+            if due:
+                self._disk_writes = 0
+        if due:
+            self.prune_disk()
+    
+    def prune_disk(self):
+        """Delete expired disk entries, then the oldest ones beyond max_entries; returns how many were deleted"""
+        now = time.time()
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as scan:
+                for entry in scan:
+                    if entry.name.endswith('.json'):
+                        try:
+                            entries.append((entry.stat().st_mtime, entry.path))
+                        except FileNotFoundError:
+                            pass
+        except OSError:
+            return 0
+        # A file's mtime is when it was written, so it expires ttl_seconds later
+        entries.sort()
+        expired = [path for mtime, path in entries if mtime + self.ttl_seconds <= now]
+        live = [path for mtime, path in entries if mtime + self.ttl_seconds > now]
+        doomed = expired + live[:max(0, len(live) - self.max_entries)]
+        for path in doomed:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return len(doomed)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+ANSWER_CACHE = AnswerCache() if config.ANSWER_CACHE_ENABLED else None
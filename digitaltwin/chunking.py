@@ -0,0 +1,462 @@
+"""Turning a profile into section (and hierarchical child) chunks for the vector index"""
+
+from . import config
+from .observability import logger
+from .profiles import IdentityMemo
+from .backends import LocalQueryResult
+
+def _personal_chunks(profile_data):
+    """Yield the personal overview chunk"""
+    personal = profile_data.get('personal', {})
+    if personal:
+        personal_text = f"Personal Information: {personal.get('name', '')} - {personal.get('title', '')}. {personal.get('summary', '')} Location: {personal.get('location', '')}. Elevator Pitch: {personal.get('elevator_pitch', '')}"
+        yield (
+            "personal_overview",
+            personal_text,
+            {
+                "title": "Personal Information & Summary",
+                "type": "personal",
+                "content": personal_text,
+                "category": "personal_info",
+                "tags": ["personal", "summary", "overview", "elevator_pitch"],
+                "importance": "high"
+            }
+        )
+
+def _salary_location_chunks(profile_data):
+    """Yield the salary & location preferences chunk"""
+    salary_location = profile_data.get('salary_location', {})
+    if salary_location:
+        salary_text = f"Salary & Location: Current salary range: {salary_location.get('current_salary_range', '')}. Expectations: {salary_location.get('salary_expectations', '')}. Location preferences: {', '.join(salary_location.get('location_preferences', []))}. Work authorization: {salary_location.get('work_authorization', '')}. Remote experience: {salary_location.get('remote_experience', '')}. Willing to relocate: {salary_location.get('relocation_willing', '')}."
+        yield (
+            "salary_location_info",
+            salary_text,
+            {
+                "title": "Salary & Location Preferences",
+                "type": "salary_location",
+                "content": salary_text,
+                "category": "employment_details",
+                "tags": ["salary", "location", "visa", "remote", "relocation"],
+                "importance": "high"
+            }
+        )
+
+def _project_chunks(profile_data):
+    """Yield one chunk per STAR-format project"""
+    projects = profile_data.get('projects_star_format', [])
+    for i, project in enumerate(projects):
+        project_text = f"Project: {project.get('project_name', '')}. Situation: {project.get('situation', '')}. Task: {project.get('task', '')}. Action: {project.get('action', '')}. Result: {project.get('result', '')}. Technologies: {', '.join(project.get('technologies', []))}. Duration: {project.get('duration', '')}. Team size: {project.get('team_size', '')}."
+        
+        # Add links if available
+        links = project.get('links', {})
+        if links:
+            link_info = f" GitHub: {links.get('github', 'N/A')}. Live Demo: {links.get('live_demo', 'N/A')}."
+            project_text += link_info
+        
+        # Add KPIs if available
+        kpis = project.get('kpis', {})
+        if kpis:
+            kpi_text = " Key Metrics: " + "; ".join([f"{k}: {v}" for k, v in kpis.items()])
+            project_text += kpi_text
+        
+        # Add governance considerations if available
+        governance = project.get('governance_considerations', [])
+        if governance:
+            governance_text = " Governance & Ethics: " + "; ".join(governance)
+            project_text += governance_text
+        
+        # Add future enhancements if available
+        future_enhancements = project.get('future_enhancements', [])
+        if future_enhancements:
+            future_text = " Future Enhancements: " + "; ".join(future_enhancements)
+            project_text += future_text
+        
+        yield (
+            f"project_{i+1}",
+            project_text,
+            {
+                "title": f"Project: {project.get('project_name', '')}",
+                "type": "project",
+                "content": project_text,
+                "category": "projects",
+                "tags": ["project", "portfolio"] + project.get('technologies', []),
+                "importance": "high"
+            }
+        )
+
+def _leadership_chunks(profile_data):
+    """Yield one chunk per STAR leadership example"""
+    leadership = profile_data.get('leadership_examples_star', [])
+    for i, example in enumerate(leadership):
+        leadership_text = f"Leadership Example: Situation: {example.get('situation', '')}. Task: {example.get('task', '')}. Action: {example.get('action', '')}. Result: {example.get('result', '')}."
+        yield (
+            f"leadership_{i+1}",
+            leadership_text,
+            {
+                "title": f"Leadership Example {i+1}",
+                "type": "leadership",
+                "content": leadership_text,
+                "category": "leadership",
+                "tags": ["leadership", "management", "teamwork"],
+                "importance": "high"
+            }
+        )
+
+def _experience_chunks(profile_data):
+    """Yield one chunk per work experience entry"""
+    experiences = profile_data.get('experience', [])
+    for i, exp in enumerate(experiences):
+        exp_text = f"Work Experience: {exp.get('title', '')} at {exp.get('company', '')} ({exp.get('duration', '')}). Company context: {exp.get('company_context', '')}. Team structure: {exp.get('team_structure', '')}."
+        
+        # Add achievements in STAR format
+        achievements = exp.get('achievements_star', [])
+        for j, achievement in enumerate(achievements):
+            achievement_text = f" Achievement {j+1}: Situation: {achievement.get('situation', '')}. Task: {achievement.get('task', '')}. Action: {achievement.get('action', '')}. Result: {achievement.get('result', '')}."
+            exp_text += achievement_text
+        
+        # Add technical skills and leadership
+        tech_skills = exp.get('technical_skills_used', [])
+        if tech_skills:
+            exp_text += f" Technical skills used: {', '.join(tech_skills)}."
+        
+        leadership_examples = exp.get('leadership_examples', [])
+        if leadership_examples:
+            exp_text += f" Leadership examples: {'; '.join(leadership_examples)}."
+        
+        yield (
+            f"experience_{i+1}",
+            exp_text,
+            {
+                "title": f"{exp.get('title', '')} at {exp.get('company', '')}",
+                "type": "experience",
+                "content": exp_text,
+                "category": "work_experience",
+                "tags": ["work", "experience", "employment"] + tech_skills,
+                "importance": "high"
+            }
+        )
+
+def _technical_skills_chunks(profile_data):
+    """Yield the technical skills chunk"""
+    skills = profile_data.get('skills', {})
+    technical = skills.get('technical', {})
+    if technical:
+        prog_langs = technical.get('programming_languages', [])
+        lang_text = "Programming Languages: " + "; ".join([f"{lang['language']} (v{lang.get('version', 'N/A')}, {lang.get('years', 0)} years, proficiency {lang.get('proficiency_1to5', 'N/A')}/5)" for lang in prog_langs])
+        
+        databases = technical.get('databases', [])
+        if databases:
+            lang_text += f". Databases: {', '.join(databases)}."
+        
+        cloud_platforms = technical.get('cloud_platforms', [])
+        if cloud_platforms:
+            lang_text += f" Cloud platforms: {', '.join(cloud_platforms)}."
+        
+        ai_ml = technical.get('ai_ml', [])
+        if ai_ml:
+            lang_text += f" AI/ML: {', '.join(ai_ml)}."
+        
+        business_tools = technical.get('business_tools', [])
+        if business_tools:
+            lang_text += f" Business tools: {', '.join(business_tools)}."
+        
+        yield (
+            "technical_skills",
+            lang_text,
+            {
+                "title": "Technical Skills",
+                "type": "skills",
+                "content": lang_text,
+                "category": "technical_skills",
+                "tags": ["skills", "technical", "programming", "databases", "cloud", "ai", "ml"],
+                "importance": "high"
+            }
+        )
+
+def _soft_skills_chunks(profile_data):
+    """Yield the soft skills chunk"""
+    skills = profile_data.get('skills', {})
+    soft_skills = skills.get('soft_skills', [])
+    if soft_skills:
+        soft_text = f"Soft Skills: {', '.join(soft_skills)}."
+        yield (
+            "soft_skills",
+            soft_text,
+            {
+                "title": "Soft Skills",
+                "type": "skills",
+                "content": soft_text,
+                "category": "soft_skills",
+                "tags": ["skills", "soft", "communication", "leadership"],
+                "importance": "medium"
+            }
+        )
+
+def _education_chunks(profile_data):
+    """Yield the education & qualifications chunk"""
+    education = profile_data.get('education', {})
+    if education:
+        degrees = education.get('degrees', [])
+        edu_text = ""
+        for degree in degrees:
+            degree_text = f"Education: {degree.get('program', '')} at {degree.get('institution', '')} ({degree.get('timeline', '')})."
+            if degree.get('gpa'):
+                degree_text += f" GPA: {degree.get('gpa')}."
+            
+            projects = degree.get('projects_highlights', [])
+            if projects:
+                degree_text += f" Key projects: {', '.join(projects)}."
+            
+            edu_text += degree_text + " "
+        
+        qualifications = education.get('qualifications', [])
+        if qualifications:
+            edu_text += f"Additional qualifications: {', '.join(qualifications)}."
+        
+        yield (
+            "education",
+            edu_text.strip(),
+            {
+                "title": "Education & Qualifications",
+                "type": "education",
+                "content": edu_text.strip(),
+                "category": "education",
+                "tags": ["education", "degree", "university", "qualifications"],
+                "importance": "high"
+            }
+        )
+
+def _portfolio_chunks(profile_data):
+    """Yield one chunk per portfolio dashboard"""
+    portfolio = profile_data.get('portfolio_evidence', {})
+    if portfolio:
+        dashboards = portfolio.get('dashboards', [])
+        for i, dashboard in enumerate(dashboards):
+            dash_text = f"Dashboard Portfolio: {dashboard.get('title', '')} using {dashboard.get('tool', '')}."
+            
+            kpis = dashboard.get('kpis', {})
+            if kpis:
+                kpi_text = " Key metrics: " + "; ".join([f"{k}: {v}" for k, v in kpis.items()])
+                dash_text += kpi_text
+            
+            insights = dashboard.get('insights', [])
+            if insights:
+                dash_text += f" Key insights: {'; '.join(insights)}."
+            
+            artifacts = dashboard.get('artifacts', [])
+            if artifacts:
+                dash_text += f" Artifacts: {', '.join(artifacts)}."
+            
+            yield (
+                f"portfolio_dashboard_{i+1}",
+                dash_text,
+                {
+                    "title": f"Portfolio: {dashboard.get('title', '')}",
+                    "type": "portfolio",
+                    "content": dash_text,
+                    "category": "portfolio_evidence",
+                    "tags": ["portfolio", "dashboard", "visualization", dashboard.get('tool', '').lower()],
+                    "importance": "high"
+                }
+            )
+
+def _quantified_achievements_chunks(profile_data):
+    """Yield the quantified achievements chunk"""
+    quantifications = profile_data.get('quantification_examples', [])
+    if quantifications:
+        quant_text = "Quantified Achievements: " + "; ".join(quantifications)
+        yield (
+            "quantified_achievements",
+            quant_text,
+            {
+                "title": "Quantified Achievements",
+                "type": "achievements",
+                "content": quant_text,
+                "category": "achievements",
+                "tags": ["achievements", "metrics", "results", "quantified"],
+                "importance": "high"
+            }
+        )
+
+def _child_chunk(chunk_id, parent_id, text, title, parent_metadata, tags=None):
+    """(id, text, metadata) for a child chunk; filterable fields are inherited from the parent"""
+    return (
+        chunk_id,
+        text,
+        {
+            "title": title,
+            "type": parent_metadata["type"],
+            "content": text,
+            "category": parent_metadata["category"],
+            "tags": tags if tags is not None else parent_metadata["tags"],
+            "importance": parent_metadata["importance"],
+            "parent_id": parent_id
+        }
+    )
+
+def _project_child_chunks(profile_data):
+    """Yield overview / action / result / governance children for each project"""
+    projects = profile_data.get('projects_star_format', [])
+    for (parent_id, _, parent_metadata), project in zip(_project_chunks(profile_data), projects):
+        name = project.get('project_name', '')
+        overview_text = f"Project: {name}. Situation: {project.get('situation', '')}. Task: {project.get('task', '')}. Duration: {project.get('duration', '')}. Team size: {project.get('team_size', '')}."
+        links = project.get('links', {})
+        if links:
+            overview_text += f" GitHub: {links.get('github', 'N/A')}. Live Demo: {links.get('live_demo', 'N/A')}."
+        yield _child_chunk(f"{parent_id}_overview", parent_id, overview_text, f"Project: {name} (Overview)", parent_metadata)
+        
+        action_text = f"Project: {name}. Action: {project.get('action', '')}. Technologies: {', '.join(project.get('technologies', []))}."
+        yield _child_chunk(f"{parent_id}_action", parent_id, action_text, f"Project: {name} (Approach)", parent_metadata)
+        
+        result_text = f"Project: {name}. Result: {project.get('result', '')}."
+        kpis = project.get('kpis', {})
+        if kpis:
+            result_text += " Key Metrics: " + "; ".join([f"{k}: {v}" for k, v in kpis.items()])
+        yield _child_chunk(f"{parent_id}_result", parent_id, result_text, f"Project: {name} (Results)", parent_metadata)
+        
+        governance = project.get('governance_considerations', [])
+        future_enhancements = project.get('future_enhancements', [])
+        if governance or future_enhancements:
+            governance_text = f"Project: {name}."
+            if governance:
+                governance_text += " Governance & Ethics: " + "; ".join(governance)
+            if future_enhancements:
+                governance_text += " Future Enhancements: " + "; ".join(future_enhancements)
+            yield _child_chunk(f"{parent_id}_governance", parent_id, governance_text, f"Project: {name} (Governance & Next Steps)", parent_metadata)
+
+def _experience_child_chunks(profile_data):
+    """Yield an overview child plus one child per STAR achievement for each role"""
+    experiences = profile_data.get('experience', [])
+    for (parent_id, _, parent_metadata), exp in zip(_experience_chunks(profile_data), experiences):
+        role = f"{exp.get('title', '')} at {exp.get('company', '')}"
+        overview_text = f"Work Experience: {role} ({exp.get('duration', '')}). Company context: {exp.get('company_context', '')}. Team structure: {exp.get('team_structure', '')}."
+        tech_skills = exp.get('technical_skills_used', [])
+        if tech_skills:
+            overview_text += f" Technical skills used: {', '.join(tech_skills)}."
+        leadership_examples = exp.get('leadership_examples', [])
+        if leadership_examples:
+            overview_text += f" Leadership examples: {'; '.join(leadership_examples)}."
+        yield _child_chunk(f"{parent_id}_overview", parent_id, overview_text, role, parent_metadata)
+        
+        for j, achievement in enumerate(exp.get('achievements_star', [])):
+            achievement_text = f"Work Experience: {role} ({exp.get('duration', '')}). Achievement {j+1}: Situation: {achievement.get('situation', '')}. Task: {achievement.get('task', '')}. Action: {achievement.get('action', '')}. Result: {achievement.get('result', '')}."
+            yield _child_chunk(f"{parent_id}_achievement_{j+1}", parent_id, achievement_text, f"{role} (Achievement {j+1})", parent_metadata)
+
+def _technical_skills_child_chunks(profile_data):
+    """Yield one child per technical skill group"""
+    technical = profile_data.get('skills', {}).get('technical', {})
+    for parent_id, _, parent_metadata in _technical_skills_chunks(profile_data):
+        prog_langs = technical.get('programming_languages', [])
+        if prog_langs:
+            lang_text = "Programming Languages: " + "; ".join([f"{lang['language']} (v{lang.get('version', 'N/A')}, {lang.get('years', 0)} years, proficiency {lang.get('proficiency_1to5', 'N/A')}/5)" for lang in prog_langs]) + "."
+            yield _child_chunk(f"{parent_id}_languages", parent_id, lang_text, "Technical Skills: Programming Languages", parent_metadata, ["skills", "technical", "programming"])
+        
+        groups = [
+            ('databases', "Databases", ["skills", "technical", "databases"]),
+            ('cloud_platforms', "Cloud platforms", ["skills", "technical", "cloud"]),
+            ('ai_ml', "AI/ML", ["skills", "technical", "ai", "ml"]),
+            ('business_tools', "Business tools", ["skills", "technical", "business"])
+        ]
+        for key, label, tags in groups:
+            values = technical.get(key, [])
+            if values:
+                yield _child_chunk(f"{parent_id}_{key}", parent_id, f"{label}: {', '.join(values)}.", f"Technical Skills: {label}", parent_metadata, tags)
+
+def _education_child_chunks(profile_data):
+    """Yield one child per degree plus one for additional qualifications"""
+    education = profile_data.get('education', {})
+    for parent_id, _, parent_metadata in _education_chunks(profile_data):
+        for k, degree in enumerate(education.get('degrees', [])):
+            degree_text = f"Education: {degree.get('program', '')} at {degree.get('institution', '')} ({degree.get('timeline', '')})."
+            if degree.get('gpa'):
+                degree_text += f" GPA: {degree.get('gpa')}."
+            projects = degree.get('projects_highlights', [])
+            if projects:
+                degree_text += f" Key projects: {', '.join(projects)}."
+            yield _child_chunk(f"{parent_id}_degree_{k+1}", parent_id, degree_text, f"Education: {degree.get('program', '')}", parent_metadata)
+        
+        qualifications = education.get('qualifications', [])
+        if qualifications:
+            yield _child_chunk(f"{parent_id}_qualifications", parent_id, f"Additional qualifications: {', '.join(qualifications)}.", "Additional Qualifications", parent_metadata)
+
+# Section chunkers in indexing order; each yields (id, text, metadata) tuples
+PROFILE_CHUNKERS = [
+    _personal_chunks,
+    _salary_location_chunks,
+    _project_chunks,
+    _leadership_chunks,
+    _experience_chunks,
+    _technical_skills_chunks,
+    _soft_skills_chunks,
+    _education_chunks,
+    _portfolio_chunks,
+    _quantified_achievements_chunks
+]
+
+# Hierarchical chunking replaces these sections' chunks with children whose
+# metadata parent_id names the section chunk they were split from
+CHILD_CHUNKERS = {
+    _project_chunks: _project_child_chunks,
+    _experience_chunks: _experience_child_chunks,
+    _technical_skills_chunks: _technical_skills_child_chunks,
+    _education_chunks: _education_child_chunks
+}
+
+def iter_profile_chunks(profile_data, strategy=None):
+    """Lazily yield (id, text, metadata) content chunks section by section"""
+    strategy = config.CHUNKING_STRATEGY if strategy is None else strategy
+    for chunker in PROFILE_CHUNKERS:
+        if strategy == 'hierarchical' and chunker in CHILD_CHUNKERS:
+            yield from CHILD_CHUNKERS[chunker](profile_data)
+        else:
+            yield from chunker(profile_data)
+
+def build_profile_chunks(profile_data, strategy=None):
+    """Build the full list of (id, text, metadata) content chunks from the structured profile"""
+    return list(iter_profile_chunks(profile_data, strategy))
+
+_parent_chunks_memo = IdentityMemo()
+
+def get_parent_chunks(profile_data):
+    """{parent_id: (text, metadata)} for every section that hierarchical chunking splits"""
+    def compute(profile_data):
+        parents = {}
+        for chunker in CHILD_CHUNKERS:
+            for parent_id, text, metadata in chunker(profile_data):
+                parents[parent_id] = (text, metadata)
+        return parents
+    return _parent_chunks_memo.get(profile_data, compute)
+
+def expand_to_parents(results, profile_data, min_siblings=None):
+    """Replace children with their parent section when enough siblings were retrieved.
+    
+    Parents are rebuilt from the in-memory profile, so expansion costs no index
+    round trip. The parent takes the best sibling score and the first sibling's
+    position; other results pass through unchanged.
+    """
+    min_siblings = config.CHUNK_EXPAND_MIN_SIBLINGS if min_siblings is None else min_siblings
+    if not results or not profile_data or min_siblings <= 0:
+        return results
+    
+    siblings = {}
+    for result in results:
+        parent_id = (result.metadata or {}).get('parent_id')
+        if parent_id:
+            siblings.setdefault(parent_id, []).append(result)
+    expand = {parent_id for parent_id, children in siblings.items() if len(children) >= min_siblings}
+    if not expand:
+        return results
+    
+    parents = get_parent_chunks(profile_data)
+    expanded = []
+    for result in results:
+        parent_id = (result.metadata or {}).get('parent_id')
+        if parent_id not in expand or parent_id not in parents:
+            expanded.append(result)
+            continue
+        if parent_id in siblings:
+            text, metadata = parents[parent_id]
+            best_score = max(child.score for child in siblings.pop(parent_id))
+            expanded.append(LocalQueryResult(id=parent_id, score=best_score, metadata=metadata, data=text))
+            logger.debug(f"🧩 Expanded {parent_id} from its retrieved children")
+    return expanded
@@ -0,0 +1,128 @@
+"""
+Settings read from the environment (and .env) once at import
+Other modules read them as `config.NAME`, so overriding one here (tests, benchmarks) applies everywhere.
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Constants from environment variables
+JSON_FILE = os.getenv('DIGITAL_TWIN_JSON_FILE', 'digitaltwin.json')
+GROQ_API_KEY = os.getenv('GROQ_API_KEY')
+DEFAULT_MODEL = os.getenv('GROQ_MODEL', 'llama-3.1-8b-instant')
+RAG_TOP_K = int(os.getenv('RAG_TOP_K', '3'))
+RAG_TEMPERATURE = float(os.getenv('RAG_TEMPERATURE', '0.7'))
+RAG_MAX_TOKENS = int(os.getenv('RAG_MAX_TOKENS', '500'))
+MODEL_CASCADE_ENABLED = os.getenv('MODEL_CASCADE_ENABLED', 'true').lower() == 'true'  # route by intent and context size
+GROQ_FAST_MODEL = os.getenv('GROQ_FAST_MODEL', DEFAULT_MODEL)  # simple single-topic answers
+GROQ_COMPLEX_MODEL = os.getenv('GROQ_COMPLEX_MODEL', 'llama-3.3-70b-versatile')  # multi-part STAR walkthroughs
+MODEL_SIMPLE_INTENTS = frozenset(os.getenv('MODEL_SIMPLE_INTENTS', 'salary,personal,education').split(','))
+MODEL_COMPLEX_INTENTS = frozenset(os.getenv('MODEL_COMPLEX_INTENTS', 'projects,experience,leadership,achievements').split(','))
+MODEL_SIMPLE_MAX_TOKENS = int(os.getenv('MODEL_SIMPLE_MAX_TOKENS', '200'))
+MODEL_SIMPLE_TEMPERATURE = float(os.getenv('MODEL_SIMPLE_TEMPERATURE', '0.3'))
+MODEL_SIMPLE_MAX_CONTEXT_TOKENS = int(os.getenv('MODEL_SIMPLE_MAX_CONTEXT_TOKENS', '250'))  # simple intents are packed to this many context tokens
+MODEL_COMPLEX_MAX_TOKENS = int(os.getenv('MODEL_COMPLEX_MAX_TOKENS', '800'))
+MODEL_COMPLEX_MIN_CONTEXT_TOKENS = int(os.getenv('MODEL_COMPLEX_MIN_CONTEXT_TOKENS', '300'))  # escalate only with this much context
+DEBUG = os.getenv('DEBUG', 'true').lower() == 'true'
+ENVIRONMENT = os.getenv('ENVIRONMENT', 'development')
+RAG_STREAM = os.getenv('RAG_STREAM', 'true').lower() == 'true'
+ASYNC_MAX_CONCURRENCY = int(os.getenv('ASYNC_MAX_CONCURRENCY', '100'))
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', '8'))
+SERVE_PORT = int(os.getenv('SERVE_PORT', '8000'))
+SERVE_WORKERS = int(os.getenv('SERVE_WORKERS', '16'))  # questions answered at once in --serve mode
+SERVE_REQUEST_TIMEOUT = float(os.getenv('SERVE_REQUEST_TIMEOUT', '60'))  # seconds an /ask request waits for its answer
+REINDEX_MODE = os.getenv('REINDEX_MODE', 'incremental').lower()  # 'incremental' or 'full'
+VECTOR_MANIFEST_FILE = os.getenv('VECTOR_MANIFEST_FILE', '.vector_manifest.json')
+UPSERT_BATCH_SIZE = int(os.getenv('UPSERT_BATCH_SIZE', '100'))
+UPSERT_WORKERS = int(os.getenv('UPSERT_WORKERS', '4'))
+VECTOR_BACKEND = os.getenv('VECTOR_BACKEND', 'upstash').lower()  # 'upstash' or 'local'
+LOCAL_INDEX_PATH = os.getenv('LOCAL_INDEX_PATH', '.local_index')
+LOCAL_EMBEDDER = os.getenv('LOCAL_EMBEDDER', 'hashing')  # 'hashing' or 'sentence-transformers'
+LOCAL_EMBEDDING_MODEL = os.getenv('LOCAL_EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+LOCAL_EMBEDDING_DIM = int(os.getenv('LOCAL_EMBEDDING_DIM', '1024'))
+RAG_FILTER_MODE = os.getenv('RAG_FILTER_MODE', 'index').lower()  # 'index' or 'overfetch'
+RAG_OVERFETCH_FACTOR = int(os.getenv('RAG_OVERFETCH_FACTOR', '4'))
+RAG_OVERFETCH_MAX_K = int(os.getenv('RAG_OVERFETCH_MAX_K', '100'))
+PROFILE_WATCH_INTERVAL = float(os.getenv('PROFILE_WATCH_INTERVAL', '2'))  # seconds between profile file checks, 0 = off
+UPSTREAM_VECTOR_TIMEOUT = float(os.getenv('UPSTREAM_VECTOR_TIMEOUT', '5'))  # seconds per vector request
+UPSTREAM_LLM_TIMEOUT = float(os.getenv('UPSTREAM_LLM_TIMEOUT', '30'))  # seconds per Groq request
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv('UPSTREAM_CONNECT_TIMEOUT', '3'))
+UPSTREAM_MAX_RETRIES = int(os.getenv('UPSTREAM_MAX_RETRIES', '2'))
+UPSTREAM_RETRY_BASE_MS = float(os.getenv('UPSTREAM_RETRY_BASE_MS', '100'))  # full-jitter exponential backoff base
+UPSTREAM_POOL_SIZE = int(os.getenv('UPSTREAM_POOL_SIZE', '32'))  # pooled keep-alive connections per upstream
+VECTOR_HEDGE_AFTER_MS = float(os.getenv('VECTOR_HEDGE_AFTER_MS', '0'))  # send a second vector query after this long, 0 = off
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))  # consecutive failures that open a circuit
+BREAKER_RESET_SECONDS = float(os.getenv('BREAKER_RESET_SECONDS', '30'))  # open time before a trial request
+TENANT_PROFILE_DIR = os.getenv('TENANT_PROFILE_DIR', '')  # directory of <tenant>.json profiles, empty = single profile
+TENANT_DATA_DIR = os.getenv('TENANT_DATA_DIR', '.tenants')  # per-tenant vector manifests
+TENANT_MAX_LOADED = int(os.getenv('TENANT_MAX_LOADED', '1000'))  # tenants kept in memory at once
+TENANT_IDLE_SECONDS = float(os.getenv('TENANT_IDLE_SECONDS', '900'))  # unused tenants are unloaded after this
+TENANT_MAX_BYTES = int(os.getenv('TENANT_MAX_BYTES', str(512 * 1024 * 1024)))  # approximate memory ceiling for loaded tenants
+STRUCTURED_ROUTER_ENABLED = os.getenv('STRUCTURED_ROUTER_ENABLED', 'true').lower() == 'true'  # answer simple fact questions from the profile
+HYBRID_MODE = os.getenv('HYBRID_MODE', 'off').lower()  # 'off', 'fuse' (BM25 + vector RRF) or 'local_first'
+HYBRID_RRF_K = int(os.getenv('HYBRID_RRF_K', '60'))
+HYBRID_DECISIVE_RATIO = float(os.getenv('HYBRID_DECISIVE_RATIO', '2.0'))  # top BM25 score vs runner-up to skip the vector query
+HYBRID_MIN_SCORE = float(os.getenv('HYBRID_MIN_SCORE', '2.0'))  # minimum top BM25 score to count as decisive
+CHUNKING_STRATEGY = os.getenv('CHUNKING_STRATEGY', 'section').lower()  # 'section' or 'hierarchical'
+CHUNK_EXPAND_MIN_SIBLINGS = int(os.getenv('CHUNK_EXPAND_MIN_SIBLINGS', '2'))  # retrieved siblings that pull in their parent
+RAG_CONTEXT_TOKEN_BUDGET = int(os.getenv('RAG_CONTEXT_TOKEN_BUDGET', '600'))  # retrieved-context tokens per prompt, 0 = no packing
+RAG_CONTEXT_DEDUP_THRESHOLD = float(os.getenv('RAG_CONTEXT_DEDUP_THRESHOLD', '0.8'))  # word-set Jaccard above which sentences are duplicates
+
+# Chunk type (or category) each query intent is restricted to; intents with no
+# matching chunks (e.g. career_goals) search unfiltered
+INTENT_FILTER_TYPES = {
+    'experience': 'experience',
+    'skills': 'skills',
+    'education': 'education',
+    'projects': 'project',
+    'personal': 'personal',
+    'achievements': 'achievements',
+    'leadership': 'leadership',
+    'portfolio': 'portfolio',
+    'salary': 'salary_location'
+}
+
+CONVERSATION_MEMORY_ENABLED = os.getenv('CONVERSATION_MEMORY_ENABLED', 'true').lower() == 'true'
+CONVERSATION_MAX_SESSIONS = int(os.getenv('CONVERSATION_MAX_SESSIONS', '10000'))
+CONVERSATION_IDLE_SECONDS = float(os.getenv('CONVERSATION_IDLE_SECONDS', '1800'))  # sessions unused this long are dropped
+CONVERSATION_MAX_BYTES = int(os.getenv('CONVERSATION_MAX_BYTES', str(64 * 1024 * 1024)))  # approximate ceiling for all sessions
+CONVERSATION_RECENT_TURNS = int(os.getenv('CONVERSATION_RECENT_TURNS', '4'))  # turns kept verbatim; older ones fold into the summary
+CONVERSATION_SUMMARY_TOKENS = int(os.getenv('CONVERSATION_SUMMARY_TOKENS', '150'))  # rolling summary size
+CONVERSATION_HISTORY_TOKENS = int(os.getenv('CONVERSATION_HISTORY_TOKENS', '400'))  # hard cap on history sent to Groq per turn
+
+# Upload only filterable metadata and hydrate query results from a local chunk store
+CHUNK_STORE_ENABLED = os.getenv('CHUNK_STORE_ENABLED', 'true').lower() == 'true'
+INDEX_METADATA_FIELDS = ('type', 'category', 'parent_id')  # what metadata filters and parent expansion need server-side
+
+RETRIEVAL_CACHE_ENABLED = os.getenv('RETRIEVAL_CACHE_ENABLED', 'true').lower() == 'true'
+RETRIEVAL_CACHE_SIZE = int(os.getenv('RETRIEVAL_CACHE_SIZE', '1024'))
+RETRIEVAL_CACHE_MAX_BYTES = int(os.getenv('RETRIEVAL_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+
+ANSWER_CACHE_ENABLED = os.getenv('ANSWER_CACHE_ENABLED', 'true').lower() == 'true'
+ANSWER_CACHE_SIZE = int(os.getenv('ANSWER_CACHE_SIZE', '256'))
+ANSWER_CACHE_TTL = int(os.getenv('ANSWER_CACHE_TTL', '86400'))  # seconds
+ANSWER_CACHE_DIR = os.getenv('ANSWER_CACHE_DIR', '')  # empty = memory only
+ANSWER_CACHE_PREWARM = os.getenv('ANSWER_CACHE_PREWARM', 'true').lower() == 'true'
+
+METRICS_LOG = os.getenv('METRICS_LOG', 'false').lower() == 'true'  # JSON log line per request
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))  # Prometheus /metrics endpoint, 0 = off
+METRICS_WINDOW = int(os.getenv('METRICS_WINDOW', '1024'))  # samples per stage for p50/p95/p99
+
+# Sample questions shown in the CLI, also used to pre-warm the answer cache
+SAMPLE_QUESTIONS = [
+    'Tell me about your work experience at AUSBIZ Consulting',
+    'What are your Python and AI/ML skills and proficiency levels?',
+    'Describe your Food RAG project using the STAR format',
+    'Tell me about your machine learning projects in regression and classification',
+    'What machine learning models have you built and what were the outcomes?',
+    'Describe your insurance premium pricing model project',
+    'Tell me about your credit risk classification model with Random Forest',
+    'What are your quantified achievements and measurable outcomes?',
+    'Tell me about your Tableau dashboard portfolio',
+    'What are your salary expectations and work authorization status?',
+    'Describe your leadership experience and team coordination'
+]
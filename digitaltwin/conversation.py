@@ -0,0 +1,160 @@
+"""Conversation memory: follow-up rewriting and capped per-session history"""
+
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+
+from . import config
+from .retrieval import estimate_tokens, _SENTENCE_BREAK
+
+# Follow-up detection errs towards "standalone": a wrongly rewritten question retrieves worse than a missed follow-up.
+# Anaphora: "it"/"its"/"them" (not the expletive "is it ..."/"it's ..."), or a demonstrative used as a pronoun or with a
+# referent noun after a verb/preposition ("what did that involve?", "the result of that project") - not the relative
+# "that" in "projects that use Python"
+_REFERENT_NOUNS = r"(?:project|role|job|position|company|team|dashboard|degree|course|certification|tool|one)s?"
+_FOLLOW_UP_PRONOUN = re.compile(
+    r"(?<!\bis )\b(?:it|its|them)\b(?!'s|\s+(?:is|was)\b)"
+    r"|(?:^|\b(?:of|about|on|in|with|from|for|behind|after|before|did|does|do|was|is|were|are|explain|describe)\s+)"
+    r"(?:that|this|those|these)"
+    rf"(?=\s*(?:[?.!,]|$)|\s+(?:{_REFERENT_NOUNS}|is|was|are|were|go|went|work|worked|mean|involve|involved|take|took|help|helped)\b)",
+    re.IGNORECASE
+)
+# Short elliptical questions: "and at De Rigglets?", "what about Tableau?", "why?", "tell me more"
+_FOLLOW_UP_ELLIPSIS = re.compile(
+    r"^(?:(?:and|also|what about|how about)\b.*"
+    r"|why|why not|how so|how come|tell me more|go on|elaborate|can you elaborate|say more|like what|such as|for example)"
+    r"\s*[?.!]*$",
+    re.IGNORECASE
+)
+_ELLIPSIS_MAX_WORDS = 6
+
+def is_follow_up(question):
+    """Whether a question only makes sense given the previous turn (see _FOLLOW_UP_PRONOUN/_FOLLOW_UP_ELLIPSIS)"""
+    question = question.strip()
+    if _FOLLOW_UP_PRONOUN.search(question):
+        return True
+    return len(question.split()) <= _ELLIPSIS_MAX_WORDS and bool(_FOLLOW_UP_ELLIPSIS.match(question))
+
+def _answer_gist(answer, max_words=40):
+    """First sentence or two of an answer, at most max_words words"""
+    sentences = _SENTENCE_BREAK.split((answer or '').strip())
+    gist = " ".join(sentences[:2]).split()
+    return " ".join(gist[:max_words]) + (" ..." if len(gist) > max_words else "")
+
+class ConversationSession:
+    """One chat's recent turns (verbatim) plus a rolling extractive summary of older ones"""
+    
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.turns = deque()  # dicts: question, standalone, answer, referent
+        self.summary = deque()  # one line per folded turn, oldest first
+        self.last_used = time.monotonic()
+        self.approx_bytes = 0
+        self._lock = threading.Lock()
+    
+    def rewrite(self, question):
+        """Standalone retrieval query for a follow-up ("what was the result of that project?"), else the question"""
+        with self._lock:
+            if not self.turns or not is_follow_up(question):
+                return question
+            referent = self.turns[-1]['referent']
+        return f"{question} (regarding: {referent})"
+    
+    def history(self, token_budget=None):
+        """Summary plus the most recent turns that fit token_budget, oldest first"""
+        token_budget = config.CONVERSATION_HISTORY_TOKENS if token_budget is None else token_budget
+        with self._lock:
+            turns = list(self.turns)
+            summary = list(self.summary)
+        lines, used = [], 0
+        for turn in reversed(turns):
+            line = f"User: {turn['question']}\nYou: {_answer_gist(turn['answer'])}"
+            cost = estimate_tokens(line)
+            if used + cost > token_budget:
+                break
+            lines.insert(0, line)
+            used += cost
+        if summary:
+            summary_text = "Earlier: " + " | ".join(summary)
+            if used + estimate_tokens(summary_text) <= token_budget:
+                lines.insert(0, summary_text)
+        return "\n".join(lines)
+    
+    def record(self, question, standalone, answer, referent=None):
+        """Append a turn, folding the oldest verbatim turns into the summary"""
+        with self._lock:
+            if not referent:
+                # What "that"/"it" points at next turn: the top retrieved chunk, else this question as asked.
+                # A rewritten follow-up keeps the referent it was rewritten with, so suffixes never nest.
+                referent = self.turns[-1]['referent'] if standalone != question and self.turns else question
+            self.turns.append({
+                'question': question,
+                'standalone': standalone,
+                'answer': answer or '',
+                'referent': referent
+            })
+            while len(self.turns) > config.CONVERSATION_RECENT_TURNS:
+                folded = self.turns.popleft()
+                self.summary.append(f"{folded['standalone']} -> {_answer_gist(folded['answer'], max_words=15)}")
+            while self.summary and estimate_tokens(" | ".join(self.summary)) > config.CONVERSATION_SUMMARY_TOKENS:
+                self.summary.popleft()
+            self.approx_bytes = 256 + sum(len(line) for line in self.summary) + sum(
+                len(turn['question']) + len(turn['standalone']) + len(turn['answer']) + len(turn['referent']) for turn in self.turns
+            )
+
+class ConversationStore:
+    """Sessions by ID with LRU, idle-time and approximate-memory eviction"""
+    
+    def __init__(self, max_sessions=None, idle_seconds=None, max_bytes=None):
+        self.max_sessions = config.CONVERSATION_MAX_SESSIONS if max_sessions is None else max_sessions
+        self.idle_seconds = config.CONVERSATION_IDLE_SECONDS if idle_seconds is None else idle_seconds
+        self.max_bytes = config.CONVERSATION_MAX_BYTES if max_bytes is None else max_bytes
+        self._sessions = OrderedDict()  # session_id -> ConversationSession, least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {'created': 0, 'evicted': 0, 'rewritten': 0}
+    
+    def get(self, session_id):
+        """The session for session_id, created on first use"""
+        if not session_id or len(session_id) > 128:
+            raise ValueError("Session id must be 1-128 characters")
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = ConversationSession(session_id)
+                self.counters['created'] += 1
+            self._sessions.move_to_end(session_id)
+            session.last_used = time.monotonic()
+            self._evict()
+        return session
+    
+    def record(self, session, question, standalone, answer, referent=None):
+        # Record under the store lock so the size delta can't interleave with another
+        # record of this session or with _evict subtracting its size
+        with self._lock:
+            previous_bytes = session.approx_bytes
+            session.record(question, standalone, answer, referent)
+            if standalone != question:
+                self.counters['rewritten'] += 1
+            if self._sessions.get(session.session_id) is session:
+                self._bytes += session.approx_bytes - previous_bytes
+            self._evict()
+    
+    def _evict(self):
+        """Drop idle sessions, then least recently used ones while over max_sessions/max_bytes (lock held)"""
+        now = time.monotonic()
+        while self._sessions:
+            session_id, oldest = next(iter(self._sessions.items()))
+            over_limit = len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes
+            if not over_limit and now - oldest.last_used < self.idle_seconds:
+                break
+            del self._sessions[session_id]
+            self._bytes -= oldest.approx_bytes
+            self.counters['evicted'] += 1
+    
+    def stats(self):
+        with self._lock:
+            return {'sessions': len(self._sessions), 'approx_bytes': self._bytes, **self.counters}
+
+CONVERSATIONS = ConversationStore() if config.CONVERSATION_MEMORY_ENABLED else None
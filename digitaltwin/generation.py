@@ -0,0 +1,281 @@
+"""Answer generation with Groq: system prompt, model cascade routes and generation metrics"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from . import config
+from .observability import logger, record_token_usage, STAGE_METRICS, _current_trace
+from .upstream import async_call_upstream, call_upstream, _pooled_http_limits, _upstream_timeout
+
+# Rolling per-request generation latency (time-to-first-token and total)
+GENERATION_METRICS = deque(maxlen=1000)
+
+def build_system_prompt(personal_context=None):
+    """Enhanced system prompt with personal context (named after the profile's owner)"""
+    full_name = (personal_context or {}).get('name') or 'Emmanuel Awotwe'
+    first_name = full_name.split()[0]
+    system_content = f"You are {full_name}'s AI digital twin. Answer questions as if you are {first_name}, speaking in first person about your background, skills, and experience."
+    
+    if personal_context:
+        system_content += f"\n\nKey Personal Info:\n- Name: {full_name}\n- Title: {personal_context.get('title', '')}\n- Location: {personal_context.get('location', '')}\n- Summary: {personal_context.get('summary', '')}"
+    
+    system_content += f"\n\nAlways respond professionally and authentically as {first_name}. Be specific about your experience and achievements."
+    return system_content
+
+# USD per million (input, output) tokens, Groq list prices; unknown models are costed at 0
+MODEL_PRICES_PER_MTOK = {
+    'llama-3.1-8b-instant': (0.05, 0.08),
+    'llama-3.3-70b-versatile': (0.59, 0.79),
+    'openai/gpt-oss-20b': (0.075, 0.30),
+    'openai/gpt-oss-120b': (0.15, 0.60)
+}
+
+@dataclass(frozen=True)
+class GenerationRoute:
+    """Model and sampling settings one answer is generated with"""
+    name: str
+    model: str
+    max_tokens: int
+    temperature: float
+
+def select_generation_route(intent, context_tokens=0):
+    """Pick the generation route for a question from its intent and packed context size.
+    
+    Simple intents with little context go to the fast model with a small token cap;
+    complex intents with substantial context escalate to GROQ_COMPLEX_MODEL; the rest
+    (and everything when MODEL_CASCADE_ENABLED is off) use DEFAULT_MODEL.
+    """
+    route = GenerationRoute('standard', config.DEFAULT_MODEL, config.RAG_MAX_TOKENS, config.RAG_TEMPERATURE)
+    if config.MODEL_CASCADE_ENABLED:
+        if intent in config.MODEL_SIMPLE_INTENTS and context_tokens <= config.MODEL_SIMPLE_MAX_CONTEXT_TOKENS:
+            route = GenerationRoute('simple', config.GROQ_FAST_MODEL, config.MODEL_SIMPLE_MAX_TOKENS, min(config.RAG_TEMPERATURE, config.MODEL_SIMPLE_TEMPERATURE))
+        elif intent in config.MODEL_COMPLEX_INTENTS and context_tokens >= config.MODEL_COMPLEX_MIN_CONTEXT_TOKENS:
+            route = GenerationRoute('complex', config.GROQ_COMPLEX_MODEL, max(config.RAG_MAX_TOKENS, config.MODEL_COMPLEX_MAX_TOKENS), config.RAG_TEMPERATURE)
+    
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.attributes.update(route=route.name, model=route.model)
+    logger.debug(f"🧭 Generation route: {route.name} ({route.model}, max_tokens={route.max_tokens}) for intent={intent}, context≈{context_tokens} tokens")
+    return route
+
+def generation_models_key():
+    """Identify the configured model routing, so cached answers are dropped when it changes"""
+    if not config.MODEL_CASCADE_ENABLED:
+        return config.DEFAULT_MODEL
+    return f"{config.GROQ_FAST_MODEL}|{config.DEFAULT_MODEL}|{config.GROQ_COMPLEX_MODEL}"
+
+class RouteStats:
+    """Per-route generation counters: requests, tokens and estimated cost"""
+    
+    def __init__(self):
+        self._routes = {}  # route name -> counters
+        self._lock = threading.Lock()
+    
+    def record(self, route, model, usage):
+        prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+        input_price, output_price = MODEL_PRICES_PER_MTOK.get(model, (0.0, 0.0))
+        cost = (prompt_tokens * input_price + completion_tokens * output_price) / 1e6
+        with self._lock:
+            counters = self._routes.setdefault(route, {'requests': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0})
+            counters['requests'] += 1
+            counters['prompt_tokens'] += prompt_tokens
+            counters['completion_tokens'] += completion_tokens
+            counters['cost_usd'] += cost
+    
+    def stats(self):
+        with self._lock:
+            return {route: dict(counters) for route, counters in self._routes.items()}
+    
+    def render_prometheus(self):
+        lines = [
+            "# HELP digitaltwin_route_requests_total Generations per model route",
+            "# TYPE digitaltwin_route_requests_total counter"
+        ]
+        routes = self.stats()
+        for route, counters in routes.items():
+            lines.append(f'digitaltwin_route_requests_total{{route="{route}"}} {counters["requests"]}')
+        lines.append("# HELP digitaltwin_route_tokens_total Groq tokens per model route")
+        lines.append("# TYPE digitaltwin_route_tokens_total counter")
+        for route, counters in routes.items():
+            lines.append(f'digitaltwin_route_tokens_total{{route="{route}",kind="prompt"}} {counters["prompt_tokens"]}')
+            lines.append(f'digitaltwin_route_tokens_total{{route="{route}",kind="completion"}} {counters["completion_tokens"]}')
+        lines.append("# HELP digitaltwin_route_cost_usd_total Estimated generation cost per model route")
+        lines.append("# TYPE digitaltwin_route_cost_usd_total counter")
+        for route, counters in routes.items():
+            lines.append(f'digitaltwin_route_cost_usd_total{{route="{route}"}} {counters["cost_usd"]:.6f}')
+        return "\n".join(lines) + "\n"
+
+ROUTE_STATS = RouteStats()
+
+def record_generation_metrics(model, started, first_token_at, streamed, route=None, usage=None):
+    """Record per-request generation latency (including time-to-first-token) and per-route cost"""
+    finished = time.perf_counter()
+    metrics = {
+        'model': model,
+        'route': route.name if route else None,
+        'stream': streamed,
+        'ttft_ms': round(((first_token_at or finished) - started) * 1000, 1),
+        'total_ms': round((finished - started) * 1000, 1)
+    }
+    GENERATION_METRICS.append(metrics)
+    STAGE_METRICS.observe('generation_ttft', metrics['ttft_ms'])
+    if route is not None:
+        STAGE_METRICS.observe(f"route_{route.name}", metrics['total_ms'])
+        ROUTE_STATS.record(route.name, model, usage)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_span('generation_ttft', metrics['ttft_ms'])
+    logger.debug(f"⏱️ Debug: time to first token {metrics['ttft_ms']}ms, total {metrics['total_ms']}ms ({model}{', ' + route.name + ' route' if route else ''})")
+    return metrics
+
+def generate_response_with_groq(client, prompt, personal_context=None, model=None, route=None):
+    """Generate response using Groq with enhanced personal context (route sets model, max_tokens and temperature)"""
+    if route is None:
+        route = GenerationRoute('standard', model or config.DEFAULT_MODEL, config.RAG_MAX_TOKENS, config.RAG_TEMPERATURE)
+    model = route.model
+    
+    started = time.perf_counter()
+    try:
+        completion = call_upstream(
+            'groq',
+            client.chat.completions.create,
+            model=model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": build_system_prompt(personal_context)
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            temperature=route.temperature,
+            max_tokens=route.max_tokens
+        )
+        
+        # Without streaming, the first token is only visible once the whole answer is
+        usage = getattr(completion, 'usage', None)
+        record_generation_metrics(model, started, None, streamed=False, route=route, usage=usage)
+        record_token_usage(usage)
+        return completion.choices[0].message.content.strip()
+        
+    except Exception as e:
+        return f"❌ Error generating response: {str(e)}"
+
+def stream_response_with_groq(client, prompt, personal_context=None, model=None, route=None, outcome=None):
+    """Stream a Groq response, yielding text deltas as soon as they are produced.
+    
+    A failure (even part-way through) yields an error delta; an outcome dict, if given, also gets
+    its 'error' set so callers can tell a truncated answer from a complete one.
+    """
+    if route is None:
+        route = GenerationRoute('standard', model or config.DEFAULT_MODEL, config.RAG_MAX_TOKENS, config.RAG_TEMPERATURE)
+    model = route.model
+    
+    started = time.perf_counter()
+    first_token_at = None
+    usage = None
+    try:
+        # Retries cover opening the stream; a stream that fails part-way is not replayed
+        stream = call_upstream(
+            'groq',
+            client.chat.completions.create,
+            model=model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": build_system_prompt(personal_context)
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            temperature=route.temperature,
+            max_tokens=route.max_tokens,
+            stream=True
+        )
+        
+        for chunk in stream:
+            # Groq reports usage on the final chunk of a stream
+            x_groq = getattr(chunk, 'x_groq', None)
+            if x_groq is not None and getattr(x_groq, 'usage', None) is not None:
+                usage = x_groq.usage
+                record_token_usage(usage)
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if first_token_at is None and delta:
+                delta = delta.lstrip()  # match the non-streaming .strip()
+            if not delta:
+                continue
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            yield delta
+        
+        record_generation_metrics(model, started, first_token_at, streamed=True, route=route, usage=usage)
+        
+    except Exception as e:
+        if outcome is not None:
+            outcome['error'] = str(e)
+        yield f"❌ Error generating response: {str(e)}"
+
+def setup_async_groq_client():
+    """Setup the asyncio Groq client"""
+    if not config.GROQ_API_KEY:
+        print("❌ GROQ_API_KEY not found in .env file")
+        return None
+    
+    try:
+        import httpx
+        from groq import AsyncGroq
+        
+        return AsyncGroq(
+            api_key=config.GROQ_API_KEY,
+            timeout=_upstream_timeout(config.UPSTREAM_LLM_TIMEOUT),
+            max_retries=0,
+            http_client=httpx.AsyncClient(limits=_pooled_http_limits())
+        )
+    except Exception as e:
+        print(f"❌ Error initializing async Groq client: {str(e)}")
+        return None
+
+async def async_generate_response_with_groq(client, prompt, personal_context=None, model=None, system_prompt=None, route=None):
+    """Async counterpart of generate_response_with_groq (takes an AsyncGroq client)"""
+    if route is None:
+        route = GenerationRoute('standard', model or config.DEFAULT_MODEL, config.RAG_MAX_TOKENS, config.RAG_TEMPERATURE)
+    model = route.model
+    if system_prompt is None:
+        system_prompt = build_system_prompt(personal_context)
+    
+    started = time.perf_counter()
+    try:
+        completion = await async_call_upstream(
+            'groq',
+            client.chat.completions.create,
+            model=model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": system_prompt
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            temperature=route.temperature,
+            max_tokens=route.max_tokens
+        )
+        
+        usage = getattr(completion, 'usage', None)
+        record_generation_metrics(model, started, None, streamed=False, route=route, usage=usage)
+        record_token_usage(usage)
+        return completion.choices[0].message.content.strip()
+        
+    except Exception as e:
+        return f"❌ Error generating response: {str(e)}"
@@ -0,0 +1,239 @@
+"""Syncing profile chunks into the vector index (incremental, manifest-based) and setting it up"""
+
+import os
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from . import config, retrieval
+from .observability import logger
+from .upstream import call_upstream
+from .profiles import load_profile_data
+from .backends import create_vector_index, vector_index_identity
+from .chunking import iter_profile_chunks
+from .caches import bump_index_generation
+from .retrieval import BM25Index, build_chunk_store, build_lexical_index, ChunkStore
+
+def compact_index_metadata(metadata):
+    """The metadata fields kept in the vector index when chunk content is stored locally"""
+    return {field: metadata[field] for field in config.INDEX_METADATA_FIELDS if field in metadata}
+
+def compute_chunk_hash(text, metadata):
+    """Stable content hash for a chunk (embedded text + metadata)"""
+    payload = json.dumps([text, metadata], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def load_vector_manifest(path=None):
+    """Load the chunk ID -> content hash manifest from the last sync"""
+    path = path or config.VECTOR_MANIFEST_FILE
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    
+    # A manifest written for a different index says nothing about this one
+    if manifest.get('index') != vector_index_identity():
+        return None
+    return manifest
+
+def save_vector_manifest(chunk_hashes, path=None):
+    """Atomically write the chunk ID -> content hash manifest"""
+    path = path or config.VECTOR_MANIFEST_FILE
+    manifest = {
+        "version": 1,
+        "index": vector_index_identity(),
+        "chunking": config.CHUNKING_STRATEGY,
+        "chunks": chunk_hashes
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def list_vector_ids(index):
+    """List every vector ID in the index, paging with range() instead of a capped query"""
+    vector_ids = []
+    cursor = ""
+    while True:
+        page = index.range(cursor=cursor, limit=1000)
+        vector_ids.extend(v.id for v in page.vectors)
+        cursor = page.next_cursor
+        if not cursor:
+            break
+    return vector_ids
+
+def upsert_in_batches(index, chunks, batch_size=None, max_workers=None):
+    """Upsert a stream of chunks in fixed-size batches with bounded concurrent submission"""
+    if batch_size is None:
+        batch_size = config.UPSERT_BATCH_SIZE
+    if max_workers is None:
+        max_workers = config.UPSERT_WORKERS
+    
+    upserted_ids = []
+    in_flight = set()
+    
+    def submit(executor, batch):
+        in_flight.add(executor.submit(call_upstream, 'vector', index.upsert, vectors=batch))
+        upserted_ids.extend(v[0] for v in batch)
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        batch = []
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) < batch_size:
+                continue
+            # Hold at most max_workers batches in memory / on the wire at once
+            if len(in_flight) >= max_workers:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    in_flight.discard(future)
+                    future.result()
+            submit(executor, batch)
+            batch = []
+        if batch:
+            submit(executor, batch)
+        for future in in_flight:
+            future.result()
+    
+    return upserted_ids
+
+def sync_vectors(index, chunks, mode=None, current_count=None, manifest_path=None):
+    """Stream content chunks into the index, upserting only new/changed chunks in incremental mode"""
+    if mode is None:
+        mode = config.REINDEX_MODE
+    
+    if mode == 'full':
+        previous_hashes = {vector_id: None for vector_id in list_vector_ids(index)}
+    else:
+        manifest = load_vector_manifest(manifest_path)
+        if current_count == 0:
+            previous_hashes = {}
+        elif manifest is not None:
+            previous_hashes = manifest.get('chunks', {})
+        else:
+            # No usable manifest: treat everything as changed but still find stale IDs
+            print("⚠️ No vector manifest found, rebuilding it from the index...")
+            previous_hashes = {vector_id: None for vector_id in list_vector_ids(index)}
+    
+    # Only IDs and hashes are kept; chunk text flows straight through to the upsert batches
+    chunk_hashes = {}
+    
+    def changed_chunks():
+        for vector_id, text, metadata in chunks:
+            if config.CHUNK_STORE_ENABLED:
+                # Content, titles and tags live in the local ChunkStore; hashing the uploaded
+                # form means switching CHUNK_STORE_ENABLED re-upserts every chunk once
+                metadata = compact_index_metadata(metadata)
+            chunk_hash = compute_chunk_hash(text, metadata)
+            chunk_hashes[vector_id] = chunk_hash
+            if mode == 'full' or previous_hashes.get(vector_id) != chunk_hash:
+                yield (vector_id, text, metadata)
+    
+    upserted_ids = upsert_in_batches(index, changed_chunks())
+    
+    stale_ids = [vector_id for vector_id in previous_hashes if vector_id not in chunk_hashes]
+    for start in range(0, len(stale_ids), config.UPSERT_BATCH_SIZE):
+        call_upstream('vector', index.delete, ids=stale_ids[start:start + config.UPSERT_BATCH_SIZE])
+    
+    if upserted_ids or stale_ids:
+        bump_index_generation(index)
+    if chunk_hashes:
+        save_vector_manifest(chunk_hashes, manifest_path)
+    
+    return {
+        'mode': mode,
+        'total': len(chunk_hashes),
+        'upserted': upserted_ids,
+        'deleted': stale_ids,
+        'unchanged': len(chunk_hashes) - len(upserted_ids)
+    }
+
+def setup_vector_database(force_reload=False, profile_data=None):
+    """Setup the vector database (Upstash with built-in embeddings, or the local backend)"""
+    backend_name = "local vector index" if config.VECTOR_BACKEND == 'local' else "Upstash Vector"
+    print(f"🔄 Setting up {backend_name} database...")
+    
+    try:
+        index = create_vector_index()
+        print(f"✅ Connected to {backend_name} successfully!")
+        
+        # Check current vector count
+        try:
+            info = index.info()
+            current_count = getattr(info, 'vector_count', 0)
+            print(f"📊 Current vectors in database: {current_count}")
+        except:
+            current_count = 0
+        
+        # Switching CHUNKING_STRATEGY changes every chunk ID, so the index must be resynced
+        manifest = load_vector_manifest()
+        if current_count and manifest is not None and manifest.get('chunking', 'section') != config.CHUNKING_STRATEGY:
+            print(f"🔄 Chunking strategy changed to '{config.CHUNKING_STRATEGY}', resyncing vectors...")
+            force_reload = True
+        
+        # Load data if database is empty or force reload requested
+        if current_count == 0 or force_reload:
+            if force_reload:
+                print(f"🔄 Reindexing updated professional profile ({config.REINDEX_MODE} mode)...")
+            else:
+                print("📝 Loading your updated professional profile...")
+            
+            if profile_data is None:
+                profile_data = load_profile_data()
+            if not profile_data:
+                return None
+            
+            stats = sync_vectors(index, iter_profile_chunks(profile_data), current_count=current_count)
+            if stats['total'] == 0:
+                print("❌ No content found in profile data")
+                return None
+            
+            print(f"✅ Synced {stats['total']} content chunks: {len(stats['upserted'])} upserted, {len(stats['deleted'])} deleted, {stats['unchanged']} unchanged")
+            if config.DEBUG and stats['upserted']:
+                upserted = stats['upserted']
+                print(f"🔍 Debug: Upserted vectors with IDs: {upserted[:5]}{'...' if len(upserted) > 5 else ''}")
+            if config.DEBUG and stats['deleted']:
+                print(f"🔍 Debug: Deleted stale vectors with IDs: {stats['deleted'][:5]}{'...' if len(stats['deleted']) > 5 else ''}")
+            
+            if hasattr(index, 'persist'):
+                index.persist()
+        
+        if profile_data is None and (config.HYBRID_MODE != 'off' or config.CHUNK_STORE_ENABLED):
+            profile_data = load_profile_data()
+        if build_chunk_store(profile_data) is not None:
+            print(f"🗃️ Chunk store ready: {len(retrieval.CHUNK_STORE)} chunks hydrated locally (ID-only queries)")
+        if config.HYBRID_MODE != 'off':
+            lexical_index = build_lexical_index(profile_data)
+            if lexical_index is not None:
+                print(f"📚 BM25 index ready: {len(lexical_index)} chunks ({config.HYBRID_MODE} mode)")
+        
+        return index
+        
+    except Exception as e:
+        print(f"❌ Error setting up database: {str(e)}")
+        return None
+
+def reindex_profile(index, profile_data, manifest_path=None):
+    """Incrementally sync a changed profile into the index (runs on the profile watcher thread)"""
+    try:
+        # Swap in the new local stores before sync_vectors bumps the index generation, so no
+        # retrieval under the new generation sees the old ones. Vectors the profile no longer
+        # has are dropped by ChunkStore.hydrate until their delete lands.
+        if getattr(index, 'lexical_index', None) is not None:
+            index.lexical_index = BM25Index(iter_profile_chunks(profile_data))
+        else:
+            build_lexical_index(profile_data)
+        if getattr(index, 'chunk_store', None) is not None:
+            index.chunk_store = ChunkStore(iter_profile_chunks(profile_data))
+        else:
+            build_chunk_store(profile_data)
+        stats = sync_vectors(index, iter_profile_chunks(profile_data), mode='incremental', manifest_path=manifest_path)
+        if hasattr(index, 'persist'):
+            index.persist()
+        logger.info("Reindexed profile: %d upserted, %d deleted, %d unchanged",
+                    len(stats['upserted']), len(stats['deleted']), stats['unchanged'])
+        return stats
+    except Exception as e:
+        logger.error("Background reindex failed: %s", e)
+        return None
@@ -0,0 +1,120 @@
+"""Keyword-based query intent classification"""
+
+import re
+
+# Intent keywords with enhanced coverage; keywords match whole words (plus their
+# inflections), so 'ml' no longer fires inside 'html' nor 'rate' inside 'accurate'
+INTENT_KEYWORDS = {
+    'experience': ['work', 'job', 'experience', 'employment', 'company', 'role', 'position', 'career history', 'ausbiz', 'newmont', 'rigglets', 'intern', 'accountant', 'associate'],
+    'skills': ['skill', 'technology', 'programming', 'language', 'tool', 'framework', 'technical', 'software', 'python', 'sql', 'javascript', 'database', 'cloud', 'proficiency', 'machine learning', 'ml', 'regression', 'classification', 'modeling', 'scikit-learn'],
+    'education': ['education', 'degree', 'university', 'school', 'qualification', 'certification', 'course', 'msc', 'bsc', 'masters', 'bachelor', 'uts', 'ghana', 'acca'],
+    'projects': ['project', 'portfolio', 'github', 'built', 'developed', 'created', 'app', 'application', 'rag', 'food', 'tableau', 'dashboard', 'analytics', 'tennis', 'trade', 'insurance', 'premium', 'credit risk', 'banking', 'random forest', 'ridge', 'lasso'],
+    'personal': ['about', 'who', 'background', 'summary', 'introduction', 'overview', 'tell me', 'elevator pitch'],
+    'career_goals': ['goal', 'future', 'aspiration', 'plan', 'want', 'looking for', 'seeking', 'next', 'career path'],
+    'salary': ['salary', 'compensation', 'pay', 'money', 'rate', 'wage', 'location preference', 'visa', 'authorization', 'remote', 'hybrid', 'relocation'],
+    'achievements': ['achievement', 'accomplish', 'result', 'outcome', 'impact', 'success', 'metric', 'kpi', 'improvement', 'delivery', 'saved', 'reduced'],
+    'leadership': ['leadership', 'lead', 'manage', 'team', 'coordinate', 'mentor', 'guide', 'responsibility', 'teamwork'],
+    'portfolio': ['portfolio', 'dashboard', 'visualization', 'tableau', 'power bi', 'demo', 'showcase', 'example']
+}
+
+_INTENT_WORD = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+_KEYWORD_SUFFIXES = ('s', 'ed', 'ing', 'er', 'ers')
+# Derived words are listed rather than generated: a blanket 'al' suffix turned 'intern' into 'internal'
+_KEYWORD_DERIVATIONS = {
+    'manage': ['management'],
+    'intern': ['internship', 'internships'],
+    'education': ['educational'],
+    'accomplish': ['accomplishment', 'accomplishments'],
+    'mentor': ['mentorship'],
+    'coordinate': ['coordination'],
+}
+_VOWELS = frozenset('aeiou')
+
+def _keyword_variants(keyword):
+    """Inflected (and listed derived) forms of a keyword's last word: manage -> managed, managing, manager, management..."""
+    head, _, word = keyword.rpartition(' ')
+    stem = word
+    if word.endswith('e'):
+        # Silent e drops before a vowel suffix: manage -> managing, coordinate -> coordinated
+        stem = word[:-1]
+    elif len(word) > 2 and word[-1] == 'y' and word[-2] not in _VOWELS:
+        # company -> companies, delivery -> deliveries
+        stem = word[:-1] + 'i'
+    elif (3 <= len(word) <= 4 and word[-1] not in _VOWELS and word[-1] not in 'wxy'
+          and word[-2] in _VOWELS and word[-3] not in _VOWELS):
+        # Short consonant-vowel-consonant words double: plan -> planning, planned, planner
+        stem = word + word[-1]
+    
+    variants = {word}
+    for suffix in _KEYWORD_SUFFIXES:
+        if suffix[0] not in _VOWELS:
+            variants.add(word + suffix)
+        elif suffix == 'ing' and word.endswith('y'):
+            variants.add(word + suffix)
+        else:
+            variants.add(stem + suffix)
+    if word.endswith(('s', 'x', 'z', 'ch', 'sh')):
+        variants.add(word + 'es')
+    elif stem.endswith('i'):
+        variants.add(stem + 'es')
+    variants.update(_KEYWORD_DERIVATIONS.get(word, ()))
+    prefix = head + ' ' if head else ''
+    return [prefix + variant for variant in sorted(variants)]
+
+_INTENT_ORDER = {intent: rank for rank, intent in enumerate(INTENT_KEYWORDS)}
+
+def _compile_intent_matcher(intent_keywords):
+    """Compile the keyword table once into inflected phrase -> intents lookups"""
+    phrase_intents = {}
+    for intent, keywords in intent_keywords.items():
+        for keyword in keywords:
+            for variant in _keyword_variants(keyword):
+                intents = phrase_intents.setdefault(variant, [])
+                if intent not in intents:
+                    intents.append(intent)
+    # Multi-word phrases are only tried at words that can start one
+    phrase_starts = {}
+    for phrase in phrase_intents:
+        words = phrase.split()
+        if len(words) > 1:
+            phrase_starts.setdefault(words[0], set()).add(len(words))
+    phrase_starts = {word: sorted(lengths, reverse=True) for word, lengths in phrase_starts.items()}
+    return phrase_intents, phrase_starts
+
+_PHRASE_INTENTS, _PHRASE_STARTS = _compile_intent_matcher(INTENT_KEYWORDS)
+
+def score_query_intents(query_text):
+    """Score every intent in a single pass over the query's words, highest score first"""
+    words = _INTENT_WORD.findall(query_text.lower())
+    counts = {}
+    position = 0
+    while position < len(words):
+        word = words[position]
+        intents, length = None, 1
+        # Longest phrase first so 'machine learning' is one match, not two
+        for phrase_length in _PHRASE_STARTS.get(word, ()):
+            intents = _PHRASE_INTENTS.get(" ".join(words[position:position + phrase_length]))
+            if intents:
+                length = phrase_length
+                break
+        if not intents:
+            intents = _PHRASE_INTENTS.get(word)
+        if intents:
+            for intent in intents:
+                counts[intent] = counts.get(intent, 0) + 1
+        position += length
+    
+    if len(counts) < 2:
+        return counts
+    # Ties keep INTENT_KEYWORDS order, matching the original classifier
+    ordered = sorted(counts, key=lambda intent: (-counts[intent], _INTENT_ORDER[intent]))
+    return {intent: counts[intent] for intent in ordered}
+
+def classify_query_intent(query_text):
+    """Classify user query to determine what type of information they're looking for"""
+    intent_scores = score_query_intents(query_text)
+    
+    # Return the highest scoring intent, or 'general' if no specific intent found
+    if intent_scores:
+        return next(iter(intent_scores))
+    return 'general'
@@ -0,0 +1,174 @@
+"""Logging, per-stage latency metrics and request traces"""
+
+import sys
+import queue
+import atexit
+import logging
+import logging.handlers
+import contextvars
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from . import config
+
+logger = logging.getLogger('digitaltwin_rag')
+metrics_logger = logging.getLogger('digitaltwin_rag.metrics')
+
+def configure_logging():
+    """Send pipeline logs through a queue so stdout/stderr writes stay off the request path"""
+    if getattr(configure_logging, 'listener', None):
+        return configure_logging.listener
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter('%(message)s'))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(logging.DEBUG if config.DEBUG else logging.WARNING)
+    logger.propagate = False
+    metrics_logger.setLevel(logging.INFO if config.METRICS_LOG else logging.WARNING)
+    configure_logging.listener = listener
+    return listener
+
+class StageMetrics:
+    """Rolling per-stage latency windows (p50/p95/p99) plus Groq token counters"""
+    
+    def __init__(self, window=None):
+        self.window = config.METRICS_WINDOW if window is None else window
+        self._samples = {}  # stage -> deque of recent durations (ms)
+        self._counts = {}
+        self._sums = {}
+        self.tokens = {'prompt': 0, 'completion': 0}
+        self.context_tokens = {'packed': 0, 'saved': 0}
+        self._lock = threading.Lock()
+    
+    def observe(self, stage, duration_ms):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+            samples.append(duration_ms)
+            self._counts[stage] = self._counts.get(stage, 0) + 1
+            self._sums[stage] = self._sums.get(stage, 0.0) + duration_ms
+    
+    def add_tokens(self, prompt_tokens, completion_tokens):
+        with self._lock:
+            self.tokens['prompt'] += prompt_tokens
+            self.tokens['completion'] += completion_tokens
+    
+    def add_context_tokens(self, packed_tokens, saved_tokens):
+        with self._lock:
+            self.context_tokens['packed'] += packed_tokens
+            self.context_tokens['saved'] += saved_tokens
+    
+    @staticmethod
+    def _percentile(ordered, fraction):
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+    
+    def summary(self):
+        """{stage: {count, sum_ms, p50, p95, p99}} over each stage's rolling window"""
+        with self._lock:
+            snapshot = {stage: sorted(samples) for stage, samples in self._samples.items()}
+            counts, sums = dict(self._counts), dict(self._sums)
+        return {
+            stage: {
+                'count': counts[stage],
+                'sum_ms': round(sums[stage], 3),
+                'p50': round(self._percentile(ordered, 0.50), 3),
+                'p95': round(self._percentile(ordered, 0.95), 3),
+                'p99': round(self._percentile(ordered, 0.99), 3)
+            }
+            for stage, ordered in snapshot.items()
+        }
+    
+    def render_prometheus(self):
+        """Prometheus text exposition of stage latency summaries and token counters"""
+        lines = [
+            "# HELP digitaltwin_stage_latency_ms Pipeline stage latency over a rolling window.",
+            "# TYPE digitaltwin_stage_latency_ms summary"
+        ]
+        for stage, stats in sorted(self.summary().items()):
+            for quantile, key in (('0.5', 'p50'), ('0.95', 'p95'), ('0.99', 'p99')):
+                lines.append(f'digitaltwin_stage_latency_ms{{stage="{stage}",quantile="{quantile}"}} {stats[key]}')
+            lines.append(f'digitaltwin_stage_latency_ms_sum{{stage="{stage}"}} {stats["sum_ms"]}')
+            lines.append(f'digitaltwin_stage_latency_ms_count{{stage="{stage}"}} {stats["count"]}')
+        lines.append("# HELP digitaltwin_groq_tokens_total Tokens reported by Groq completion usage.")
+        lines.append("# TYPE digitaltwin_groq_tokens_total counter")
+        with self._lock:
+            tokens = dict(self.tokens)
+            context_tokens = dict(self.context_tokens)
+        for kind, count in tokens.items():
+            lines.append(f'digitaltwin_groq_tokens_total{{kind="{kind}"}} {count}')
+        lines.append("# HELP digitaltwin_context_tokens_total Estimated retrieved-context tokens packed into prompts and trimmed by the packer.")
+        lines.append("# TYPE digitaltwin_context_tokens_total counter")
+        for kind, count in context_tokens.items():
+            lines.append(f'digitaltwin_context_tokens_total{{kind="{kind}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+STAGE_METRICS = StageMetrics()
+
+class RequestTrace:
+    """Timing spans and token usage for one request"""
+    
+    def __init__(self, kind='rag_query'):
+        self.kind = kind
+        self.started = time.perf_counter()
+        self.spans = {}
+        self.tokens = {'prompt': 0, 'completion': 0}
+        self.attributes = {}
+    
+    def add_span(self, name, duration_ms):
+        self.spans[name] = round(self.spans.get(name, 0.0) + duration_ms, 3)
+    
+    def finish(self):
+        """Close the trace, feed the rolling stats and emit the JSON log line; returns span timings"""
+        total_ms = (time.perf_counter() - self.started) * 1000
+        self.spans['total'] = round(total_ms, 3)
+        STAGE_METRICS.observe('total', total_ms)
+        if metrics_logger.isEnabledFor(logging.INFO):
+            metrics_logger.info(json.dumps({
+                'event': self.kind,
+                **self.attributes,
+                'spans_ms': self.spans,
+                'tokens': self.tokens
+            }, ensure_ascii=False))
+        return self.spans
+
+_current_trace = contextvars.ContextVar('digitaltwin_trace', default=None)
+
+@contextmanager
+def span(name):
+    """Time a pipeline stage into the rolling stats and the current request's trace"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        STAGE_METRICS.observe(name, duration_ms)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_span(name, duration_ms)
+
+def record_token_usage(usage):
+    """Record prompt/completion token counts from a Groq completion's usage"""
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+    completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+    STAGE_METRICS.add_tokens(prompt_tokens, completion_tokens)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.tokens['prompt'] += prompt_tokens
+        trace.tokens['completion'] += completion_tokens
+
+def record_context_packing(stats):
+    """Record the packer's estimated context tokens (kept and saved) for one prompt"""
+    STAGE_METRICS.add_context_tokens(stats['packed_tokens'], stats['saved_tokens'])
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.attributes['context_tokens'] = stats
@@ -0,0 +1,383 @@
+"""The RAG pipeline: retrieve, assemble the prompt, generate (sync, streaming and asyncio)"""
+
+import asyncio
+import time
+
+from . import config, caches, conversation
+from .observability import logger, record_context_packing, RequestTrace, span, _current_trace
+from .profiles import get_profile_version
+from .chunking import expand_to_parents
+from .retrieval import async_retrieve_context, context_token_budget, pack_context, retrieve_context
+from .intent import classify_query_intent
+from .generation import (
+    async_generate_response_with_groq, generate_response_with_groq, generation_models_key,
+    select_generation_route, stream_response_with_groq
+)
+from .structured import handle_special_commands, route_structured_question
+
+def prewarm_answer_cache(index, groq_client, profile_data, questions=None):
+    """Answer the sample questions up front so their first real ask is a cache hit"""
+    if caches.ANSWER_CACHE is None:
+        return 0
+    questions = config.SAMPLE_QUESTIONS if questions is None else questions
+    model = generation_models_key()
+    profile_version = get_profile_version(profile_data)
+    
+    warmed = 0
+    for question in questions:
+        key = caches.ANSWER_CACHE.make_key(question, classify_query_intent(question), model, profile_version)
+        if caches.ANSWER_CACHE.get(key) is None:
+            rag_query(index, groq_client, question, profile_data)
+            warmed += 1
+    return warmed
+
+NO_RESULTS_ANSWER = "I don't have specific information about that topic in my profile."
+
+def build_rag_prompt(index, question, intent, profile_data=None):
+    """Retrieve context for a classified question and assemble the Groq prompt.
+    
+    Returns a dict with 'prompt', 'personal_context' and 'results', or with only
+    'answer' when nothing usable was retrieved.
+    """
+    results = retrieve_context(index, question, intent)
+    return assemble_rag_prompt(question, intent, results, profile_data)
+
+def assemble_rag_prompt(question, intent, results, profile_data=None, history=None):
+    """Turn retrieved results into the Groq prompt (see build_rag_prompt for the return value)"""
+    if not results or len(results) == 0:
+        return {'answer': NO_RESULTS_ANSWER}
+    
+    # Step 3: Extract and format relevant content
+    logger.debug("🧠 Searching your professional profile...")
+    
+    top_docs = []
+    
+    # Hierarchical chunks: several hits from one section read better as the whole section
+    results = expand_to_parents(results, profile_data)
+    
+    for result in results:
+        metadata = result.metadata or {}
+        title = metadata.get('title', 'Information')
+        content = metadata.get('content', '')
+        category = metadata.get('category', '')
+        tags = metadata.get('tags', [])
+        importance = metadata.get('importance', 'medium')
+        score = result.score
+        
+        logger.debug(f"🔹 Found: {title} (Relevance: {score:.3f}, Category: {category})")
+        
+        if content:
+            top_docs.append({
+                'title': title,
+                'content': content,
+                'category': category,
+                'tags': tags,
+                'importance': importance,
+                'score': score
+            })
+    
+    if not top_docs:
+        return {'answer': "I found some relevant information but couldn't extract specific details."}
+    
+    logger.debug("⚡ Generating personalized response...")
+    
+    # Step 4: Pack the most relevant, non-duplicate sentences into the context token budget
+    context, packed_docs, packing_stats = pack_context(question, top_docs, context_token_budget(intent))
+    record_context_packing(packing_stats)
+    logger.debug(f"✂️ Context packed to ~{packing_stats['packed_tokens']} tokens (saved ~{packing_stats['saved_tokens']})")
+    context_metadata = [{key: value for key, value in doc.items() if key != 'content'} for doc in packed_docs]
+    
+    # Get personal context for enhanced system prompt
+    personal_context = None
+    if profile_data:
+        personal_context = profile_data.get('personal', {})
+    
+    # Create intent-specific prompt enhancement
+    intent_context = ""
+    if intent == 'experience':
+        intent_context = "Focus on work experience, achievements in STAR format, and professional accomplishments with quantified results."
+    elif intent == 'skills':
+        intent_context = "Emphasize technical skills with proficiency levels (1-5 scale), programming languages with years of experience, tools, and specific expertise areas."
+    elif intent == 'education':
+        intent_context = "Highlight educational background, degrees with timelines, certifications, and key academic projects with outcomes."
+    elif intent == 'projects':
+        intent_context = "Describe specific projects using STAR format (Situation, Task, Action, Result), technologies used, quantified outcomes, and business impact."
+    elif intent == 'career_goals':
+        intent_context = "Discuss career aspirations, learning goals, and industry interests with specific examples."
+    elif intent == 'salary':
+        intent_context = "Provide information about salary expectations, location preferences, work authorization status, and remote work experience."
+    elif intent == 'achievements':
+        intent_context = "Focus on quantified achievements, measurable outcomes, performance improvements, and specific business impact."
+    elif intent == 'leadership':
+        intent_context = "Describe leadership examples using STAR format, team coordination, project management, and cross-functional collaboration."
+    elif intent == 'portfolio':
+        intent_context = "Showcase portfolio evidence, dashboard examples, visualizations, and specific business insights delivered."
+    elif intent == 'skills' and any(keyword in question.lower() for keyword in ['machine learning', 'ml', 'model', 'regression', 'classification']):
+        intent_context = "Emphasize machine learning expertise including regression and classification projects, model evaluation metrics (MAE, accuracy, F1), feature engineering, model governance, and ethical AI considerations with specific quantified outcomes."
+    
+    # Recent turns (already capped to CONVERSATION_HISTORY_TOKENS) so follow-ups read naturally
+    history_block = f"\nConversation so far:\n{history}\n" if history else ''
+    
+    prompt = f"""Based on the following information about yourself, answer the question.
+{intent_context if intent_context else ''}
+
+Your Professional Information:
+{context}
+{history_block}
+Question: {question}
+
+Provide a helpful, professional response in first person:"""
+    
+    return {
+        'prompt': prompt,
+        'personal_context': personal_context,
+        'results': results,
+        'context_metadata': context_metadata,
+        'context_tokens': packing_stats
+    }
+
+def _lookup_cached_answer(question, intent, profile_data, use_cache, history=None):
+    """Return (cache_key, cached_answer) for a question; both None when caching is off.
+    
+    Answers conditioned on conversation history are neither read from nor written to the
+    cache: the same follow-up means different things in different sessions.
+    """
+    if not use_cache or history or caches.ANSWER_CACHE is None:
+        return None, None
+    cache_key = caches.ANSWER_CACHE.make_key(question, intent, generation_models_key(), get_profile_version(profile_data))
+    cached_answer = caches.ANSWER_CACHE.get(cache_key)
+    if cached_answer is not None:
+        logger.debug("💾 Answer served from cache")
+    return cache_key, cached_answer
+
+def rag_query_detailed(index, groq_client, question, profile_data=None, use_cache=True, history=None):
+    """rag_query that also reports the intent, retrieved chunk IDs/scores, stage timings and token usage.
+    
+    history is recent conversation text (see ConversationSession.history) added to the prompt.
+    """
+    trace = RequestTrace()
+    details = {'answer': None, 'intent': None, 'source': 'rag', 'chunks': []}
+    trace_token = _current_trace.set(trace)
+    
+    try:
+        # Step 1: Classify query intent
+        with span('intent'):
+            intent = classify_query_intent(question)
+        details['intent'] = intent
+        logger.debug(f"🎯 Query intent classified as: {intent}")
+        
+        # Repeat questions are served from the answer cache with no API calls
+        with span('cache'):
+            cache_key, cached_answer = _lookup_cached_answer(question, intent, profile_data, use_cache, history)
+        if cached_answer is not None:
+            details.update(answer=cached_answer, source='cache')
+        else:
+            with span('retrieval'):
+                results = retrieve_context(index, question, intent)
+            details['chunks'] = [{'id': result.id, 'score': result.score, 'title': (result.metadata or {}).get('title')} for result in results or []]
+            
+            with span('prompt'):
+                request = assemble_rag_prompt(question, intent, results, profile_data, history)
+            if 'answer' in request:
+                details.update(answer=request['answer'], source='no_context')
+            else:
+                details['context_tokens'] = request['context_tokens']
+                route = select_generation_route(intent, request['context_tokens']['packed_tokens'])
+                details.update(route=route.name, model=route.model)
+                with span('generation'):
+                    response = generate_response_with_groq(groq_client, request['prompt'], request['personal_context'], route=route)
+                if cache_key and not response.startswith("❌"):
+                    caches.ANSWER_CACHE.set(cache_key, response)
+                details['answer'] = response
+    
+    except Exception as e:
+        details.update(answer=f"❌ Error during query: {str(e)}", source='error')
+    finally:
+        _current_trace.reset(trace_token)
+    
+    trace.attributes.update(intent=details['intent'], source=details['source'], chunks=len(details['chunks']))
+    details['timings_ms'] = trace.finish()
+    details['tokens'] = trace.tokens
+    return details
+
+def rag_query(index, groq_client, question, profile_data=None, use_cache=True, history=None):
+    """Enhanced RAG query using Upstash Vector + Groq with intent classification"""
+    return rag_query_detailed(index, groq_client, question, profile_data, use_cache, history)['answer']
+
+def rag_query_stream(index, groq_client, question, profile_data=None, use_cache=True, history=None, details=None):
+    """Streaming counterpart of rag_query: yields the answer piece by piece as Groq produces it.
+    
+    A details dict, if given, is filled with the intent and retrieved chunks as rag_query_detailed reports them,
+    plus an 'error' when the answer failed or was cut short (such answers are never cached).
+    """
+    details = {} if details is None else details
+    trace = RequestTrace('rag_query_stream')
+    trace_token = _current_trace.set(trace)
+    try:
+        with span('intent'):
+            intent = classify_query_intent(question)
+        trace.attributes['intent'] = intent
+        details.update(intent=intent, chunks=[])
+        logger.debug(f"🎯 Query intent classified as: {intent}")
+        
+        with span('cache'):
+            cache_key, cached_answer = _lookup_cached_answer(question, intent, profile_data, use_cache, history)
+        if cached_answer is not None:
+            trace.attributes['source'] = 'cache'
+            yield cached_answer
+            return
+        
+        with span('retrieval'):
+            results = retrieve_context(index, question, intent)
+        details['chunks'] = [{'id': result.id, 'score': result.score, 'title': (result.metadata or {}).get('title')} for result in results or []]
+        with span('prompt'):
+            request = assemble_rag_prompt(question, intent, results, profile_data, history)
+        if 'answer' in request:
+            trace.attributes['source'] = 'no_context'
+            yield request['answer']
+            return
+        
+        trace.attributes['source'] = 'rag'
+        route = select_generation_route(intent, request['context_tokens']['packed_tokens'])
+        parts = []
+        outcome = {}
+        with span('generation'):
+            for token in stream_response_with_groq(groq_client, request['prompt'], request['personal_context'], route=route, outcome=outcome):
+                parts.append(token)
+                yield token
+        
+        if 'error' in outcome:
+            trace.attributes['source'] = 'error'
+            details['error'] = outcome['error']
+            return
+        response = "".join(parts).strip()
+        if cache_key and response:
+            caches.ANSWER_CACHE.set(cache_key, response)
+    
+    except Exception as e:
+        trace.attributes['source'] = 'error'
+        details['error'] = str(e)
+        yield f"❌ Error during query: {str(e)}"
+    finally:
+        _current_trace.reset(trace_token)
+        trace.finish()
+
+async def async_rag_query(index, groq_client, question, profile_data=None, use_cache=True, history=None, details=None):
+    """Async counterpart of rag_query: the vector query and Groq call await instead of blocking,
+    so one event loop serves many questions concurrently.
+    
+    history and details work as in rag_query_detailed / rag_query_stream.
+    """
+    details = {} if details is None else details
+    trace = RequestTrace('async_rag_query')
+    trace_token = _current_trace.set(trace)
+    try:
+        with span('intent'):
+            intent = classify_query_intent(question)
+        trace.attributes['intent'] = intent
+        details.update(intent=intent, chunks=[])
+        
+        with span('cache'):
+            cache_key, cached_answer = _lookup_cached_answer(question, intent, profile_data, use_cache, history)
+        if cached_answer is not None:
+            trace.attributes['source'] = 'cache'
+            return cached_answer
+        
+        with span('retrieval'):
+            results = await async_retrieve_context(index, question, intent)
+        details['chunks'] = [{'id': result.id, 'score': result.score, 'title': (result.metadata or {}).get('title')} for result in results or []]
+        with span('prompt'):
+            request = assemble_rag_prompt(question, intent, results, profile_data, history)
+        if 'answer' in request:
+            trace.attributes['source'] = 'no_context'
+            return request['answer']
+        
+        trace.attributes['source'] = 'rag'
+        route = select_generation_route(intent, request['context_tokens']['packed_tokens'])
+        with span('generation'):
+            response = await async_generate_response_with_groq(groq_client, request['prompt'], request['personal_context'], route=route)
+        if cache_key and not response.startswith("❌"):
+            caches.ANSWER_CACHE.set(cache_key, response)
+        return response
+    
+    except Exception as e:
+        trace.attributes['source'] = 'error'
+        return f"❌ Error during query: {str(e)}"
+    finally:
+        _current_trace.reset(trace_token)
+        trace.finish()
+
+async def async_rag_query_many(index, groq_client, questions, profile_data=None, max_concurrency=None):
+    """Answer many questions on one event loop with at most max_concurrency in flight"""
+    if max_concurrency is None:
+        max_concurrency = config.ASYNC_MAX_CONCURRENCY
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def answer(question):
+        async with semaphore:
+            return await async_rag_query(index, groq_client, question, profile_data)
+    
+    return await asyncio.gather(*(answer(question) for question in questions))
+
+def answer_from_profile(question, profile_data=None):
+    """Answer special commands and structured single-fact questions (no index or LLM needed); None otherwise"""
+    started = time.perf_counter()
+    special_response = handle_special_commands(question, profile_data)
+    if special_response:
+        return {
+            'answer': special_response,
+            'intent': 'command',
+            'source': 'special',
+            'chunks': [],
+            'timings_ms': {'total': round((time.perf_counter() - started) * 1000, 3)}
+        }
+    structured = route_structured_question(question, profile_data)
+    if structured:
+        route, answer = structured
+        return {
+            'answer': answer,
+            'intent': route,
+            'source': 'structured',
+            'chunks': [],
+            'timings_ms': {'total': round((time.perf_counter() - started) * 1000, 3)}
+        }
+    return None
+
+def answer_question_detailed(index, groq_client, question, profile_data=None):
+    """Answer one question the way the CLI does: special commands first, then RAG"""
+    return answer_from_profile(question, profile_data) or rag_query_detailed(index, groq_client, question, profile_data)
+
+async def async_answer_in_session(index, groq_client, question, profile_data=None, session_id=None, store=None):
+    """Async counterpart of answer_in_session (returns the answer text)"""
+    store = conversation.CONVERSATIONS if store is None else store
+    profile_answer = answer_from_profile(question, profile_data)
+    if store is None or not session_id:
+        return profile_answer['answer'] if profile_answer else await async_rag_query(index, groq_client, question, profile_data)
+    
+    session = store.get(session_id)
+    standalone = session.rewrite(question)
+    details = profile_answer or {}
+    answer = details.get('answer') or await async_rag_query(index, groq_client, standalone, profile_data, history=session.history(), details=details)
+    store.record(session, question, standalone, answer, referent=top_chunk_title(details))
+    return answer
+
+def top_chunk_title(details):
+    """Title of the best retrieved chunk in rag_query_detailed/rag_query_stream details, if any"""
+    chunks = details.get('chunks') or [{}]
+    return chunks[0].get('title')
+
+def answer_in_session(index, groq_client, question, profile_data=None, session_id=None, store=None):
+    """answer_question_detailed with conversation memory: follow-ups are rewritten into
+    standalone retrieval queries and capped recent history is added to the prompt"""
+    store = conversation.CONVERSATIONS if store is None else store
+    if store is None or not session_id:
+        return answer_question_detailed(index, groq_client, question, profile_data)
+    
+    session = store.get(session_id)
+    standalone = session.rewrite(question)
+    details = answer_from_profile(question, profile_data) or rag_query_detailed(
+        index, groq_client, standalone, profile_data, history=session.history()
+    )
+    store.record(session, question, standalone, details['answer'], referent=top_chunk_title(details))
+    details.update(session=session_id, standalone_question=standalone)
+    return details
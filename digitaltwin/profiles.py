@@ -0,0 +1,148 @@
+"""The parsed profile: a reloading ProfileStore, content versions and per-profile memos"""
+
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+from . import config
+from .observability import logger
+
+class IdentityMemo:
+    """Small LRU of values derived from a profile, keyed by the profile object's identity.
+    
+    Sized for every loaded tenant (plus a few superseded versions) so tenants
+    don't evict each other's derived data on every request.
+    """
+    
+    def __init__(self, max_entries=None):
+        self.max_entries = config.TENANT_MAX_LOADED + 16 if max_entries is None else max_entries
+        self._entries = OrderedDict()  # id(obj) -> (obj, value)
+        self._lock = threading.Lock()
+    
+    def get(self, obj, compute):
+        key = id(obj)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is obj:
+                self._entries.move_to_end(key)
+                return entry[1]
+        value = compute(obj)
+        with self._lock:
+            self._entries[key] = (obj, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+class ProfileStore:
+    """Parsed profile shared by chunking, special commands and prompt building.
+    
+    The file is parsed once; reload() re-reads it only when its mtime/size changed
+    and swaps in the new parse only when its content hash changed. Readers take
+    `store.data` once per request, so a swap never mixes two versions mid-request.
+    """
+    
+    def __init__(self, path=None):
+        self.path = config.JSON_FILE if path is None else path
+        self._snapshot = (None, None)  # (profile_data, content digest)
+        self._stat = None  # (mtime_ns, size) of the last file read
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._watcher = None
+        self._stop = threading.Event()
+    
+    @property
+    def data(self):
+        profile_data = self._snapshot[0]
+        if profile_data is None:
+            self.reload()
+            profile_data = self._snapshot[0]
+        return profile_data
+    
+    @property
+    def version(self):
+        return get_profile_version(self.data)
+    
+    def reload(self):
+        """Re-read the file if it changed on disk; returns True when a new version was swapped in"""
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                print(f"❌ {self.path} not found!")
+                return False
+            file_stat = (stat.st_mtime_ns, stat.st_size)
+            if file_stat == self._stat and self._snapshot[0] is not None:
+                return False
+            
+            try:
+                with open(self.path, "rb") as f:
+                    raw = f.read()
+                digest = hashlib.sha256(raw).hexdigest()
+                if digest == self._snapshot[1]:
+                    self._stat = file_stat
+                    return False
+                profile_data = json.loads(raw.decode("utf-8"))
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                # Keep serving the last good version while the file is mid-edit
+                print(f"❌ Error parsing {self.path}: {str(e)}")
+                self._stat = file_stat
+                return False
+            
+            previous = self._snapshot[0]
+            self._snapshot = (profile_data, digest)
+            self._stat = file_stat
+            get_profile_version(profile_data)  # prime the memo outside the request path
+        
+        if previous is not None:
+            logger.info("Profile %s changed, now at version %s", self.path, get_profile_version(profile_data))
+            for listener in list(self._listeners):
+                try:
+                    listener(profile_data)
+                except Exception as e:
+                    logger.error("Profile change listener failed: %s", e)
+        return True
+    
+    def on_change(self, listener):
+        """Call listener(profile_data) from the watcher thread after each swap"""
+        self._listeners.append(listener)
+    
+    def start_watching(self, interval=None):
+        """Poll the file in a daemon thread; no-op if already watching or interval is 0"""
+        interval = config.PROFILE_WATCH_INTERVAL if interval is None else interval
+        if interval <= 0 or self._watcher is not None:
+            return
+        
+        def watch():
+            while not self._stop.wait(interval):
+                self.reload()
+        
+        self._stop.clear()
+        self._watcher = threading.Thread(target=watch, name="profile-watcher", daemon=True)
+        self._watcher.start()
+    
+    def stop_watching(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+PROFILE_STORE = ProfileStore()
+
+def load_profile_data():
+    """Load and parse the complete profile data (parsed once, shared via PROFILE_STORE)"""
+    return PROFILE_STORE.data
+
+_profile_version_memo = IdentityMemo()
+
+def get_profile_version(profile_data):
+    """Short content hash identifying this version of the profile"""
+    if not profile_data:
+        return 'none'
+    
+    def compute(profile_data):
+        payload = json.dumps(profile_data, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+    return _profile_version_memo.get(profile_data, compute)
@@ -0,0 +1,435 @@
+"""Retrieval: vector queries, BM25 hybrid search, the local chunk store and context packing"""
+
+import re
+import logging
+import asyncio
+import inspect
+import math
+
+from . import config, caches
+from .observability import logger, span
+from .upstream import async_call_upstream, call_upstream, configure_vector_client
+from .backends import LocalQueryResult, LocalVectorIndex, STOPWORDS
+from .chunking import iter_profile_chunks
+
+def build_metadata_filter(filter_by_type):
+    """Build an Upstash metadata filter matching chunks by type or category"""
+    value = filter_by_type.replace("'", "\\'")
+    return f"type = '{value}' OR category = '{value}'"
+
+def _matches_type(result, filter_by_type):
+    metadata = result.metadata or {}
+    return metadata.get('type') == filter_by_type or metadata.get('category') == filter_by_type
+
+_LEXICAL_WORD = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[.\-][a-z0-9+#]+)*")
+
+class BM25Index:
+    """In-memory BM25 inverted index over the same chunks the vector index holds"""
+    
+    def __init__(self, chunks=(), k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._docs = []  # (id, text, metadata)
+        self._lengths = []
+        self._terms = []  # distinct terms per doc
+        self._positions = {}  # id -> doc position
+        self._postings = {}  # term -> [(doc position, term frequency)]
+        for chunk in chunks:
+            self.add(*chunk)
+    
+    @staticmethod
+    def tokenize(text):
+        return [word for word in _LEXICAL_WORD.findall((text or "").lower()) if word not in STOPWORDS]
+    
+    def add(self, vector_id, text, metadata):
+        position = len(self._docs)
+        terms = self.tokenize(text)
+        self._docs.append((vector_id, text, metadata))
+        self._lengths.append(len(terms))
+        self._terms.append(frozenset(terms))
+        self._positions[vector_id] = position
+        frequencies = {}
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+        for term, frequency in frequencies.items():
+            self._postings.setdefault(term, []).append((position, frequency))
+    
+    def __len__(self):
+        return len(self._docs)
+    
+    def search(self, query_text, top_k=None, filter_by_type=None):
+        """Top-k chunks by BM25 score as LocalQueryResult objects (zero-score chunks are omitted)"""
+        if top_k is None:
+            top_k = config.RAG_TOP_K
+        if not self._docs:
+            return []
+        average_length = sum(self._lengths) / len(self._docs) or 1.0
+        scores = {}
+        for term in set(self.tokenize(query_text)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (len(self._docs) - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, frequency in postings:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[position] / average_length)
+                scores[position] = scores.get(position, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        
+        results = []
+        for position, score in sorted(scores.items(), key=lambda item: -item[1]):
+            vector_id, text, metadata = self._docs[position]
+            result = LocalQueryResult(id=vector_id, score=score, metadata=metadata, data=text)
+            if filter_by_type and not _matches_type(result, filter_by_type):
+                continue
+            results.append(result)
+            if len(results) >= top_k:
+                break
+        return results
+    
+    def is_decisive(self, query_text, results):
+        """True when the best lexical hit contains every indexed query term and clearly beats the runner-up.
+        
+        Terms that appear in no chunk ('tell', 'about') are ignored; a query like
+        'Random Forest' or 'What did you do at Newmont?' qualifies, a generic
+        'What are your Python skills?' (best hit lacks 'python') does not.
+        """
+        if not results or results[0].score < config.HYBRID_MIN_SCORE:
+            return False
+        known_terms = {term for term in self.tokenize(query_text) if term in self._postings}
+        if not known_terms <= self._terms[self._positions[results[0].id]]:
+            return False
+        return len(results) == 1 or results[0].score >= config.HYBRID_DECISIVE_RATIO * results[1].score
+
+LEXICAL_INDEX = None
+
+def build_lexical_index(profile_data):
+    """(Re)build LEXICAL_INDEX from the profile's chunks; a no-op when HYBRID_MODE is off"""
+    global LEXICAL_INDEX
+    if config.HYBRID_MODE == 'off' or not profile_data:
+        return None
+    LEXICAL_INDEX = BM25Index(iter_profile_chunks(profile_data))
+    return LEXICAL_INDEX
+
+class ChunkStore:
+    """Compact local chunk records (ID -> content, title, category, importance, ...).
+    
+    With CHUNK_STORE_ENABLED the vector index holds only embeddings plus the
+    filterable INDEX_METADATA_FIELDS; queries ask for IDs and scores only and
+    hydrate() attaches the full metadata from here.
+    """
+    
+    FIELDS = ('title', 'content', 'type', 'category', 'importance', 'tags', 'parent_id')
+    
+    def __init__(self, chunks=()):
+        self._records = {}
+        for vector_id, _, metadata in chunks:
+            self._records[vector_id] = {field: metadata[field] for field in self.FIELDS if field in metadata}
+    
+    def __len__(self):
+        return len(self._records)
+    
+    def get(self, vector_id):
+        return self._records.get(vector_id)
+    
+    def hydrate(self, results):
+        """Attach stored metadata to ID-only results; IDs the profile no longer has are dropped"""
+        hydrated = []
+        for result in results or []:
+            metadata = self._records.get(result.id)
+            if metadata is not None:
+                hydrated.append(LocalQueryResult(id=result.id, score=result.score, metadata=metadata))
+            elif result.metadata:
+                hydrated.append(result)
+            else:
+                logger.debug(f"🔍 Debug: Dropping stale vector {result.id} (not in the chunk store)")
+        return hydrated
+    
+    @staticmethod
+    def dehydrate(results):
+        """IDs and scores only, for the retrieval cache: hits are hydrated from the current store,
+        so edits to titles/tags (not part of the vector hash) or a store swapped by a reindex are never served stale"""
+        return [LocalQueryResult(id=result.id, score=result.score) for result in results]
+
+CHUNK_STORE = None
+
+def build_chunk_store(profile_data):
+    """(Re)build CHUNK_STORE from the profile's chunks; a no-op when CHUNK_STORE_ENABLED is off"""
+    global CHUNK_STORE
+    if not config.CHUNK_STORE_ENABLED or not profile_data:
+        return None
+    CHUNK_STORE = ChunkStore(iter_profile_chunks(profile_data))
+    return CHUNK_STORE
+
+def chunk_store_for(index):
+    """The chunk store paired with a vector index (tenants carry their own), else CHUNK_STORE"""
+    if not config.CHUNK_STORE_ENABLED:
+        return None
+    return getattr(index, 'chunk_store', None) or CHUNK_STORE
+
+def reciprocal_rank_fusion(result_lists, top_k=None, k=None):
+    """Merge ranked result lists by reciprocal rank; each result's score becomes its fused score"""
+    if top_k is None:
+        top_k = config.RAG_TOP_K
+    if k is None:
+        k = config.HYBRID_RRF_K
+    fused = {}
+    for results in result_lists:
+        for rank, result in enumerate(results or []):
+            entry = fused.get(result.id)
+            if entry is None:
+                entry = fused[result.id] = [0.0, result]
+            entry[0] += 1.0 / (k + rank + 1)
+    ranked = sorted(fused.values(), key=lambda entry: -entry[0])[:top_k]
+    return [
+        LocalQueryResult(id=result.id, score=score, metadata=result.metadata, data=getattr(result, 'data', None))
+        for score, result in ranked
+    ]
+
+def query_vectors(index, query_text, top_k=None, filter_by_type=None, filter_mode=None):
+    """Query the vector index for similar vectors, optionally restricted to one content type.
+    
+    filter_mode 'index' pushes the type filter into the query itself; 'overfetch'
+    widens top_k until enough matches are found and filters client-side.
+    """
+    if top_k is None:
+        top_k = config.RAG_TOP_K
+    if filter_mode is None:
+        filter_mode = config.RAG_FILTER_MODE
+    
+    # With a chunk store the index returns IDs and scores only; text is attached locally
+    chunk_store = chunk_store_for(index)
+    cache_key = None
+    if caches.RETRIEVAL_CACHE is not None:
+        cache_key = caches.RETRIEVAL_CACHE.make_key(index, query_text, top_k, filter_by_type, filter_mode)
+        cached_results = caches.RETRIEVAL_CACHE.get(cache_key)
+        if cached_results is not None:
+            logger.debug(f"🔍 Debug: Retrieval cache hit for query: '{query_text[:50]}...'")
+            return chunk_store.hydrate(cached_results) if chunk_store is not None else cached_results
+        
+    try:
+        def vector_query(**kwargs):
+            results = call_upstream('vector', index.query, hedge_after_ms=config.VECTOR_HEDGE_AFTER_MS, data=query_text, include_metadata=chunk_store is None, **kwargs)
+            return chunk_store.hydrate(results) if chunk_store is not None else results
+        
+        if not filter_by_type:
+            results = vector_query(top_k=top_k)
+        elif filter_mode == 'overfetch':
+            fetch_k = top_k * config.RAG_OVERFETCH_FACTOR
+            while True:
+                candidates = vector_query(top_k=fetch_k) or []
+                results = [r for r in candidates if _matches_type(r, filter_by_type)][:top_k]
+                # Stop once we have k matches or the index has nothing more to give
+                if len(results) >= top_k or len(candidates) < fetch_k or fetch_k >= config.RAG_OVERFETCH_MAX_K:
+                    break
+                fetch_k = min(fetch_k * 2, config.RAG_OVERFETCH_MAX_K)
+        else:
+            results = vector_query(top_k=top_k, filter=build_metadata_filter(filter_by_type))
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"🔍 Debug: Retrieved {len(results) if results else 0} vectors for query: '{query_text[:50]}...'")
+            if filter_by_type:
+                logger.debug(f"🔍 Debug: Filtered by type/category: {filter_by_type} ({filter_mode})")
+        
+        if cache_key is not None and results is not None:
+            caches.RETRIEVAL_CACHE.set(cache_key, ChunkStore.dehydrate(results) if chunk_store is not None else results)
+        return results
+    except Exception as e:
+        logger.error(f"❌ Error querying vectors: {str(e)}")
+        return None
+
+def lexical_index_for(index):
+    """The BM25 index paired with a vector index (tenants carry their own), else LEXICAL_INDEX"""
+    return getattr(index, 'lexical_index', None) or LEXICAL_INDEX
+
+def lexical_retrieve(question, filter_type, lexical_index=None):
+    """BM25 candidates for hybrid retrieval, or None when HYBRID_MODE is off"""
+    lexical_index = lexical_index or LEXICAL_INDEX
+    if config.HYBRID_MODE == 'off' or lexical_index is None:
+        return None
+    with span('retrieval_lexical'):
+        results = lexical_index.search(question, filter_by_type=filter_type)
+        if not results and filter_type:
+            results = lexical_index.search(question)
+    return results
+
+def retrieve_context(index, question, intent):
+    """Query the vector database for a classified question, falling back to an unfiltered search"""
+    # Step 2: Query vector database with optional filtering
+    filter_type = config.INTENT_FILTER_TYPES.get(intent)
+    
+    # Decisive keyword matches (company, tool or certification names) skip the network round trip
+    lexical_index = lexical_index_for(index)
+    lexical_results = lexical_retrieve(question, filter_type, lexical_index)
+    if config.HYBRID_MODE == 'local_first' and lexical_results and lexical_index.is_decisive(question, lexical_results):
+        logger.debug(f"📚 Answered retrieval from the local BM25 index ({lexical_results[0].id})")
+        return lexical_results
+    
+    with span('retrieval_filtered' if filter_type else 'retrieval_unfiltered'):
+        results = query_vectors(index, question, filter_by_type=filter_type)
+    
+    if not results or len(results) == 0:
+        # Fallback: try without filtering
+        if filter_type:
+            logger.debug("🔄 No filtered results found, trying broader search...")
+            with span('retrieval_fallback'):
+                results = query_vectors(index, question)
+    
+    if lexical_results:
+        results = reciprocal_rank_fusion([results, lexical_results])
+    return results
+
+IMPORTANCE_RANK = {'high': 0, 'medium': 1, 'low': 2}
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n+")
+_PACK_WORD = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+def estimate_tokens(text):
+    """Rough token count for English prompt text (~4 characters per token)"""
+    return (len(text) + 3) // 4
+
+def _sentence_words(text):
+    return frozenset(word for word in _PACK_WORD.findall(text.lower()) if word not in STOPWORDS)
+
+def pack_context(question, docs, token_budget=None, dedup_threshold=None):
+    """Fit retrieved docs into a token budget for the prompt.
+    
+    docs are dicts with title, content, importance and score. Docs are ordered by
+    importance then score; sentences that near-duplicate an earlier one (word-set
+    Jaccard >= dedup_threshold) are dropped; each doc keeps its lead sentence and
+    then the sentences sharing the most words with the question, until the budget
+    is spent. Returns (context, kept_docs, stats) where stats has the estimated
+    original_tokens, packed_tokens and saved_tokens.
+    """
+    token_budget = config.RAG_CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+    dedup_threshold = config.RAG_CONTEXT_DEDUP_THRESHOLD if dedup_threshold is None else dedup_threshold
+    original_tokens = estimate_tokens("\n\n".join(f"**{doc['title']}**\n{doc['content']}" for doc in docs))
+    
+    if token_budget <= 0:
+        context = "\n\n".join(f"**{doc['title']}**\n{doc['content']}" for doc in docs)
+        return context, list(docs), {'original_tokens': original_tokens, 'packed_tokens': original_tokens, 'saved_tokens': 0}
+    
+    ordered = sorted(docs, key=lambda doc: (IMPORTANCE_RANK.get(doc.get('importance'), 1), -(doc.get('score') or 0)))
+    question_words = _sentence_words(question)
+    
+    # Split into sentences, dropping near-duplicates of anything seen earlier
+    seen = []
+    candidates = []  # (relevance, doc position, sentence position, tokens)
+    doc_sentences = []
+    for doc_position, doc in enumerate(ordered):
+        sentences = []
+        for sentence in _SENTENCE_BREAK.split(doc['content']):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            words = _sentence_words(sentence)
+            if words and any(len(words & other) / len(words | other) >= dedup_threshold for other in seen):
+                continue
+            seen.append(words)
+            sentences.append(sentence)
+            candidates.append((len(words & question_words), doc_position, len(sentences) - 1, estimate_tokens(sentence) + 1))
+        doc_sentences.append(sentences)
+    
+    # Every doc's header and lead sentence first, best docs first, then the most relevant remaining sentences
+    remaining = token_budget
+    selected = [set() for _ in ordered]
+    for doc_position, doc in enumerate(ordered):
+        if not doc_sentences[doc_position]:
+            continue
+        lead_cost = estimate_tokens(f"**{doc['title']}**\n{doc_sentences[doc_position][0]}") + 2
+        if lead_cost > remaining:
+            continue
+        selected[doc_position].add(0)
+        remaining -= lead_cost
+    for relevance, doc_position, sentence_position, cost in sorted(candidates, key=lambda c: (-c[0], c[1], c[2])):
+        if sentence_position in selected[doc_position] or 0 not in selected[doc_position] or cost > remaining:
+            continue
+        selected[doc_position].add(sentence_position)
+        remaining -= cost
+    
+    kept_docs = []
+    blocks = []
+    for doc_position, doc in enumerate(ordered):
+        if not selected[doc_position]:
+            continue
+        kept = [sentence for position, sentence in enumerate(doc_sentences[doc_position]) if position in selected[doc_position]]
+        blocks.append(f"**{doc['title']}**\n{' '.join(kept)}")
+        kept_docs.append(doc)
+    context = "\n\n".join(blocks)
+    packed_tokens = estimate_tokens(context)
+    return context, kept_docs, {
+        'original_tokens': original_tokens,
+        'packed_tokens': packed_tokens,
+        'saved_tokens': max(0, original_tokens - packed_tokens)
+    }
+
+def context_token_budget(intent):
+    """Packing budget for an intent. Simple intents are packed to MODEL_SIMPLE_MAX_CONTEXT_TOKENS,
+    so the fast-model route is reachable whenever the intent qualifies, not only when little was retrieved"""
+    if config.MODEL_CASCADE_ENABLED and intent in config.MODEL_SIMPLE_INTENTS and config.RAG_CONTEXT_TOKEN_BUDGET > 0:
+        return min(config.RAG_CONTEXT_TOKEN_BUDGET, config.MODEL_SIMPLE_MAX_CONTEXT_TOKENS)
+    return config.RAG_CONTEXT_TOKEN_BUDGET
+
+def setup_async_vector_index():
+    """Vector index for the async pipeline: upstash AsyncIndex, or the local backend run in threads"""
+    if config.VECTOR_BACKEND == 'local':
+        return LocalVectorIndex.from_env()
+    from upstash_vector import AsyncIndex
+    return configure_vector_client(AsyncIndex.from_env(retries=0), asynchronous=True)
+
+async def async_query_vectors(index, query_text, top_k=None, filter_by_type=None, filter_mode=None):
+    """Async counterpart of query_vectors; sync indexes are queried in a worker thread"""
+    if not inspect.iscoroutinefunction(getattr(index, 'query', None)):
+        return await asyncio.to_thread(query_vectors, index, query_text, top_k, filter_by_type, filter_mode)
+    
+    if top_k is None:
+        top_k = config.RAG_TOP_K
+    if filter_mode is None:
+        filter_mode = config.RAG_FILTER_MODE
+    
+    chunk_store = chunk_store_for(index)
+    cache_key = None
+    if caches.RETRIEVAL_CACHE is not None:
+        cache_key = caches.RETRIEVAL_CACHE.make_key(index, query_text, top_k, filter_by_type, filter_mode)
+        cached_results = caches.RETRIEVAL_CACHE.get(cache_key)
+        if cached_results is not None:
+            return chunk_store.hydrate(cached_results) if chunk_store is not None else cached_results
+    
+    try:
+        async def vector_query(**kwargs):
+            results = await async_call_upstream('vector', index.query, timeout=config.UPSTREAM_VECTOR_TIMEOUT, hedge_after_ms=config.VECTOR_HEDGE_AFTER_MS, data=query_text, include_metadata=chunk_store is None, **kwargs)
+            return chunk_store.hydrate(results) if chunk_store is not None else results
+        
+        if not filter_by_type:
+            results = await vector_query(top_k=top_k)
+        elif filter_mode == 'overfetch':
+            fetch_k = top_k * config.RAG_OVERFETCH_FACTOR
+            while True:
+                candidates = await vector_query(top_k=fetch_k) or []
+                results = [r for r in candidates if _matches_type(r, filter_by_type)][:top_k]
+                if len(results) >= top_k or len(candidates) < fetch_k or fetch_k >= config.RAG_OVERFETCH_MAX_K:
+                    break
+                fetch_k = min(fetch_k * 2, config.RAG_OVERFETCH_MAX_K)
+        else:
+            results = await vector_query(top_k=top_k, filter=build_metadata_filter(filter_by_type))
+        
+        if cache_key is not None and results is not None:
+            caches.RETRIEVAL_CACHE.set(cache_key, ChunkStore.dehydrate(results) if chunk_store is not None else results)
+        return results
+    except Exception as e:
+        logger.error(f"❌ Error querying vectors: {str(e)}")
+        return None
+
+async def async_retrieve_context(index, question, intent):
+    """Async counterpart of retrieve_context"""
+    filter_type = config.INTENT_FILTER_TYPES.get(intent)
+    lexical_index = lexical_index_for(index)
+    lexical_results = lexical_retrieve(question, filter_type, lexical_index)
+    if config.HYBRID_MODE == 'local_first' and lexical_results and lexical_index.is_decisive(question, lexical_results):
+        return lexical_results
+    with span('retrieval_filtered' if filter_type else 'retrieval_unfiltered'):
+        results = await async_query_vectors(index, question, filter_by_type=filter_type)
+    if not results and filter_type:
+        with span('retrieval_fallback'):
+            results = await async_query_vectors(index, question)
+    if lexical_results:
+        results = reciprocal_rank_fusion([results, lexical_results])
+    return results
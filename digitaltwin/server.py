@@ -0,0 +1,344 @@
+"""HTTP serving: /ask with single-flight coalescing, health and readiness, /metrics, concurrent startup"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from urllib.parse import urlparse, parse_qs
+
+from . import config, caches, conversation
+from .observability import logger, STAGE_METRICS
+from .upstream import render_upstream_prometheus
+from .profiles import get_profile_version, PROFILE_STORE
+from .caches import normalize_question
+from .indexing import reindex_profile, setup_vector_database
+from .tenants import TenantRegistry
+from .generation import ROUTE_STATS
+from .pipeline import answer_from_profile, answer_in_session, answer_question_detailed, prewarm_answer_cache
+
+def start_metrics_server(port=None):
+    """Serve STAGE_METRICS as Prometheus text on http://0.0.0.0:<port>/metrics in a daemon thread"""
+    port = config.METRICS_PORT if port is None else port
+    
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+            body = (STAGE_METRICS.render_prometheus() + render_upstream_prometheus() + ROUTE_STATS.render_prometheus()).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer(('0.0.0.0', port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"📈 Metrics available at http://localhost:{port}/metrics")
+    return server
+
+class StartupComponents:
+    """Initialize independent startup components concurrently and report readiness per component"""
+    
+    def __init__(self, max_workers=4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='startup')
+        self._futures = {}  # name -> Future of the component's value
+        self._elapsed_ms = {}
+        self._lock = threading.Lock()
+    
+    def start(self, name, func, *args, **kwargs):
+        started = time.perf_counter()
+        
+        def initialize():
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._elapsed_ms[name] = round((time.perf_counter() - started) * 1000, 1)
+        
+        future = self._futures[name] = self._executor.submit(initialize)
+        return future
+    
+    def result(self, name, timeout=None):
+        """The component's value, waiting for it if needed; None if it failed to initialize"""
+        try:
+            return self._futures[name].result(timeout)
+        except FutureTimeoutError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Startup of {name} failed: {str(e)}")
+            return None
+    
+    def is_done(self, name):
+        return self._futures[name].done()
+    
+    def on_ready(self, name, callback):
+        """Call callback(value) on a background thread once the component has initialized (value is None on failure)"""
+        self._futures[name].add_done_callback(lambda future: self._executor.submit(callback, self.result(name)))
+    
+    def status(self):
+        """{component: {'state': 'loading' | 'ready' | 'failed', 'ms': initialization time}}"""
+        with self._lock:
+            elapsed_ms = dict(self._elapsed_ms)
+        status = {}
+        for name, future in self._futures.items():
+            if not future.done():
+                state = 'loading'
+            elif future.exception() is None and future.result():
+                state = 'ready'
+            else:
+                state = 'failed'
+            status[name] = {'state': state, 'ms': elapsed_ms.get(name)}
+        return status
+    
+    def describe(self):
+        return ", ".join(f"{name} {info['state']}" + (f" ({info['ms']:.0f}ms)" if info['ms'] is not None else "") for name, info in self.status().items())
+
+def start_index_services(index, groq_client, profile_data):
+    """Once the index is ready: reindex on profile edits and pre-warm the answer cache (call off the request path)"""
+    # Pick up profile edits without a restart: swap in the new parse, reindex in the background
+    PROFILE_STORE.on_change(lambda updated_profile: reindex_profile(index, updated_profile))
+    PROFILE_STORE.start_watching()
+    if caches.ANSWER_CACHE is not None and config.ANSWER_CACHE_PREWARM:
+        warmed = prewarm_answer_cache(index, groq_client, profile_data)
+        logger.debug(f"🔥 Answer cache warm ({warmed} new answers generated)")
+
+class SingleFlight:
+    """Coalesce identical concurrent calls: the first caller starts the work, later ones share its future"""
+    
+    def __init__(self):
+        self._calls = {}  # key -> in-flight Future
+        self._lock = threading.Lock()
+        self.counters = {'leader': 0, 'coalesced': 0}
+    
+    def submit(self, key, executor, func, *args):
+        """(future, coalesced) for key; func only runs on executor if no identical call is in flight"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.counters['coalesced'] += 1
+                return future, True
+            future = executor.submit(func, *args)
+            self._calls[key] = future
+            self.counters['leader'] += 1
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future, False
+    
+    def _forget(self, key, future):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+    
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+class DigitalTwinServer:
+    """Answers /ask requests on a bounded worker pool, sharing one answer between identical concurrent questions"""
+    
+    def __init__(self, groq_client, workers=None, request_timeout=None, registry=None, profile_store=None, startup=None):
+        self.groq_client = groq_client
+        self.startup = startup
+        self.registry = registry
+        self.profile_store = profile_store or PROFILE_STORE
+        self.request_timeout = config.SERVE_REQUEST_TIMEOUT if request_timeout is None else request_timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers or config.SERVE_WORKERS, thread_name_prefix='serve')
+        self.flights = SingleFlight()
+        self.index = None
+        self.ready = threading.Event()
+        self.setup_error = None
+    
+    def mark_ready(self, index):
+        self.index = index
+        self.ready.set()
+    
+    def ask(self, question, tenant_id=None, session_id=None):
+        """Answer one question; returns (HTTP status, JSON-serializable body).
+        
+        With session_id (and CONVERSATION_MEMORY_ENABLED) follow-ups are answered in the context of
+        that session's earlier turns; session IDs are scoped per tenant.
+        """
+        for name, value in (('question', question), ('tenant', tenant_id), ('session', session_id)):
+            if value is not None and not isinstance(value, str):
+                return 400, {'error': f"'{name}' must be a string"}
+        question = (question or '').strip()
+        if not question:
+            return 400, {'error': "Missing 'question'"}
+        deadline = time.monotonic() + self.request_timeout
+        if not self.ready.is_set():
+            # Special commands and single-fact questions only need the profile
+            details = None if tenant_id else answer_from_profile(question, self.profile_store.data)
+            if details is None:
+                return 503, {'error': self.setup_error or "Vector index is still loading"}
+            return 200, {'question': question, 'status': 'ok', 'coalesced': False, **details}
+        
+        if tenant_id:
+            if self.registry is None:
+                return 400, {'error': "Tenants are not enabled (set TENANT_PROFILE_DIR)"}
+            # A first request loads (and syncs) the tenant: do that on the worker pool, within the request timeout
+            try:
+                tenant = self.executor.submit(self.registry.get, tenant_id).result(timeout=self.request_timeout)
+            except FutureTimeoutError:
+                return 504, {'error': f"Tenant {tenant_id} not loaded within {self.request_timeout:g}s"}
+            except ValueError as e:
+                return 400, {'error': str(e)}
+            except KeyError as e:
+                return 404, {'error': str(e).strip("'")}
+            index, profile_data = tenant.index, tenant.profile_data
+        else:
+            index, profile_data = self.index, self.profile_store.data
+        
+        if session_id and conversation.CONVERSATIONS is not None:
+            # Answers depend on the session's history, so only identical requests within one session coalesce
+            try:
+                conversation.CONVERSATIONS.get(f"{tenant_id or ''}/{session_id}")
+            except ValueError as e:
+                return 400, {'error': str(e)}
+            key = (tenant_id or '', get_profile_version(profile_data), normalize_question(question), session_id)
+            future, coalesced = self.flights.submit(
+                key, self.executor, answer_in_session, index, self.groq_client, question, profile_data, f"{tenant_id or ''}/{session_id}"
+            )
+        else:
+            # Same tenant, same profile version and same normalized wording -> same answer
+            key = (tenant_id or '', get_profile_version(profile_data), normalize_question(question))
+            future, coalesced = self.flights.submit(key, self.executor, answer_question_detailed, index, self.groq_client, question, profile_data)
+        try:
+            details = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            return 504, {'error': f"No answer within {self.request_timeout:g}s"}
+        except Exception as e:
+            logger.error(f"❌ Error answering {question!r}: {str(e)}")
+            return 500, {'error': str(e)}
+        status = 'error' if details['source'] == 'error' or (details['answer'] or '').startswith("❌") else 'ok'
+        return 200, {'question': question, 'status': status, 'coalesced': coalesced, **({'tenant': tenant_id} if tenant_id else {}), **details}
+    
+    def render_prometheus(self):
+        lines = [
+            "# HELP digitaltwin_ready Whether the vector index is set up and /ask is served",
+            "# TYPE digitaltwin_ready gauge",
+            f"digitaltwin_ready {1 if self.ready.is_set() else 0}",
+            "# HELP digitaltwin_singleflight_total /ask requests that started an answer (leader) or shared one in flight (coalesced)",
+            "# TYPE digitaltwin_singleflight_total counter"
+        ]
+        for result, count in self.flights.counters.items():
+            lines.append(f'digitaltwin_singleflight_total{{result="{result}"}} {count}')
+        lines.append("# TYPE digitaltwin_singleflight_in_flight gauge")
+        lines.append(f"digitaltwin_singleflight_in_flight {self.flights.in_flight()}")
+        if conversation.CONVERSATIONS is not None:
+            conversation_stats = conversation.CONVERSATIONS.stats()
+            lines.append("# TYPE digitaltwin_conversation_sessions gauge")
+            lines.append(f"digitaltwin_conversation_sessions {conversation_stats['sessions']}")
+            lines.append("# TYPE digitaltwin_conversation_bytes gauge")
+            lines.append(f"digitaltwin_conversation_bytes {conversation_stats['approx_bytes']}")
+            lines.append("# TYPE digitaltwin_conversation_total counter")
+            for event in ('created', 'evicted', 'rewritten'):
+                lines.append(f'digitaltwin_conversation_total{{event="{event}"}} {conversation_stats[event]}')
+        return "\n".join(lines) + "\n"
+    
+    def make_handler(self):
+        server = self
+        
+        class AskHandler(BaseHTTPRequestHandler):
+            MAX_BODY_BYTES = 64 * 1024
+            
+            def send_json(self, status, body):
+                payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                if status == 503:
+                    self.send_header('Retry-After', '1')
+                self.end_headers()
+                self.wfile.write(payload)
+            
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == '/healthz':
+                    self.send_json(200, {'status': 'ok'})
+                elif url.path == '/readyz':
+                    components = server.startup.status() if server.startup else {}
+                    if server.ready.is_set():
+                        self.send_json(200, {'status': 'ready', 'components': components})
+                    else:
+                        self.send_json(503, {'status': 'error' if server.setup_error else 'loading', 'error': server.setup_error, 'components': components})
+                elif url.path == '/metrics':
+                    body = (STAGE_METRICS.render_prometheus() + render_upstream_prometheus() + ROUTE_STATS.render_prometheus() + server.render_prometheus()).encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                elif url.path == '/ask':
+                    params = parse_qs(url.query)
+                    self.send_json(*server.ask(params.get('question', [''])[0], params.get('tenant', [None])[0], params.get('session', [None])[0]))
+                else:
+                    self.send_json(404, {'error': f"Not found: {url.path}"})
+            
+            def do_POST(self):
+                if urlparse(self.path).path != '/ask':
+                    self.send_json(404, {'error': f"Not found: {self.path}"})
+                    return
+                try:
+                    length = int(self.headers.get('Content-Length') or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    self.send_json(400, {'error': "Invalid Content-Length"})
+                    return
+                if length > self.MAX_BODY_BYTES:
+                    self.send_json(413, {'error': "Request body too large"})
+                    return
+                try:
+                    body = json.loads(self.rfile.read(length) or b'{}')
+                except json.JSONDecodeError:
+                    self.send_json(400, {'error': "Body must be JSON"})
+                    return
+                if not isinstance(body, dict):
+                    body = {'question': body}
+                self.send_json(*server.ask(body.get('question'), body.get('tenant'), body.get('session')))
+            
+            def log_message(self, format, *args):
+                logger.debug("🌐 %s - %s", self.address_string(), format % args)
+        
+        return AskHandler
+
+def serve_http(groq_client, profile_data, port=None, workers=None, force_reload=False, startup=None):
+    """Serve /ask, /healthz, /readyz and /metrics over HTTP until interrupted.
+    
+    The listener starts at once; the vector index is set up in the background (or
+    taken from startup's 'vector_index' component) and /readyz returns 503 until it
+    is ready. Until then /ask answers only special commands and single-fact questions.
+    """
+    port = config.SERVE_PORT if port is None else port
+    if startup is None:
+        startup = StartupComponents()
+        startup.start('vector_index', setup_vector_database, force_reload=force_reload, profile_data=profile_data)
+    registry = TenantRegistry() if config.TENANT_PROFILE_DIR else None
+    server = DigitalTwinServer(groq_client, workers=workers, registry=registry, startup=startup)
+    httpd = ThreadingHTTPServer(('0.0.0.0', port), server.make_handler())
+    httpd.daemon_threads = True
+    
+    def on_index_ready(index):
+        if not index:
+            server.setup_error = "Vector database setup failed"
+            return
+        if registry is not None:
+            registry.base_index = index
+        server.mark_ready(index)
+        print("✅ Ready: /ask is being served")
+        start_index_services(index, groq_client, profile_data)
+    
+    startup.on_ready('vector_index', on_index_ready)
+    print(f"🌐 Serving on http://localhost:{port} (POST /ask, GET /healthz, /readyz, /metrics)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("👋 Shutting down")
+    finally:
+        httpd.server_close()
+        server.executor.shutdown(wait=False)
+    return server
@@ -0,0 +1,263 @@
+"""Answers straight from the profile: special commands and single-fact questions"""
+
+import re
+
+from . import config
+from .observability import logger
+from .profiles import IdentityMemo
+
+def get_profile_summary(profile_data):
+    """Generate a comprehensive profile summary from structured data"""
+    if not profile_data:
+        return "Profile data not available."
+    
+    summary_parts = []
+    
+    # Personal info
+    personal = profile_data.get('personal', {})
+    if personal:
+        summary_parts.append(f"👤 **{personal.get('name', 'Unknown')}** - {personal.get('title', '')}")
+        summary_parts.append(f"📍 **Location:** {personal.get('location', '')}")
+        if personal.get('summary'):
+            summary_parts.append(f"📝 **Summary:** {personal.get('summary')}")
+        if personal.get('elevator_pitch'):
+            summary_parts.append(f"🎯 **Elevator Pitch:** {personal.get('elevator_pitch')}")
+    
+    # Recent experience
+    experiences = profile_data.get('experience', [])
+    if experiences:
+        recent_exp = experiences[0]  # Most recent
+        summary_parts.append(f"💼 **Current Role:** {recent_exp.get('title', '')} at {recent_exp.get('company', '')} ({recent_exp.get('duration', '')})")
+    
+    # Key skills with proficiency levels
+    skills = profile_data.get('skills', {})
+    tech_skills = skills.get('technical', {})
+    if tech_skills:
+        prog_langs = tech_skills.get('programming_languages', [])
+        if prog_langs:
+            langs = [f"{lang['language']} ({lang.get('proficiency_1to5', 'N/A')}/5)" for lang in prog_langs[:3]]
+            summary_parts.append(f"🛠️ **Key Skills:** {', '.join(langs)}")
+        
+        # AI/ML capabilities
+        ai_ml = tech_skills.get('ai_ml', [])
+        if ai_ml:
+            summary_parts.append(f"🤖 **AI/ML:** {', '.join(ai_ml[:3])}")
+    
+    # Education
+    education = profile_data.get('education', {})
+    degrees = education.get('degrees', [])
+    if degrees:
+        current_degree = degrees[0]  # Most recent
+        summary_parts.append(f"🎓 **Education:** {current_degree.get('program', '')} - {current_degree.get('institution', '')} ({current_degree.get('timeline', '')})")
+    
+    # Key achievements
+    quantifications = profile_data.get('quantification_examples', [])
+    if quantifications:
+        summary_parts.append(f"📊 **Key Achievements:** {quantifications[0]}")  # First achievement
+    
+    # Salary expectations
+    salary_location = profile_data.get('salary_location', {})
+    if salary_location and salary_location.get('salary_expectations'):
+        summary_parts.append(f"💰 **Salary Expectations:** {salary_location.get('salary_expectations')}")
+    
+    return "\\n".join(summary_parts)
+
+def get_contact_info(profile_data):
+    """Extract contact information"""
+    if not profile_data:
+        return "Contact information not available."
+    
+    personal = profile_data.get('personal', {})
+    contact = personal.get('contact', {})
+    
+    if not contact:
+        return "Contact information not available."
+    
+    contact_parts = []
+    if contact.get('email'):
+        contact_parts.append(f"📧 **Email:** {contact['email']}")
+    if contact.get('phone'):
+        contact_parts.append(f"📱 **Phone:** {contact['phone']}")
+    if contact.get('linkedin'):
+        contact_parts.append(f"💼 **LinkedIn:** {contact['linkedin']}")
+    if contact.get('github'):
+        contact_parts.append(f"💻 **GitHub:** {contact['github']}")
+    
+    return "\\n".join(contact_parts)
+
+def handle_special_commands(question, profile_data):
+    """Handle special commands like 'summary', 'contact', etc."""
+    question_lower = question.lower().strip()
+    
+    if question_lower in ['summary', 'overview', 'profile summary']:
+        return get_profile_summary(profile_data)
+    elif question_lower in ['contact', 'contact info', 'contact information']:
+        return get_contact_info(profile_data)
+    elif question_lower in ['help', 'commands']:
+        return """Available commands:
+• **summary** - Get comprehensive profile overview
+• **contact** - Get contact information  
+• **help** - Show this help message
+
+Or ask natural questions about:
+• **Work experience** - AUSBIZ, Newmont, De Rigglets roles with STAR format achievements
+• **Technical skills** - Python, SQL, JavaScript with proficiency levels and years of experience  
+• **AI/ML projects** - Food RAG system, vector databases, LLM integration
+• **Machine Learning** - Insurance premium pricing (regression), credit risk classification, model evaluation, governance
+• **Portfolio** - Tableau dashboards, trade analytics, tennis analytics with KPIs
+• **Education** - MSc Business Analytics (UTS), BSc Administration (Ghana), ACCA progress
+• **Quantified achievements** - Specific metrics like time savings, delivery rates, improvements
+• **Leadership examples** - Team coordination, project management, stakeholder communication
+• **Salary & location** - Expectations, work authorization, remote experience, relocation
+• **Career goals** - Future aspirations, learning objectives, industry interests
+
+💡 **Enhanced Features:**
+- Answers use STAR format for experiences and projects
+- Includes specific proficiency levels and quantified outcomes
+- Covers interview performance insights and improvement areas"""
+    
+    return None
+
+# Structured fact questions answered straight from the profile. A question is
+# routed only when exactly one route matches and nothing in it asks for narrative.
+STRUCTURED_ROUTES = [
+    ('email', re.compile(r"\b(e-?mail|email address)\b")),
+    ('phone', re.compile(r"\b(phone|mobile|cell) ?(number)?\b")),
+    ('linkedin', re.compile(r"\blinked ?in\b")),
+    ('github', re.compile(r"\bgit ?hub\b")),
+    ('location', re.compile(r"\b(where are you (based|located|from)|where do you live|your (current )?location)\b")),
+    ('relocation', re.compile(r"\b(relocat\w*|willing to move|open to moving)\b")),
+    ('work_authorization', re.compile(r"\b(visa|work(ing)? (rights|authori[sz]ation|permit)|sponsor\w*|authori[sz]ed to work)\b")),
+    ('salary', re.compile(r"\b(salary|remuneration|compensation|pay expectations?|expected pay)\b")),
+    ('remote', re.compile(r"\b(remote|hybrid|work from home|wfh)\b")),
+    ('gpa', re.compile(r"\b(gpa|grade point average|grades)\b")),
+    ('proficiency', re.compile(r"\b(proficien\w*|skill level|rate yourself|how (good|strong) (are you|is your)|how many years|years of experience)\b")),
+    ('degrees', re.compile(r"\b(what|which) (degrees?|qualifications?|certifications?)\b|\bwhat did you study\b|\bwhere did you study\b"))
+]
+
+# Words that signal a question wants narrative (handled by RAG), not a single fact
+STRUCTURED_DISQUALIFIERS = re.compile(r"\b(project|projects|describe|explain|why|example|examples|tell me about|story|compare|achievements?|star|skills|experience at|role at)\b")
+STRUCTURED_MAX_WORDS = 14
+
+# The salary route answers the expectation; past pay or pay at a named employer is a RAG question
+SALARY_DISQUALIFIERS = re.compile(r"\b(did|was|were|had|earned|previous|past|last|former|current)\b|\bat [a-z]")
+
+# "GPA at <somewhere>" naming no institution in the profile falls through to RAG
+GPA_OTHER_INSTITUTION = re.compile(r"\b(at|from) (the )?(?!(my|your|university|uni|college|school|undergrad\w*)\b)[a-z]")
+_GENERIC_INSTITUTION_WORDS = {'university', 'college', 'institute', 'school', 'technology'}
+
+_structured_facts_memo = IdentityMemo()
+
+def build_structured_facts(profile_data):
+    """Precompute the templated answers for every structured route (memoized per profile object)"""
+    return _structured_facts_memo.get(profile_data, _compute_structured_facts)
+
+def _compute_structured_facts(profile_data):
+    personal = profile_data.get('personal', {})
+    contact = personal.get('contact', {})
+    salary_location = profile_data.get('salary_location', {})
+    languages = profile_data.get('skills', {}).get('technical', {}).get('programming_languages', [])
+    degrees = profile_data.get('education', {}).get('degrees', [])
+    qualifications = profile_data.get('education', {}).get('qualifications', [])
+    
+    answers = {}
+    if contact.get('email'):
+        answers['email'] = f"You can email me at {contact['email']}."
+    if contact.get('phone'):
+        answers['phone'] = f"You can reach me by phone on {contact['phone']}."
+    if contact.get('linkedin'):
+        answers['linkedin'] = f"My LinkedIn profile is {contact['linkedin']}."
+    if contact.get('github'):
+        answers['github'] = f"My GitHub is {contact['github']}."
+    if personal.get('location'):
+        answers['location'] = f"I'm based in {personal['location']}."
+    if 'relocation_willing' in salary_location:
+        preferences = ', '.join(salary_location.get('location_preferences', []))
+        answers['relocation'] = ("Yes, I'm willing to relocate." if salary_location['relocation_willing'] else "I'm not looking to relocate.") + (f" My location preferences are: {preferences}." if preferences else "")
+    if salary_location.get('work_authorization'):
+        answers['work_authorization'] = f"My work authorization: {salary_location['work_authorization']}."
+    if salary_location.get('salary_expectations'):
+        answers['salary'] = f"My salary expectation is {salary_location['salary_expectations']}."
+    if salary_location.get('location_preferences'):
+        answers['remote'] = f"I'm open to these work arrangements: {', '.join(salary_location['location_preferences'])}."
+        if salary_location.get('remote_experience'):
+            answers['remote'] += f" {salary_location['remote_experience']}."
+    
+    language_answers = {
+        lang['language'].lower(): f"My {lang['language']} proficiency is {lang.get('proficiency_1to5', 'N/A')}/5, with {lang.get('years', 0)} year{'s' if lang.get('years', 0) != 1 else ''} of experience ({lang.get('version', 'N/A')})"
+        for lang in languages if lang.get('language')
+    }
+    if language_answers:
+        answers['proficiency'] = " ".join(f"{answer}." for answer in language_answers.values())
+    
+    # (names the institution goes by, GPA answer or None when no GPA is on file)
+    institutions = [
+        (_institution_names(degree['institution']),
+         f"I graduated from the {degree.get('program', '')} at {degree['institution']} with a GPA of {degree['gpa']}." if degree.get('gpa') else None)
+        for degree in degrees if degree.get('institution')
+    ]
+    gpa_answers = [answer for _, answer in institutions if answer]
+    if gpa_answers:
+        answers['gpa'] = " ".join(gpa_answers)
+    if degrees or qualifications:
+        studies = [f"{degree.get('program', '')} at {degree.get('institution', '')} ({degree.get('timeline', '')})" for degree in degrees]
+        answers['degrees'] = "My education: " + "; ".join(studies + qualifications) + "."
+    
+    facts = {
+        'answers': answers,
+        'languages': language_answers,
+        'language_pattern': re.compile(r"\b(" + "|".join(re.escape(name) for name in sorted(language_answers, key=len, reverse=True)) + r")\b") if language_answers else None,
+        'institutions': institutions
+    }
+    return facts
+
+def _institution_names(institution):
+    """Words that name an institution in a question: its distinctive words and its acronym ("uts")"""
+    words = re.findall(r"[a-z]+", institution.lower())
+    names = {word for word in words if len(word) > 3 and word not in _GENERIC_INSTITUTION_WORDS}
+    acronym = "".join(word[0] for word in words if word not in ('of', 'and', 'the', 'for'))
+    if len(acronym) >= 3:
+        names.add(acronym)
+    return names
+
+def route_structured_question(question, profile_data):
+    """Answer a single-fact question (email, GPA, relocation, proficiency, ...) from the profile.
+    
+    Returns (route, answer), or None when the question is not confidently a
+    structured lookup and should go through rag_query.
+    """
+    if not config.STRUCTURED_ROUTER_ENABLED or not profile_data:
+        return None
+    question_lower = question.lower()
+    if len(question_lower.split()) > STRUCTURED_MAX_WORDS or STRUCTURED_DISQUALIFIERS.search(question_lower):
+        return None
+    
+    matched = [route for route, pattern in STRUCTURED_ROUTES if pattern.search(question_lower)]
+    facts = build_structured_facts(profile_data)
+    if len(matched) != 1 or matched[0] not in facts['answers']:
+        return None
+    route = matched[0]
+    
+    if route == 'proficiency' and facts['language_pattern'] is not None:
+        asked = list(dict.fromkeys(facts['language_pattern'].findall(question_lower)))
+        if asked:
+            return route, " ".join(f"{facts['languages'][name]}." for name in asked)
+        # Without a listed language, only an explicit programming-proficiency question is structured
+        # ("proficiency in Tableau" or "years of experience" overall need the RAG context)
+        if not re.search(r"\bprogramming\b", question_lower) and (re.search(r"\b(in|with|at) [a-z]", question_lower) or 'proficien' not in question_lower):
+            return None
+    if route == 'salary' and SALARY_DISQUALIFIERS.search(question_lower):
+        return None
+    if route == 'gpa':
+        question_words = set(re.findall(r"[a-z]+", question_lower))
+        named = [answer for names, answer in facts['institutions'] if names & question_words]
+        if named:
+            # Only answer for the institutions asked about, and only if they have a GPA on file
+            if not all(named):
+                return None
+            return route, " ".join(named)
+        if GPA_OTHER_INSTITUTION.search(question_lower):
+            return None
+    
+    logger.debug(f"🧭 Routed to structured answer: {route}")
+    return route, facts['answers'][route]
@@ -0,0 +1,181 @@
+"""Serving many profiles from one process: a bounded, lazily loading tenant registry"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from . import config
+from .observability import logger
+from .profiles import ProfileStore
+from .backends import create_embedder, create_vector_index, LocalVectorIndex, NamespacedIndex
+from .chunking import iter_profile_chunks
+from .retrieval import BM25Index, ChunkStore
+from .indexing import reindex_profile, sync_vectors
+
+class Tenant:
+    """One loaded digital twin: its profile store and its tenant-scoped vector and BM25 indexes"""
+    
+    def __init__(self, tenant_id, store, index, manifest_path, approx_bytes):
+        self.tenant_id = tenant_id
+        self.store = store
+        self.index = index
+        self.manifest_path = manifest_path
+        self.approx_bytes = approx_bytes
+        self.last_used = time.monotonic()
+        self.last_checked = self.last_used
+    
+    @property
+    def profile_data(self):
+        return self.store.data
+
+class TenantRegistry:
+    """Lazily loaded tenants sharing one pooled vector index and Groq client.
+    
+    A tenant is `<profile_dir>/<tenant_id>.json`. It is loaded (and its namespace
+    synced incrementally) on first use, re-checked for profile edits at most every
+    PROFILE_WATCH_INTERVAL seconds, and unloaded when idle for idle_seconds or when
+    max_loaded / max_bytes would be exceeded (least recently used first). Idle tenants
+    are swept from get() at most every sweep_interval seconds, so they are unloaded
+    even when no new tenant is.
+    """
+    
+    _TENANT_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+    
+    def __init__(self, profile_dir=None, base_index=None, max_loaded=None, idle_seconds=None, max_bytes=None, sweep_interval=None):
+        self.profile_dir = profile_dir or config.TENANT_PROFILE_DIR
+        self.base_index = base_index
+        self.max_loaded = config.TENANT_MAX_LOADED if max_loaded is None else max_loaded
+        self.idle_seconds = config.TENANT_IDLE_SECONDS if idle_seconds is None else idle_seconds
+        self.max_bytes = config.TENANT_MAX_BYTES if max_bytes is None else max_bytes
+        self.sweep_interval = min(60, self.idle_seconds / 4) if sweep_interval is None else sweep_interval
+        self._last_sweep = time.monotonic()
+        self._tenants = OrderedDict()  # tenant_id -> Tenant, least recently used first
+        self._loading = {}  # tenant_id -> lock held while that tenant loads
+        self._lock = threading.Lock()
+        self._embedder = None
+        self._reindex_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='tenant-reindex')
+        self.counters = {'loads': 0, 'evictions': 0, 'reloads': 0}
+        os.makedirs(config.TENANT_DATA_DIR, exist_ok=True)
+    
+    def profile_path(self, tenant_id):
+        if not self._TENANT_ID.match(tenant_id or ''):
+            raise ValueError(f"Invalid tenant id: {tenant_id!r}")
+        return os.path.join(self.profile_dir, f"{tenant_id}.json")
+    
+    def get(self, tenant_id):
+        """Loaded tenant for tenant_id; raises KeyError for unknown tenants, ValueError for bad ids"""
+        path = self.profile_path(tenant_id)
+        with self._lock:
+            tenant = self._touch(tenant_id)
+            if time.monotonic() - self._last_sweep >= self.sweep_interval:
+                self._evict()
+            if tenant is None:
+                load_lock = self._loading.setdefault(tenant_id, threading.Lock())
+        if tenant is not None:
+            self._maybe_reload(tenant)
+            return tenant
+        
+        # One loader per tenant; concurrent first requests wait for it instead of loading twice
+        with load_lock:
+            try:
+                with self._lock:
+                    tenant = self._touch(tenant_id)
+                if tenant is None:
+                    tenant = self._load(tenant_id, path)
+                    with self._lock:
+                        self._tenants[tenant_id] = tenant
+                        self.counters['loads'] += 1
+                        self._evict()
+            finally:
+                # Failed loads (unknown tenants included) must not leave their lock behind
+                with self._lock:
+                    if self._loading.get(tenant_id) is load_lock:
+                        del self._loading[tenant_id]
+        return tenant
+    
+    def _touch(self, tenant_id):
+        tenant = self._tenants.get(tenant_id)
+        if tenant is not None:
+            tenant.last_used = time.monotonic()
+            self._tenants.move_to_end(tenant_id)
+        return tenant
+    
+    def _tenant_index(self, tenant_id):
+        if config.VECTOR_BACKEND == 'local':
+            if self._embedder is None:
+                self._embedder = create_embedder()
+            return LocalVectorIndex(path=os.path.join(config.LOCAL_INDEX_PATH, 'tenants', tenant_id), embedder=self._embedder)
+        if self.base_index is None:
+            self.base_index = create_vector_index()
+        return NamespacedIndex(self.base_index, tenant_id)
+    
+    def _load(self, tenant_id, path):
+        if not os.path.exists(path):
+            raise KeyError(f"Unknown tenant: {tenant_id}")
+        store = ProfileStore(path)
+        profile_data = store.data
+        if not profile_data:
+            raise KeyError(f"Profile for tenant {tenant_id} could not be loaded")
+        
+        index = self._tenant_index(tenant_id)
+        manifest_path = os.path.join(config.TENANT_DATA_DIR, f"{tenant_id}.manifest.json")
+        try:
+            current_count = index.info().vector_count
+        except Exception:
+            current_count = 0
+        # With a manifest this only hashes chunks; nothing is uploaded unless the profile changed
+        sync_vectors(index, iter_profile_chunks(profile_data), mode='incremental', current_count=current_count, manifest_path=manifest_path)
+        if hasattr(index, 'persist'):
+            index.persist()
+        if config.HYBRID_MODE != 'off':
+            index.lexical_index = BM25Index(iter_profile_chunks(profile_data))
+        if config.CHUNK_STORE_ENABLED:
+            index.chunk_store = ChunkStore(iter_profile_chunks(profile_data))
+        
+        # Parsed JSON plus derived chunks/BM25 postings run to several times the file size
+        approx_bytes = os.path.getsize(path) * 8
+        if config.VECTOR_BACKEND == 'local':
+            approx_bytes += index.info().vector_count * index.embedder.dimension * 4
+        tenant = Tenant(tenant_id, store, index, manifest_path, approx_bytes)
+        store.on_change(lambda updated_profile: self._reindex_executor.submit(reindex_profile, index, updated_profile, manifest_path))
+        logger.info("Loaded tenant %s (~%d KB)", tenant_id, approx_bytes // 1024)
+        return tenant
+    
+    def _maybe_reload(self, tenant):
+        """Stat the tenant's profile at most every PROFILE_WATCH_INTERVAL seconds; edits reindex in the background"""
+        if config.PROFILE_WATCH_INTERVAL <= 0 or time.monotonic() - tenant.last_checked < config.PROFILE_WATCH_INTERVAL:
+            return
+        tenant.last_checked = time.monotonic()
+        if tenant.store.reload():
+            with self._lock:
+                self.counters['reloads'] += 1
+    
+    def _evict(self):
+        """Drop idle tenants, then least recently used ones until within max_loaded/max_bytes (lock held)"""
+        now = self._last_sweep = time.monotonic()
+        total_bytes = sum(tenant.approx_bytes for tenant in self._tenants.values())
+        while self._tenants:
+            tenant_id, oldest = next(iter(self._tenants.items()))
+            over_limit = len(self._tenants) > self.max_loaded or total_bytes > self.max_bytes
+            if not over_limit and now - oldest.last_used < self.idle_seconds:
+                break
+            del self._tenants[tenant_id]
+            total_bytes -= oldest.approx_bytes
+            self.counters['evictions'] += 1
+            logger.info("Unloaded tenant %s", tenant_id)
+    
+    def sweep(self):
+        """Unload idle tenants now (get() also does this, at most every sweep_interval seconds)"""
+        with self._lock:
+            self._evict()
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'loaded': len(self._tenants),
+                'approx_bytes': sum(tenant.approx_bytes for tenant in self._tenants.values()),
+                **self.counters
+            }
@@ -0,0 +1,308 @@
+"""Upstream calls to Upstash and Groq: timeouts, retries, hedging, circuit breakers and pooled clients"""
+
+import re
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from . import config
+from .observability import logger, STAGE_METRICS
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open"""
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open trial request"""
+    
+    def __init__(self, name, failure_threshold=None, reset_seconds=None):
+        self.name = name
+        self.failure_threshold = config.BREAKER_FAILURE_THRESHOLD if failure_threshold is None else failure_threshold
+        self.reset_seconds = config.BREAKER_RESET_SECONDS if reset_seconds is None else reset_seconds
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.counters = {'calls': 0, 'failures': 0, 'retries': 0, 'short_circuits': 0, 'hedges': 0, 'hedge_wins': 0, 'opens': 0}
+    
+    def count(self, counter, amount=1):
+        with self._lock:
+            self.counters[counter] += amount
+    
+    def allow(self):
+        """Whether a request may go out now; open circuits let one trial through after reset_seconds"""
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = 'half_open'
+                self._trial_in_flight = False
+            if self.state == 'closed' or (self.state == 'half_open' and not self._trial_in_flight):
+                self._trial_in_flight = self.state == 'half_open'
+                return True
+            self.counters['short_circuits'] += 1
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+            self.state = 'closed'
+    
+    def release(self):
+        """End a call that says nothing about the upstream's health (e.g. a local programming error)"""
+        with self._lock:
+            self._trial_in_flight = False
+    
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self.counters['failures'] += 1
+            self._trial_in_flight = False
+            if self.state == 'half_open' or (self.state == 'closed' and self._failures >= self.failure_threshold):
+                if self.state != 'open':
+                    self.counters['opens'] += 1
+                    logger.error(f"⚡ Circuit for {self.name} opened after {self._failures} failures")
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+    
+    def stats(self):
+        with self._lock:
+            return {'state': self.state, **self.counters}
+
+UPSTREAM_BREAKERS = {'vector': CircuitBreaker('vector'), 'groq': CircuitBreaker('groq')}
+
+# Worker threads for hedged vector queries (the losing request finishes in the background)
+_hedge_executor = ThreadPoolExecutor(max_workers=config.UPSTREAM_POOL_SIZE * 2, thread_name_prefix='vector-hedge')
+
+# Transport/timeout exception classes by name, so httpx/groq need not be imported to classify their errors
+# (httpx.TransportError covers connect/read/write/pool timeouts and protocol errors; groq.APIConnectionError
+# covers APITimeoutError)
+_TRANSPORT_ERROR_CLASSES = {'TransportError', 'TimeoutException', 'APIConnectionError'}
+# upstash_vector raises UpstashError(<JSON "error" string>) without the HTTP status, so 429/5xx are told by message
+_TRANSIENT_UPSTASH_ERROR = re.compile(
+    r"rate.?limit|too many requests|max(?:imum)? requests|limit exceeded|quota|timed? ?out|temporarily|"
+    r"unavailable|overloaded|internal (?:server )?error|bad gateway|try again",
+    re.IGNORECASE
+)
+
+def upstream_answered(error):
+    """Whether an error is the upstream's own (4xx/5xx or an API error body) rather than a local failure"""
+    status_code = getattr(error, 'status_code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    return isinstance(status_code, int) or type(error).__name__ == 'UpstashError'
+
+def is_retryable_error(error):
+    """Timeouts, transport errors, 429s and 5xx are retried. Other 4xx and API errors are not,
+    and neither are programming errors (TypeError, KeyError, ...), which say nothing about the upstream"""
+    if isinstance(error, CircuitOpenError):
+        return False
+    status_code = getattr(error, 'status_code', None)
+    if status_code is None:
+        status_code = getattr(getattr(error, 'response', None), 'status_code', None)
+    if isinstance(status_code, int):
+        return status_code == 429 or status_code >= 500
+    if type(error).__name__ == 'UpstashError':
+        return bool(_TRANSIENT_UPSTASH_ERROR.search(str(error)))
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return any(cls.__name__ in _TRANSPORT_ERROR_CLASSES for cls in type(error).__mro__)
+
+def _retry_delay(attempt):
+    """Full-jitter exponential backoff in seconds"""
+    return random.uniform(0, config.UPSTREAM_RETRY_BASE_MS * (2 ** attempt)) / 1000
+
+def _hedged_call(breaker, call, hedge_after_ms):
+    """Run call(); if it has not finished after hedge_after_ms, race a second identical call"""
+    primary = _hedge_executor.submit(call)
+    done, _ = wait([primary], timeout=hedge_after_ms / 1000)
+    if done:
+        return primary.result()
+    breaker.count('hedges')
+    hedge = _hedge_executor.submit(call)
+    pending = {primary, hedge}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is hedge:
+                    breaker.count('hedge_wins')
+                return future.result()
+            error = future.exception()
+    raise error
+
+def call_upstream(name, func, *args, retries=None, hedge_after_ms=0, **kwargs):
+    """Call an upstream through its circuit breaker with jittered retries and optional hedging.
+    
+    Raises CircuitOpenError without calling when the circuit is open, and the last
+    error once retries are exhausted. Per-attempt latency is observed as the
+    'upstream_<name>' stage so /metrics shows its p50/p95/p99.
+    """
+    breaker = UPSTREAM_BREAKERS[name]
+    retries = config.UPSTREAM_MAX_RETRIES if retries is None else retries
+    call = lambda: func(*args, **kwargs)
+    
+    for attempt in range(retries + 1):
+        if not breaker.allow():
+            raise CircuitOpenError(f"{name} circuit is open")
+        breaker.count('calls')
+        started = time.perf_counter()
+        try:
+            result = _hedged_call(breaker, call, hedge_after_ms) if hedge_after_ms > 0 else call()
+        except Exception as e:
+            STAGE_METRICS.observe(f"upstream_{name}", (time.perf_counter() - started) * 1000)
+            if not is_retryable_error(e):
+                if upstream_answered(e):
+                    breaker.record_success()  # the upstream answered; the request itself was bad
+                else:
+                    breaker.release()
+                raise
+            breaker.record_failure()
+            if attempt == retries:
+                raise
+            breaker.count('retries')
+            logger.debug(f"🔁 {name} call failed ({type(e).__name__}), retry {attempt + 1}/{retries}")
+            time.sleep(_retry_delay(attempt))
+            continue
+        STAGE_METRICS.observe(f"upstream_{name}", (time.perf_counter() - started) * 1000)
+        breaker.record_success()
+        return result
+
+async def async_call_upstream(name, func, *args, retries=None, timeout=None, hedge_after_ms=0, **kwargs):
+    """asyncio counterpart of call_upstream for coroutine functions (shares the same breakers)"""
+    breaker = UPSTREAM_BREAKERS[name]
+    retries = config.UPSTREAM_MAX_RETRIES if retries is None else retries
+    
+    async def attempt_once():
+        coroutine = func(*args, **kwargs)
+        return await (asyncio.wait_for(coroutine, timeout) if timeout else coroutine)
+    
+    async def hedged():
+        primary = asyncio.ensure_future(attempt_once())
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after_ms / 1000)
+        if done:
+            return primary.result()
+        breaker.count('hedges')
+        hedge = asyncio.ensure_future(attempt_once())
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if task is hedge:
+                        breaker.count('hedge_wins')
+                    return task.result()
+                error = task.exception()
+        raise error
+    
+    for attempt in range(retries + 1):
+        if not breaker.allow():
+            raise CircuitOpenError(f"{name} circuit is open")
+        breaker.count('calls')
+        started = time.perf_counter()
+        try:
+            result = await (hedged() if hedge_after_ms > 0 else attempt_once())
+        except Exception as e:
+            STAGE_METRICS.observe(f"upstream_{name}", (time.perf_counter() - started) * 1000)
+            if not (isinstance(e, asyncio.TimeoutError) or is_retryable_error(e)):
+                if upstream_answered(e):
+                    breaker.record_success()
+                else:
+                    breaker.release()
+                raise
+            breaker.record_failure()
+            if attempt == retries:
+                raise
+            breaker.count('retries')
+            await asyncio.sleep(_retry_delay(attempt))
+            continue
+        STAGE_METRICS.observe(f"upstream_{name}", (time.perf_counter() - started) * 1000)
+        breaker.record_success()
+        return result
+
+def render_upstream_prometheus():
+    """Prometheus text for circuit breaker state and retry/hedge counters per upstream"""
+    lines = [
+        "# HELP digitaltwin_upstream_circuit_open Whether the upstream's circuit breaker is open (1) or half-open (0.5).",
+        "# TYPE digitaltwin_upstream_circuit_open gauge"
+    ]
+    snapshot = {name: breaker.stats() for name, breaker in UPSTREAM_BREAKERS.items()}
+    open_values = {'closed': 0, 'half_open': 0.5, 'open': 1}
+    for name, stats in snapshot.items():
+        lines.append(f'digitaltwin_upstream_circuit_open{{upstream="{name}"}} {open_values[stats["state"]]}')
+    lines.append("# HELP digitaltwin_upstream_events_total Upstream calls, failures, retries, hedges and short-circuited requests.")
+    lines.append("# TYPE digitaltwin_upstream_events_total counter")
+    for name, stats in snapshot.items():
+        for event, count in stats.items():
+            if event != 'state':
+                lines.append(f'digitaltwin_upstream_events_total{{upstream="{name}",event="{event}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+def _pooled_http_limits():
+    import httpx
+    return httpx.Limits(max_connections=config.UPSTREAM_POOL_SIZE, max_keepalive_connections=config.UPSTREAM_POOL_SIZE)
+
+def _upstream_timeout(seconds):
+    import httpx
+    return httpx.Timeout(seconds, connect=min(config.UPSTREAM_CONNECT_TIMEOUT, seconds))
+
+def _raise_for_transient_status(response):
+    """httpx response hook: raise 429/5xx as HTTPStatusError, keeping the status code that
+    upstash_vector would otherwise reduce to an UpstashError message (or a JSON decode error)"""
+    if response.status_code == 429 or response.status_code >= 500:
+        response.read()
+        response.raise_for_status()
+
+async def _araise_for_transient_status(response):
+    if response.status_code == 429 or response.status_code >= 500:
+        await response.aread()
+        response.raise_for_status()
+
+def configure_vector_client(index, asynchronous=False):
+    """Give an upstash index a pooled HTTP client with our timeout; retries move to call_upstream.
+    
+    upstash-vector (pinned to 0.8.x) has no timeout or http_client option, only a private
+    `_client` with a fixed 600s timeout. It is replaced only if it is still the httpx client
+    we expect; otherwise the SDK's client is kept and a warning logged.
+    """
+    if not hasattr(index, '_client'):
+        return index
+    import httpx
+    client_class = httpx.AsyncClient if asynchronous else httpx.Client
+    if not isinstance(index._client, client_class):
+        logger.warning(f"⚠️ Unrecognized upstash_vector client ({type(index._client).__name__}); "
+                       f"vector requests keep the SDK's timeout instead of UPSTREAM_VECTOR_TIMEOUT")
+        return index
+    hook = _araise_for_transient_status if asynchronous else _raise_for_transient_status
+    index._client = client_class(
+        timeout=_upstream_timeout(config.UPSTREAM_VECTOR_TIMEOUT),
+        limits=_pooled_http_limits(),
+        event_hooks={'response': [hook]}
+    )
+    return index
+
+def setup_groq_client():
+    """Setup Groq client"""
+    if not config.GROQ_API_KEY:
+        print("❌ GROQ_API_KEY not found in .env file")
+        return None
+    
+    try:
+        import httpx
+        from groq import Groq
+        
+        # Retries happen in call_upstream (with jitter and the circuit breaker), not in the SDK
+        client = Groq(
+            api_key=config.GROQ_API_KEY,
+            timeout=_upstream_timeout(config.UPSTREAM_LLM_TIMEOUT),
+            max_retries=0,
+            http_client=httpx.Client(limits=_pooled_http_limits())
+        )
+        print("✅ Groq client initialized successfully!")
+        return client
+    except Exception as e:
+        print(f"❌ Error initializing Groq client: {str(e)}")
+        return None
@@ -0,0 +1,40 @@
+import os
+import sys
+import json
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, 'benchmarks'))
+
+import digitaltwin_rag as rag
+from digitaltwin import caches, config, conversation
+from fakes import FakeIndex, FakeGroq
+
+@pytest.fixture
+def profile():
+    with open(os.path.join(REPO_DIR, config.JSON_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+@pytest.fixture(autouse=True)
+def isolated_state(tmp_path, monkeypatch):
+    """Fresh caches and a throwaway vector manifest for every test"""
+    monkeypatch.setattr(config, 'VECTOR_MANIFEST_FILE', str(tmp_path / 'manifest.json'))
+    monkeypatch.setattr(caches, 'RETRIEVAL_CACHE', rag.RetrievalCache())
+    monkeypatch.setattr(caches, 'ANSWER_CACHE', rag.AnswerCache())
+    monkeypatch.setattr(conversation, 'CONVERSATIONS', rag.ConversationStore())
+
+@pytest.fixture
+def index(profile):
+    """FakeIndex synced with the profile, carrying its own BM25 index and chunk store"""
+    fake = FakeIndex()
+    rag.sync_vectors(fake, rag.iter_profile_chunks(profile), current_count=0)
+    fake.lexical_index = rag.BM25Index(rag.iter_profile_chunks(profile))
+    fake.chunk_store = rag.ChunkStore(rag.iter_profile_chunks(profile))
+    return fake
+
+@pytest.fixture
+def groq_client():
+    return FakeGroq()
@@ -0,0 +1,62 @@
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import digitaltwin_rag as rag
+
+QUESTION = "What are your Python skills?"
+
+def test_repeated_question_is_served_from_the_answer_cache(index, groq_client, profile):
+    first = rag.rag_query_detailed(index, groq_client, QUESTION, profile)
+    second = rag.rag_query_detailed(index, groq_client, "what are your python skills", profile)
+    assert first['source'] == 'rag' and second['source'] == 'cache'
+    assert second['answer'] == first['answer']
+    assert groq_client.requests == 1
+
+def test_profile_edit_invalidates_cached_answers(index, groq_client, profile):
+    rag.rag_query_detailed(index, groq_client, QUESTION, profile)
+    edited = copy.deepcopy(profile)
+    edited['personal']['summary'] = edited['personal'].get('summary', '') + " Now also fluent in Rust."
+    assert rag.get_profile_version(edited) != rag.get_profile_version(profile)
+    
+    assert rag.rag_query_detailed(index, groq_client, QUESTION, edited)['source'] == 'rag'
+    assert groq_client.requests == 2
+
+def test_answer_cache_ttl_and_lru():
+    cache = rag.AnswerCache(max_entries=2, ttl_seconds=0.05, cache_dir='')
+    cache.set('a', "A")
+    cache.set('b', "B")
+    cache.get('a')
+    cache.set('c', "C")  # evicts 'b', the least recently used
+    assert cache.get('b') is None and cache.get('a') == "A"
+    time.sleep(0.06)
+    assert cache.get('a') is None
+
+def test_answer_cache_disk_tier_survives_restart(tmp_path):
+    rag.AnswerCache(cache_dir=str(tmp_path)).set('key', "persisted")
+    assert rag.AnswerCache(cache_dir=str(tmp_path)).get('key') == "persisted"
+
+def test_answer_cache_disk_tier_is_bounded(tmp_path):
+    cache = rag.AnswerCache(max_entries=4, cache_dir=str(tmp_path))
+    for number in range(10):
+        cache.set(f"key{number}", f"answer {number}")
+    assert len(list(tmp_path.glob('*.json'))) <= 4
+    assert not list(tmp_path.glob('*.tmp'))
+    assert rag.AnswerCache(max_entries=4, cache_dir=str(tmp_path)).get('key9') == "answer 9"
+    
+    # A restart prunes files that outlived the TTL, even if nothing reads them
+    assert rag.AnswerCache(max_entries=4, ttl_seconds=0, cache_dir=str(tmp_path)).stats()['entries'] == 0
+    assert not list(tmp_path.glob('*.json'))
+
+def test_concurrent_writers_of_one_key_do_not_collide(tmp_path):
+    cache = rag.AnswerCache(cache_dir=str(tmp_path))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda number: cache.set('key', f"answer {number}"), range(64)))
+    assert [path.name for path in tmp_path.iterdir()] == ['key.json']
+    assert rag.AnswerCache(cache_dir=str(tmp_path)).get('key').startswith("answer ")
+
+def test_disk_write_errors_keep_the_memory_entry(tmp_path):
+    cache = rag.AnswerCache(cache_dir=str(tmp_path / 'cache'))
+    (tmp_path / 'cache').rmdir()
+    cache.set('key', "in memory")
+    assert cache.get('key') == "in memory"
@@ -0,0 +1,38 @@
+import asyncio
+from types import SimpleNamespace
+
+import digitaltwin_rag as rag
+from fakes import FakeGroq
+
+class AsyncFakeGroq(FakeGroq):
+    """FakeGroq with an awaitable chat.completions.create, like groq.AsyncGroq"""
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        create = self._create
+        
+        async def acreate(**kwargs):
+            return create(**kwargs)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=acreate))
+
+def test_async_rag_query_many_answers_every_question(index, profile):
+    questions = ["What programming languages do you know?", "What is your educational background?", "Tell me about your Food RAG Application project"]
+    answers = asyncio.run(rag.async_rag_query_many(index, AsyncFakeGroq(), questions, profile, max_concurrency=2))
+    assert len(answers) == 3 and all(answer and not answer.startswith("❌") for answer in answers)
+
+def test_async_history_answers_bypass_the_cache(index, profile):
+    groq_client = AsyncFakeGroq()
+    question = "What technologies did you use?"
+    asyncio.run(rag.async_rag_query(index, groq_client, question, profile))
+    asyncio.run(rag.async_rag_query(index, groq_client, question, profile, history="User: Tell me about the Food RAG project"))
+    asyncio.run(rag.async_rag_query(index, groq_client, question, profile))
+    assert groq_client.requests == 2  # the history-free answer was cached, the history one neither read nor written
+
+def test_async_session_rewrites_follow_ups(index, profile):
+    store = rag.ConversationStore()
+    groq_client = AsyncFakeGroq()
+    asyncio.run(rag.async_answer_in_session(index, groq_client, "Tell me about your Food RAG Application project", profile, 'a', store))
+    asyncio.run(rag.async_answer_in_session(index, groq_client, "What technologies did it use?", profile, 'a', store))
+    session = store.get('a')
+    assert session.turns[-1]['standalone'].startswith("What technologies did it use? (regarding: ")
+    assert "Food RAG" in session.turns[-1]['standalone']
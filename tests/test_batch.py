@@ -0,0 +1,54 @@
+import json
+
+import digitaltwin_rag as rag
+from digitaltwin import batch
+
+def write_questions(path, questions):
+    path.write_text("".join(json.dumps({'id': question_id, 'question': question}) + "\n" for question_id, question in questions))
+
+def read_rows(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+def test_resume_keeps_one_final_row_per_id(tmp_path, index, groq_client, profile, monkeypatch):
+    questions = tmp_path / "questions.jsonl"
+    output = tmp_path / "results.jsonl"
+    write_questions(questions, [('q1', "What are your Python skills?"), ('q2', "Tell me about your projects"), ('q3', "What did you study?")])
+    
+    # First run: q2 fails
+    answer = rag.answer_question_detailed
+    def flaky(index, groq_client, question, profile_data=None):
+        if 'projects' in question:
+            return {'answer': "❌ Error generating response: upstream down", 'source': 'error'}
+        return answer(index, groq_client, question, profile_data)
+    monkeypatch.setattr(batch, 'answer_question_detailed', flaky)
+    counts = rag.run_batch(index, groq_client, profile, str(questions), str(output), workers=2)
+    assert counts == {'ok': 2, 'error': 1, 'skipped': 0}
+    
+    # Resume: only q2 is retried, and its error row is replaced rather than duplicated
+    monkeypatch.setattr(batch, 'answer_question_detailed', answer)
+    counts = rag.run_batch(index, groq_client, profile, str(questions), str(output), workers=2)
+    assert counts == {'ok': 1, 'error': 0, 'skipped': 2}
+    rows = read_rows(output)
+    assert sorted(row['id'] for row in rows) == ['q1', 'q2', 'q3']
+    assert all(row['status'] == 'ok' for row in rows)
+
+def test_load_batch_results_takes_last_row_per_id(tmp_path):
+    output = tmp_path / "results.jsonl"
+    output.write_text(
+        json.dumps({'id': 'q1', 'status': 'error'}) + "\n"
+        + json.dumps({'id': 'q2', 'status': 'ok'}) + "\n"
+        + json.dumps({'id': 'q1', 'status': 'ok'}) + "\n"
+        + '{"id": "q3", "sta'  # torn line from an interrupted run
+    )
+    results = rag.load_batch_results(str(output))
+    assert list(results) == ['q1', 'q2']
+    assert results['q1']['status'] == 'ok'
+    assert rag.load_completed_batch_ids(str(output)) == {'q1', 'q2'}
+    
+    rag.compact_batch_results(str(output))
+    assert read_rows(output) == [{'id': 'q1', 'status': 'ok'}, {'id': 'q2', 'status': 'ok'}]
+
+def test_missing_output_is_not_created_by_compaction(tmp_path):
+    output = tmp_path / "results.jsonl"
+    assert rag.compact_batch_results(str(output)) == {}
+    assert not output.exists()
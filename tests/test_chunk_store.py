@@ -0,0 +1,35 @@
+import copy
+
+import digitaltwin_rag as rag
+from digitaltwin import caches, config
+
+QUESTION = "Tell me about your Food RAG Application project"
+
+def test_index_holds_only_filterable_metadata(index):
+    for vector_id in rag.list_vector_ids(index):
+        metadata = index.fetch(ids=[vector_id], include_metadata=True)[0].metadata
+        assert set(metadata) <= set(config.INDEX_METADATA_FIELDS)
+
+def test_cached_retrievals_are_hydrated_from_the_current_store(index, profile):
+    first = rag.query_vectors(index, QUESTION)
+    assert first and first[0].metadata['content']
+    
+    # Title/tag edits do not change the vector hash; a cache hit must still see them
+    records = {result.id: dict(index.chunk_store.get(result.id), title="Renamed") for result in first}
+    index.chunk_store._records.update(records)
+    hits = caches.RETRIEVAL_CACHE.hits
+    second = rag.query_vectors(index, QUESTION)
+    assert caches.RETRIEVAL_CACHE.hits == hits + 1
+    assert [result.id for result in second] == [result.id for result in first]
+    assert all(result.metadata['title'] == "Renamed" for result in second)
+
+def test_reindex_swaps_stores_and_invalidates_cache(index, profile, tmp_path):
+    rag.query_vectors(index, QUESTION)
+    edited = copy.deepcopy(profile)
+    edited['projects_star_format'][0]['project_name'] = "Pantry Assistant"
+    generation = rag.get_index_generation(index)
+    
+    stats = rag.reindex_profile(index, edited, manifest_path=config.VECTOR_MANIFEST_FILE)
+    assert stats['upserted'] and rag.get_index_generation(index) > generation
+    titles = [result.metadata['title'] for result in rag.query_vectors(index, QUESTION)]
+    assert any("Pantry Assistant" in title for title in titles)
@@ -0,0 +1,142 @@
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import digitaltwin_rag as rag
+from digitaltwin import config
+
+STANDALONE_QUESTIONS = [
+    "What projects have you done that use Python?",
+    "Is there anything else you would like to add?",
+    "Why data analytics?",
+    "Why should we hire you over other graduates?",
+    "Is it possible to work remotely?",
+    "What is your email?",
+    "Tell me about your Food RAG Application project",
+    "What are your salary expectations?",
+    "What did you do at De Rigglets?",
+    "Which databases and cloud platforms have you used?",
+    "How do you handle conflict in a team?",
+    "Describe a project that failed and what you learned",
+    "So what are your career goals?",
+]
+
+FOLLOW_UPS = [
+    "What was the result of that project?",
+    "What technologies did it use?",
+    "Tell me more about that",
+    "How was that?",
+    "What did that involve?",
+    "What was its impact?",
+    "Why?",
+    "and at De Rigglets?",
+    "What about Tableau?",
+]
+
+@pytest.mark.parametrize('question', STANDALONE_QUESTIONS + config.SAMPLE_QUESTIONS)
+def test_standalone_questions_are_not_follow_ups(question):
+    assert not rag.is_follow_up(question)
+
+@pytest.mark.parametrize('question', STANDALONE_QUESTIONS)
+def test_rewrite_passes_standalone_questions_through(question):
+    session = rag.ConversationSession('s')
+    session.record("Tell me about your work at De Rigglets", "Tell me about your work at De Rigglets", "I was a Senior Associate.", referent="Senior Associate at De Rigglets")
+    assert session.rewrite(question) == question
+
+@pytest.mark.parametrize('question', FOLLOW_UPS)
+def test_rewrite_appends_previous_referent(question):
+    session = rag.ConversationSession('s')
+    assert session.rewrite(question) == question  # nothing to refer back to yet
+    session.record("Tell me about your Food RAG Application project", "Tell me about your Food RAG Application project", "It answers food questions.", referent="Project: Food RAG Application")
+    assert session.rewrite(question) == f"{question} (regarding: Project: Food RAG Application)"
+
+def test_history_respects_token_cap():
+    session = rag.ConversationSession('s')
+    for number in range(20):
+        session.record(f"Question number {number} about your projects?", f"Question number {number} about your projects?", "word " * 200)
+    assert len(session.turns) == config.CONVERSATION_RECENT_TURNS
+    assert rag.estimate_tokens(" | ".join(session.summary)) <= config.CONVERSATION_SUMMARY_TOKENS
+    for budget in (50, 120, config.CONVERSATION_HISTORY_TOKENS):
+        assert rag.estimate_tokens(session.history(budget)) <= budget
+
+def test_store_evicts_by_count_idle_time_and_bytes():
+    store = rag.ConversationStore(max_sessions=2, max_bytes=10 ** 9)
+    for session_id in 'abc':
+        store.record(store.get(session_id), 'q', 'q', 'a')
+    assert store.stats()['sessions'] == 2 and store.stats()['evicted'] == 1
+    
+    idle = rag.ConversationStore(idle_seconds=0.05)
+    idle.get('a')
+    time.sleep(0.1)
+    idle.get('b')
+    assert idle.stats()['sessions'] == 1
+    
+    small = rag.ConversationStore(max_bytes=1000)
+    for session_id in 'abcd':
+        small.record(small.get(session_id), 'q' * 200, 'q' * 200, 'a' * 100)
+    assert small.stats()['approx_bytes'] <= 1000
+
+def test_store_bytes_stay_exact_under_concurrent_records():
+    store = rag.ConversationStore(max_sessions=3, max_bytes=10 ** 9)
+    
+    def chat(number):
+        session = store.get(f"s{number % 5}")
+        store.record(session, f"question {number}", f"question {number}", "answer " * (number % 40))
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(chat, range(2000)))
+    assert store.stats()['approx_bytes'] == sum(session.approx_bytes for session in store._sessions.values())
+
+def test_store_rejects_bad_session_ids():
+    store = rag.ConversationStore()
+    for session_id in ('', 'x' * 129):
+        with pytest.raises(ValueError):
+            store.get(session_id)
+
+def test_follow_up_is_retrieved_with_referent_and_not_cached(index, groq_client, profile):
+    store = rag.ConversationStore()
+    first = rag.answer_in_session(index, groq_client, "Tell me about your Food RAG Application project", profile, 'a', store)
+    follow_up = rag.answer_in_session(index, groq_client, "What technologies did it use?", profile, 'a', store)
+    assert follow_up['standalone_question'].startswith("What technologies did it use? (regarding: ")
+    assert first['chunks'][0]['title'] in follow_up['standalone_question']
+    
+    # Another session asking the same follow-up must not get session a's answer from the cache
+    rag.answer_in_session(index, groq_client, "What is your educational background?", profile, 'b', store)
+    other = rag.answer_in_session(index, groq_client, "What technologies did it use?", profile, 'b', store)
+    assert other['source'] != 'cache'
+
+def test_repeated_follow_ups_do_not_nest_referents():
+    session = rag.ConversationSession('s')
+    session.record("Tell me about your Food RAG Application project", "Tell me about your Food RAG Application project", "It answers food questions.")
+    for question in ("What technologies did it use?", "How long did it take?", "Why?"):
+        standalone = session.rewrite(question)
+        assert standalone == f"{question} (regarding: Tell me about your Food RAG Application project)"
+        session.record(question, standalone, "An answer.")  # no retrieved chunk, e.g. a cached answer
+
+def test_stream_reports_retrieved_chunks_for_the_referent(index, groq_client, profile):
+    details = {}
+    answer = "".join(rag.rag_query_stream(index, groq_client, "Tell me about your Food RAG Application project", profile, details=details))
+    assert answer and details['intent'] == 'projects'
+    assert rag.top_chunk_title(details) == details['chunks'][0]['title'] and 'Food RAG' in rag.top_chunk_title(details)
+
+def test_stream_failing_part_way_is_flagged_and_not_cached(index, groq_client, profile, monkeypatch):
+    healthy_stream = groq_client._stream
+    def broken_stream(words, usage):
+        yield from itertools.islice(healthy_stream(words, usage), 3)
+        raise ConnectionError("connection reset")
+    monkeypatch.setattr(groq_client, '_stream', broken_stream)
+    
+    question = "Tell me about your Food RAG Application project"
+    details = {}
+    answer = "".join(rag.rag_query_stream(index, groq_client, question, profile, details=details))
+    assert answer.endswith("❌ Error generating response: connection reset")
+    assert details['error'] == "connection reset"
+    assert rag.rag_query_detailed(index, groq_client, question, profile)['source'] != 'cache'
+    
+    monkeypatch.setattr(groq_client, '_stream', healthy_stream)
+    details = {}
+    answer = "".join(rag.rag_query_stream(index, groq_client, question, profile, details=details))
+    assert 'error' not in details and "❌" not in answer
+    assert rag.rag_query_detailed(index, groq_client, question, profile)['source'] == 'cache'
@@ -0,0 +1,99 @@
+import pytest
+
+import digitaltwin_rag as rag
+from digitaltwin import intent
+
+def substring_classify_query_intent(query_text):
+    """The previous classifier, kept as the reference for the label table: substring scans, no word boundaries"""
+    query_lower = query_text.lower()
+    intent_scores = {}
+    for name, keywords in intent.INTENT_KEYWORDS.items():
+        score = sum(1 for keyword in keywords if keyword in query_lower)
+        if score > 0:
+            intent_scores[name] = score
+    if intent_scores:
+        return max(intent_scores, key=intent_scores.get)
+    return 'general'
+
+# (question, substring classifier label, whole-word classifier label). Rows where the two
+# differ are the intended fixes: keywords inside unrelated words ('rate' in 'accurate',
+# 'work' in 'frameworks', 'app' in 'approvals') no longer fire, and inflections the
+# substring scan never matched ('managing') now do.
+LABELLED_QUESTIONS = [
+    ('Tell me about your work experience at Newmont', 'experience', 'experience'),
+    ('What are your Python skills and proficiency levels?', 'skills', 'skills'),
+    ('Describe your Food RAG project using the STAR format', 'projects', 'projects'),
+    ('What did you study at UTS?', 'education', 'education'),
+    ('What are your salary expectations and work authorization status?', 'salary', 'salary'),
+    ('Describe your leadership experience and team coordination', 'leadership', 'leadership'),
+    ('What are your quantified achievements and measurable outcomes?', 'achievements', 'achievements'),
+    ('Where do you see your career path in five years?', 'career_goals', 'career_goals'),
+    ('Walk me through your tennis analytics dashboard portfolio', 'projects', 'projects'),
+    ('How accurate were your credit risk forecasts?', 'projects', 'projects'),
+    ('Have you used HTML and CSS in any role?', 'experience', 'experience'),
+    ('Why should we hire you over other graduates?', 'general', 'general'),
+    ('What is your educational background?', 'education', 'education'),
+    ('How would you describe your communication and teamwork?', 'leadership', 'leadership'),
+    ('Are you a good manager?', 'leadership', 'leadership'),
+    ('Have you been managing people?', 'general', 'leadership'),
+    ('Describe coordinating a cross-functional team', 'leadership', 'leadership'),
+    ('What were your biggest accomplishments?', 'achievements', 'achievements'),
+    ('Which companies have you worked for?', 'experience', 'experience'),
+    ('What are your plans for the next year?', 'career_goals', 'career_goals'),
+    ('Tell me about mentoring junior analysts', 'personal', 'personal'),
+    ('What responsibilities did you have as team leader?', 'leadership', 'leadership'),
+    ('Have you built machine learning models?', 'skills', 'skills'),
+    ('Which technologies and frameworks do you use?', 'experience', 'skills'),
+    ('What certifications do you hold?', 'education', 'education'),
+    ('Are you open to remote or hybrid work?', 'salary', 'salary'),
+    ('Do you need visa sponsorship?', 'salary', 'salary'),
+    ('What results did your dashboards deliver?', 'projects', 'projects'),
+    ('Give me an elevator pitch', 'personal', 'personal'),
+    ('What are you looking for in your next role?', 'career_goals', 'career_goals'),
+    ('How did you improve delivery metrics?', 'achievements', 'achievements'),
+    ('What degree did you complete at the University of Ghana?', 'education', 'education'),
+    ('Can you explain absolute, accurate and accurately?', 'salary', 'general'),
+    ('Can you explain approvals, assessment and attributes?', 'projects', 'general'),
+    ('What is your hourly rate?', 'salary', 'salary'),
+    ('Do you have experience with databases?', 'experience', 'experience'),
+]
+
+@pytest.mark.parametrize('question, old_label, new_label', LABELLED_QUESTIONS)
+def test_intent_labels_against_substring_classifier(question, old_label, new_label):
+    assert substring_classify_query_intent(question) == old_label
+    assert rag.classify_query_intent(question) == new_label
+
+@pytest.mark.parametrize('keyword, variant', [
+    ('manage', 'manager'),
+    ('manage', 'managing'),
+    ('manage', 'management'),
+    ('coordinate', 'coordinating'),
+    ('coordinate', 'coordinated'),
+    ('mentor', 'mentorship'),
+    ('plan', 'planning'),
+    ('company', 'companies'),
+    ('responsibility', 'responsibilities'),
+    ('accomplish', 'accomplishes'),
+    ('education', 'educational'),
+    ('career path', 'career paths'),
+    ('intern', 'internship'),
+])
+def test_keyword_variants(keyword, variant):
+    assert variant in intent._keyword_variants(keyword)
+
+@pytest.mark.parametrize('keyword, word', [
+    ('intern', 'internal'),
+    ('lead', 'leadship'),
+    ('work', 'workment'),
+    ('tool', 'toolal'),
+])
+def test_keyword_variants_are_real_words(keyword, word):
+    assert word not in intent._keyword_variants(keyword)
+
+def test_internal_tools_are_not_work_experience():
+    assert rag.classify_query_intent("What internal tools have you built?") == 'skills'
+    assert 'experience' not in rag.score_query_intents("Any internal tools?")
+
+@pytest.mark.parametrize('question', ['Do you know HTML?', 'Were your forecasts accurate?', 'Any approvals needed?'])
+def test_keywords_do_not_match_inside_other_words(question):
+    assert rag.classify_query_intent(question) == 'general'
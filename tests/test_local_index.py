@@ -0,0 +1,42 @@
+from digitaltwin.backends import HashingEmbedder, LocalVectorIndex
+
+def make_index(tmp_path):
+    return LocalVectorIndex(path=str(tmp_path / "local-index"), embedder=HashingEmbedder(dimension=64))
+
+def test_batch_upsert_fetch_update_delete(tmp_path):
+    index = make_index(tmp_path)
+    index.upsert([
+        {"id": "a", "data": "python data pipelines", "metadata": {"section": "skills"}},
+        {"id": "b", "data": "kubernetes cluster operations", "metadata": {"section": "experience"}},
+        {"id": "c", "data": "mining geology fieldwork", "metadata": {"section": "education"}},
+    ])
+    assert index.info().vector_count == 3
+    for vector_id, text in (("a", "python data pipelines"), ("b", "kubernetes cluster operations"), ("c", "mining geology fieldwork")):
+        assert index.fetch(ids=[vector_id], include_data=True)[0].data == text
+        assert index.query(data=text, top_k=1)[0].id == vector_id
+    
+    # Updating one row in a mixed batch must leave the others where they were
+    index.upsert([("b", "react frontend dashboards", {"section": "projects"}), ("d", "technical writing", {})])
+    assert index.fetch(ids=["b"], include_metadata=True)[0].metadata == {"section": "projects"}
+    assert index.query(data="react frontend dashboards", top_k=1)[0].id == "b"
+    assert index.query(data="mining geology fieldwork", top_k=1)[0].id == "c"
+    assert index.query(data="technical writing", top_k=1)[0].id == "d"
+    
+    assert index.delete(ids=["a", "c"]).deleted == 2
+    assert [result is None for result in index.fetch(ids=["a", "b", "c", "d"])] == [True, False, True, False]
+    assert [result.id for result in index.fetch(ids=["b", "d"])] == ["b", "d"]
+    assert index.query(data="technical writing", top_k=1)[0].id == "d"
+
+def test_reloaded_index_accepts_updates(tmp_path):
+    index = make_index(tmp_path)
+    index.upsert([("a", "python data pipelines", {}), ("b", "kubernetes cluster operations", {})])
+    index.persist()
+    
+    # The reloaded matrix is a read-only memory map; writes must not touch it
+    reloaded = make_index(tmp_path)
+    reloaded.upsert([("a", "react frontend dashboards", {}), ("c", "mining geology fieldwork", {})])
+    assert reloaded.query(data="react frontend dashboards", top_k=1)[0].id == "a"
+    assert reloaded.query(data="kubernetes cluster operations", top_k=1)[0].id == "b"
+    assert reloaded.query(data="mining geology fieldwork", top_k=1)[0].id == "c"
+    reloaded.persist()
+    assert make_index(tmp_path).query(data="mining geology fieldwork", top_k=1)[0].id == "c"
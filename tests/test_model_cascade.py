@@ -0,0 +1,44 @@
+import pytest
+
+import digitaltwin_rag as rag
+from digitaltwin import config
+from retrieval_eval import golden_questions
+
+@pytest.mark.parametrize('intent, context_tokens, expected', [
+    ('salary', 100, 'simple'),
+    ('education', config.MODEL_SIMPLE_MAX_CONTEXT_TOKENS, 'simple'),
+    ('personal', config.MODEL_SIMPLE_MAX_CONTEXT_TOKENS + 1, 'standard'),
+    ('skills', 50, 'standard'),
+    ('general', 600, 'standard'),
+    ('projects', config.MODEL_COMPLEX_MIN_CONTEXT_TOKENS - 1, 'standard'),
+    ('projects', config.MODEL_COMPLEX_MIN_CONTEXT_TOKENS, 'complex'),
+    ('experience', 600, 'complex'),
+])
+def test_select_generation_route(intent, context_tokens, expected):
+    route = rag.select_generation_route(intent, context_tokens)
+    assert route.name == expected
+    assert route.model == {'simple': config.GROQ_FAST_MODEL, 'standard': config.DEFAULT_MODEL, 'complex': config.GROQ_COMPLEX_MODEL}[expected]
+
+def test_simple_intents_are_packed_to_the_simple_budget():
+    for intent in config.MODEL_SIMPLE_INTENTS:
+        assert rag.context_token_budget(intent) <= config.MODEL_SIMPLE_MAX_CONTEXT_TOKENS
+    assert rag.context_token_budget('projects') == config.RAG_CONTEXT_TOKEN_BUDGET
+
+@pytest.mark.parametrize('chunking', ['section', 'hierarchical'])
+def test_every_route_is_reachable_end_to_end(chunking, profile, groq_client, monkeypatch):
+    from fakes import FakeIndex
+    monkeypatch.setattr(config, 'CHUNKING_STRATEGY', chunking)
+    monkeypatch.setattr(config, 'MODEL_SIMPLE_MAX_CONTEXT_TOKENS', 120)  # tighter than any simple-intent context here
+    index = FakeIndex()
+    rag.sync_vectors(index, rag.iter_profile_chunks(profile, strategy=chunking), current_count=0)
+    index.chunk_store = rag.ChunkStore(rag.iter_profile_chunks(profile, strategy=chunking))
+    
+    routes = {}
+    for question, _ in golden_questions(profile):
+        details = rag.rag_query_detailed(index, groq_client, question, profile, use_cache=False)
+        if 'route' in details:
+            routes.setdefault(details['route'], set()).add(details['intent'])
+    assert set(routes) == {'simple', 'standard', 'complex'}
+    # Every simple-intent question that reached generation took the fast route
+    assert routes['simple'] <= config.MODEL_SIMPLE_INTENTS
+    assert not (routes['standard'] & config.MODEL_SIMPLE_INTENTS)
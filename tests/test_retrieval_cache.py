@@ -0,0 +1,32 @@
+import copy
+
+import digitaltwin_rag as rag
+from digitaltwin import caches
+
+QUESTION = "What are your Python skills?"
+
+def test_retrieval_cache_hits_until_the_index_changes(index, profile):
+    queries = index.calls['query']
+    first = rag.query_vectors(index, QUESTION)
+    second = rag.query_vectors(index, QUESTION)
+    assert [r.id for r in second] == [r.id for r in first]
+    assert index.calls['query'] == queries + 1
+    assert caches.RETRIEVAL_CACHE.stats()['hits'] == 1
+    
+    edited = copy.deepcopy(profile)
+    edited['projects_star_format'][0]['result'] += " Adopted by two more teams."
+    rag.sync_vectors(index, rag.iter_profile_chunks(edited))
+    rag.query_vectors(index, QUESTION)
+    assert index.calls['query'] == queries + 2
+
+def test_retrieval_cache_is_bounded_by_entries_and_bytes():
+    results = [rag.LocalQueryResult('chunk', 1.0)]
+    cache = rag.RetrievalCache(max_entries=2, max_bytes=10_000)
+    for query in ("a", "b", "c"):
+        cache.set(('index', 0, query), results)
+    assert cache.get(('index', 0, 'a')) is None
+    assert cache.stats()['evictions'] == 1
+    
+    tiny = rag.RetrievalCache(max_entries=10, max_bytes=1)
+    tiny.set(('index', 0, 'a'), results)
+    assert tiny.stats()['entries'] == 0
@@ -0,0 +1,135 @@
+import http.client
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+import digitaltwin_rag as rag
+from digitaltwin import caches
+from fakes import FakeGroq
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        yield pool
+
+def test_identical_calls_share_one_execution(executor):
+    flights = rag.SingleFlight()
+    release = threading.Event()
+    calls = []
+    
+    def work(value):
+        calls.append(value)
+        release.wait(5)
+        return value * 2
+    
+    leader, leader_coalesced = flights.submit('key', executor, work, 21)
+    follower, follower_coalesced = flights.submit('key', executor, work, 21)
+    other, other_coalesced = flights.submit('other', executor, work, 1)
+    release.set()
+    
+    assert (leader_coalesced, follower_coalesced, other_coalesced) == (False, True, False)
+    assert follower is leader
+    assert leader.result(5) == 42 and other.result(5) == 2
+    assert sorted(calls) == [1, 21]
+    assert flights.counters == {'leader': 2, 'coalesced': 1}
+
+def test_finished_calls_are_forgotten(executor):
+    flights = rag.SingleFlight()
+    first, _ = flights.submit('key', executor, lambda: 1)
+    first.result(5)
+    assert flights.in_flight() == 0
+    
+    second, coalesced = flights.submit('key', executor, lambda: 2)
+    assert not coalesced and second.result(5) == 2
+
+def test_errors_are_shared_then_forgotten(executor):
+    flights = rag.SingleFlight()
+    release = threading.Event()
+    
+    def fail():
+        release.wait(5)
+        raise RuntimeError("upstream down")
+    
+    leader, _ = flights.submit('key', executor, fail)
+    follower, coalesced = flights.submit('key', executor, fail)
+    release.set()
+    assert coalesced
+    for future in (leader, follower):
+        with pytest.raises(RuntimeError):
+            future.result(5)
+    assert flights.in_flight() == 0
+
+@pytest.fixture
+def server(index, monkeypatch):
+    monkeypatch.setattr(caches, 'ANSWER_CACHE', None)
+    twin = rag.DigitalTwinServer(FakeGroq(ttft_ms=200), workers=4, request_timeout=10)
+    twin.mark_ready(index)
+    yield twin
+    twin.executor.shutdown(wait=True)
+
+def test_concurrent_identical_asks_make_one_llm_call(server):
+    questions = ["What are your Python skills?", "what are your python skills", "What are your Python skills"]
+    with ThreadPoolExecutor(max_workers=len(questions)) as clients:
+        responses = list(clients.map(server.ask, questions))
+    
+    assert all(status == 200 for status, _ in responses)
+    assert len({body['answer'] for _, body in responses}) == 1
+    assert sorted(body['coalesced'] for _, body in responses) == [False, True, True]
+    assert server.groq_client.requests == 1
+
+def test_different_questions_are_not_coalesced(server):
+    with ThreadPoolExecutor(max_workers=2) as clients:
+        responses = list(clients.map(server.ask, ["What are your Python skills?", "Tell me about your projects"]))
+    assert [body['coalesced'] for _, body in responses] == [False, False]
+    assert server.groq_client.requests == 2
+
+def test_ask_validates_and_reports_loading(index):
+    twin = rag.DigitalTwinServer(FakeGroq(), workers=1)
+    assert twin.ask("  ")[0] == 400
+    assert twin.ask("What are your Python skills?")[0] == 503
+    twin.mark_ready(index)
+    assert twin.ask("What are your Python skills?", session_id=5)[0] == 400
+    for question in (42, ["What are your Python skills?"], {'text': "hi"}):
+        assert twin.ask(question) == (400, {'error': "'question' must be a string"})
+    twin.executor.shutdown(wait=True)
+
+def test_post_rejects_malformed_content_length(server):
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), server.make_handler())
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        for length in ('abc', '-5'):
+            connection = http.client.HTTPConnection('127.0.0.1', httpd.server_address[1], timeout=5)
+            connection.putrequest('POST', '/ask')
+            connection.putheader('Content-Length', length)
+            connection.endheaders()
+            response = connection.getresponse()
+            assert response.status == 400 and json.loads(response.read()) == {'error': "Invalid Content-Length"}
+            connection.close()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+class SlowRegistry:
+    def __init__(self, index, delay):
+        self.index = index
+        self.delay = delay
+        self.threads = []
+    
+    def get(self, tenant_id):
+        self.threads.append(threading.current_thread().name)
+        time.sleep(self.delay)
+        return SimpleNamespace(index=self.index, profile_data={})
+
+def test_tenant_loads_run_on_the_worker_pool_within_the_timeout(index):
+    twin = rag.DigitalTwinServer(FakeGroq(), workers=2, request_timeout=0.2, registry=SlowRegistry(index, delay=1))
+    twin.mark_ready(index)
+    status, body = twin.ask("What are your Python skills?", tenant_id='alice')
+    assert status == 504 and 'alice' in body['error']
+    assert twin.registry.threads[0].startswith('serve')
+    assert twin.ask("What are your Python skills?", tenant_id=7)[0] == 400
+    twin.executor.shutdown(wait=True)
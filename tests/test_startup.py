@@ -0,0 +1,20 @@
+import subprocess
+import sys
+
+from conftest import REPO_DIR
+
+import digitaltwin_rag as rag
+
+def test_import_loads_no_optional_sdks():
+    """groq, upstash_vector, httpx and numpy load only when the client or local backend that needs them is created"""
+    script = "import sys, digitaltwin_rag; print(' '.join(sorted({'groq', 'upstash_vector', 'httpx', 'numpy'} & set(sys.modules))))"
+    loaded = subprocess.run([sys.executable, '-c', script], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    assert loaded == ''
+
+def test_startup_components_run_concurrently_and_report_status():
+    startup = rag.StartupComponents()
+    startup.start('profile', lambda: {'personal': {}})
+    startup.start('vector_index', lambda: None)
+    assert startup.result('profile') == {'personal': {}}
+    assert startup.result('vector_index') is None
+    assert set(startup.status()) == {'profile', 'vector_index'}
@@ -0,0 +1,30 @@
+import pytest
+
+import digitaltwin_rag as rag
+
+@pytest.mark.parametrize("question, route", [
+    ("What was your GPA?", 'gpa'),
+    ("What was your GPA at the University of Ghana?", 'gpa'),
+    ("What are your salary expectations?", 'salary'),
+    ("What's your email?", 'email'),
+])
+def test_single_fact_questions_are_routed(profile, question, route):
+    routed = rag.route_structured_question(question, profile)
+    assert routed and routed[0] == route
+
+def test_gpa_answers_only_the_institution_asked_about(profile):
+    _, answer = rag.route_structured_question("What GPA did you get at Ghana?", profile)
+    assert "University of Ghana" in answer
+
+@pytest.mark.parametrize("question", [
+    # Institutions with no GPA on file, by name and acronym, or not in the profile at all
+    "What were your grades at UTS?",
+    "What was your GPA at University of Technology Sydney?",
+    "What was your GPA at Harvard?",
+    # Past pay or pay at an employer, not the salary expectation
+    "What salary did you have at Newmont?",
+    "What was your salary at Newmont?",
+    "What was your previous salary?",
+])
+def test_questions_the_profile_cannot_answer_fall_through(profile, question):
+    assert rag.route_structured_question(question, profile) is None
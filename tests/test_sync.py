@@ -0,0 +1,52 @@
+import copy
+
+import digitaltwin_rag as rag
+from fakes import FakeIndex
+
+def sync(index, profile, **kwargs):
+    return rag.sync_vectors(index, rag.iter_profile_chunks(profile), **kwargs)
+
+def test_unchanged_profile_upserts_nothing(index, profile):
+    generation = rag.get_index_generation(index)
+    upserts = index.calls['upsert']
+    
+    stats = sync(index, profile, mode='incremental')
+    assert stats['upserted'] == [] and stats['deleted'] == []
+    assert stats['unchanged'] == stats['total']
+    assert index.calls['upsert'] == upserts
+    assert rag.get_index_generation(index) == generation
+
+def test_only_changed_chunks_are_upserted(index, profile):
+    edited = copy.deepcopy(profile)
+    edited['projects_star_format'][1]['result'] += " Cut report turnaround by a further 10%."
+    generation = rag.get_index_generation(index)
+    
+    stats = sync(index, edited, mode='incremental')
+    assert stats['upserted'] == ['project_2']
+    assert stats['deleted'] == []
+    assert "further 10%" in index._vectors['project_2'][0]
+    assert rag.get_index_generation(index) == generation + 1
+
+def test_removed_chunks_are_deleted(index, profile):
+    edited = copy.deepcopy(profile)
+    edited['projects_star_format'].pop()
+    stale_id = f"project_{len(profile['projects_star_format'])}"
+    
+    stats = sync(index, edited, mode='incremental')
+    assert stats['deleted'] == [stale_id]
+    assert stale_id not in index._vectors
+    assert rag.load_vector_manifest()['chunks'].keys() == {chunk_id for chunk_id, _, _ in rag.iter_profile_chunks(edited)}
+
+def test_full_mode_reupserts_everything(index, profile):
+    stats = sync(index, profile, mode='full')
+    assert len(stats['upserted']) == stats['total']
+    assert stats['unchanged'] == 0
+
+def test_missing_manifest_is_rebuilt_from_the_index(profile, tmp_path):
+    fake = FakeIndex()
+    fake.upsert([('orphan_chunk', "left over from an older profile", {})])
+    
+    stats = sync(fake, profile, mode='incremental', current_count=1, manifest_path=str(tmp_path / 'fresh.json'))
+    assert stats['deleted'] == ['orphan_chunk']
+    assert len(stats['upserted']) == stats['total']
+    assert rag.load_vector_manifest(str(tmp_path / 'fresh.json')) is not None
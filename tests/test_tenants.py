@@ -0,0 +1,84 @@
+import json
+import threading
+import time
+
+import pytest
+
+import digitaltwin_rag as rag
+from digitaltwin import caches, config, tenants
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch, profile):
+    """TenantRegistry over two tenant profiles, each with its own local vector index"""
+    profile_dir = tmp_path / 'profiles'
+    profile_dir.mkdir()
+    for tenant_id, name in (('alice', 'Alice Example'), ('bob', 'Bob Example')):
+        tenant_profile = dict(profile, personal=dict(profile.get('personal', {}), name=name))
+        (profile_dir / f"{tenant_id}.json").write_text(json.dumps(tenant_profile), encoding='utf-8')
+    monkeypatch.setattr(config, 'VECTOR_BACKEND', 'local')
+    monkeypatch.setattr(config, 'LOCAL_INDEX_PATH', str(tmp_path / 'index'))
+    monkeypatch.setattr(config, 'TENANT_DATA_DIR', str(tmp_path / 'tenants'))
+    return rag.TenantRegistry(profile_dir=str(profile_dir))
+
+def test_tenants_load_once_with_their_own_index(registry):
+    alice = registry.get('alice')
+    assert registry.get('alice') is alice
+    bob = registry.get('bob')
+    assert bob.index is not alice.index
+    assert alice.profile_data['personal']['name'] == 'Alice Example'
+    assert registry.stats()['loads'] == 2
+
+def test_concurrent_first_requests_share_one_load(registry):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get('alice'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(tenant) for tenant in results}) == 1
+    assert registry.stats()['loads'] == 1
+
+def test_failed_loads_do_not_leak_load_locks(registry):
+    for number in range(50):
+        with pytest.raises(KeyError):
+            registry.get(f"unknown{number}")
+    with pytest.raises(ValueError):
+        registry.get('../etc/passwd')
+    registry.get('alice')
+    assert registry._loading == {}
+
+def test_unloaded_tenant_reloads_without_upserting(registry, monkeypatch):
+    syncs = []
+    sync_vectors = rag.sync_vectors
+    monkeypatch.setattr(tenants, 'sync_vectors', lambda *args, **kwargs: syncs.append(sync_vectors(*args, **kwargs)) or syncs[-1])
+    registry.get('alice')
+    registry.max_loaded = 0
+    registry.sweep()
+    assert registry.stats()['loaded'] == 0
+    registry.max_loaded = 10
+    tenant = registry.get('alice')
+    assert tenant.index.info().vector_count > 0
+    assert registry.stats()['loads'] == 2 and registry.stats()['evictions'] == 1
+    assert syncs[0]['upserted'] and not syncs[1]['upserted']
+
+def test_tenant_sync_keeps_other_tenants_retrievals_cached(registry):
+    alice = registry.get('alice')
+    question = "What programming languages do you know?"
+    rag.query_vectors(alice.index, question)
+    generation = rag.get_index_generation(alice.index)
+    
+    bob = registry.get('bob')  # first load syncs (and bumps) bob's index only
+    assert rag.get_index_generation(bob.index) > 0
+    assert rag.get_index_generation(alice.index) == generation
+    hits = caches.RETRIEVAL_CACHE.hits
+    rag.query_vectors(alice.index, question)
+    assert caches.RETRIEVAL_CACHE.hits == hits + 1
+
+def test_idle_tenants_are_swept_without_a_new_load(registry):
+    registry.get('alice')
+    registry.get('bob')
+    registry.idle_seconds, registry.sweep_interval = 0.05, 0.02
+    time.sleep(0.1)
+    registry.get('bob')  # already loaded: no load to trigger eviction
+    assert registry.stats()['loaded'] == 1 and registry.stats()['evictions'] == 1
+    assert list(registry._tenants) == ['bob']
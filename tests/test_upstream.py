@@ -0,0 +1,107 @@
+import httpx
+import pytest
+from upstash_vector.errors import UpstashError
+
+import digitaltwin_rag as rag
+from digitaltwin import config, upstream
+
+def status_error(status_code):
+    request = httpx.Request('POST', 'https://upstream.example/query')
+    response = httpx.Response(status_code, request=request)
+    return httpx.HTTPStatusError(f"{status_code}", request=request, response=response)
+
+@pytest.mark.parametrize('error', [
+    TimeoutError(),
+    ConnectionResetError(),
+    httpx.ConnectError("connection refused"),
+    httpx.ReadTimeout("read timed out"),
+    httpx.RemoteProtocolError("server disconnected"),
+    status_error(429),
+    status_error(500),
+    status_error(503),
+    UpstashError("ERR max requests limit exceeded. Limit: 10000, Usage: 10000"),
+    UpstashError("Too Many Requests"),
+    UpstashError("Service Unavailable"),
+])
+def test_transient_errors_are_retryable(error):
+    assert rag.is_retryable_error(error)
+
+@pytest.mark.parametrize('error', [
+    TypeError("unexpected keyword argument 'vector'"),
+    ValueError("bad value"),
+    KeyError('result'),
+    AttributeError("'NoneType' object has no attribute 'id'"),
+    status_error(400),
+    status_error(401),
+    status_error(404),
+    UpstashError("Invalid filter: unexpected token"),
+    UpstashError("Unauthorized: invalid token"),
+    rag.CircuitOpenError("vector circuit is open"),
+])
+def test_permanent_and_programming_errors_are_not_retried(error):
+    assert not rag.is_retryable_error(error)
+
+def test_groq_transport_errors_are_retryable():
+    groq = pytest.importorskip('groq')
+    assert rag.is_retryable_error(groq.APITimeoutError(request=httpx.Request('POST', 'https://api.groq.com')))
+    assert rag.is_retryable_error(groq.APIConnectionError(request=httpx.Request('POST', 'https://api.groq.com')))
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = rag.CircuitBreaker('vector', failure_threshold=3, reset_seconds=60)
+    monkeypatch.setitem(rag.UPSTREAM_BREAKERS, 'vector', breaker)
+    monkeypatch.setattr(config, 'UPSTREAM_RETRY_BASE_MS', 0)
+    return breaker
+
+def failing(*errors):
+    """Callable raising each error in turn, then returning 'ok'"""
+    remaining = list(errors)
+    def call():
+        if remaining:
+            raise remaining.pop(0)
+        return 'ok'
+    return call
+
+def test_programming_errors_fail_fast_without_tripping_the_breaker(breaker):
+    for _ in range(5):
+        with pytest.raises(TypeError):
+            rag.call_upstream('vector', failing(TypeError("bug")), retries=3)
+    assert breaker.state == 'closed'
+    assert breaker.counters['calls'] == 5 and breaker.counters['retries'] == 0 and breaker.counters['failures'] == 0
+
+def test_rate_limited_upstash_calls_are_retried_and_count_as_failures(breaker):
+    assert rag.call_upstream('vector', failing(UpstashError("ERR max requests limit exceeded")), retries=2) == 'ok'
+    assert breaker.counters['retries'] == 1 and breaker.counters['failures'] == 1
+    
+    with pytest.raises(UpstashError):
+        rag.call_upstream('vector', failing(*[UpstashError("Too Many Requests")] * 3), retries=2)
+    assert breaker.state == 'open'
+    with pytest.raises(rag.CircuitOpenError):
+        rag.call_upstream('vector', failing())
+
+def test_client_errors_do_not_open_the_breaker(breaker):
+    for _ in range(5):
+        with pytest.raises(UpstashError):
+            rag.call_upstream('vector', failing(UpstashError("Invalid filter")), retries=3)
+    assert breaker.state == 'closed' and breaker.counters['retries'] == 0
+
+def test_configured_vector_client_surfaces_transient_statuses():
+    from upstash_vector import Index
+    index = rag.configure_vector_client(Index(url='https://vector.example', token='token', retries=0))
+    assert index._client.timeout.read == config.UPSTREAM_VECTOR_TIMEOUT
+    assert upstream._raise_for_transient_status in index._client.event_hooks['response']
+    
+    responses = iter([httpx.Response(429, json={'error': 'ERR max requests limit exceeded'}), httpx.Response(400, json={'error': 'Invalid filter'})])
+    client = httpx.Client(transport=httpx.MockTransport(lambda request: next(responses)), event_hooks=index._client.event_hooks)
+    with pytest.raises(httpx.HTTPStatusError) as raised:
+        client.post('https://vector.example/query', json={})
+    assert raised.value.response.status_code == 429 and rag.is_retryable_error(raised.value)
+    assert client.post('https://vector.example/query', json={}).status_code == 400  # left to the SDK's error handling
+
+def test_unrecognized_vector_client_is_left_alone(caplog):
+    class FutureSdkIndex:
+        _client = object()
+    index = FutureSdkIndex()
+    client = index._client
+    assert rag.configure_vector_client(index) is index and index._client is client
+    assert "Unrecognized upstash_vector client" in caplog.text